@@ -15,7 +15,7 @@ class Ui_ErrorDecode(object):
     def setupUi(self, ErrorDecode):
         ErrorDecode.setObjectName("ErrorDecode")
         ErrorDecode.resize(1000, 700)
-        self.widget_table = TableWidget(ErrorDecode)
+        self.widget_table = TableView(ErrorDecode)
         self.widget_table.setGeometry(QtCore.QRect(490, 80, 501, 361))
         self.widget_table.setObjectName("widget_table")
         self.groupBox = QtWidgets.QGroupBox(ErrorDecode)
@@ -68,4 +68,4 @@ class Ui_ErrorDecode(object):
         self.pushButton.setText(_translate("ErrorDecode", "保存变量定义"))
         self.label.setText(_translate("ErrorDecode", "已保存定义"))
         self.label_num.setText(_translate("ErrorDecode", "DEC:0    HEX:0"))
-from qfluentwidgets import ComboBox, LineEdit, PushButton, TableWidget, TextBrowser, TextEdit
+from qfluentwidgets import ComboBox, LineEdit, PushButton, TableView, TextBrowser, TextEdit
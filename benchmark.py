@@ -0,0 +1,831 @@
+"""性能测试脚本
+
+用法:
+    python benchmark.py                              # 运行全部测试
+    python benchmark.py batch_decode                 # 只运行指定测试
+    python benchmark.py --json results.json          # 结果保存为JSON
+    python benchmark.py --compare baseline.json      # 与之前的结果对比, 变慢超过阈值时返回非0
+
+所有输入数据由固定的随机种子生成, 同样的参数每次运行的数据都相同.
+table_render 需要PyQt5, 以 offscreen 方式运行, 其余测试不依赖Qt.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import decode_core
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# 测试名 -> 测试函数
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {}
+# 本次运行的全部结果
+RESULTS: List[dict] = []
+# 当前正在运行的测试名和测试场景
+_context = {'benchmark': '', 'case': ''}
+
+
+def benchmark(name: str):
+    """注册一个性能测试"""
+    def wrapper(func):
+        BENCHMARKS[name] = func
+        return func
+    return wrapper
+
+
+def timeit(func, *args, repeat: int = 3) -> float:
+    """运行多次取最短耗时(秒)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def section(text: str) -> None:
+    """开始一个测试场景, 之后的结果都归入该场景"""
+    print(text)
+    _context['case'] = text
+
+
+def record(label: str, seconds: float, count: Optional[int] = None) -> None:
+    RESULTS.append({
+        'benchmark': _context['benchmark'],
+        'case': _context['case'],
+        'label': label,
+        'seconds': seconds,
+        'count': count,
+        'per_second': count / seconds if count and seconds else None,
+    })
+
+
+def report(label: str, count: int, seconds: float) -> None:
+    print(f"  {label:<28} {seconds * 1000:10.2f} ms  {count / seconds:14,.0f} 值/秒")
+    record(label, seconds, count)
+
+
+def report_op(label: str, seconds: float) -> None:
+    print(f"  {label:<28} {seconds * 1000:10.3f} ms")
+    record(label, seconds)
+
+
+def make_layout(field_count: int, total_bits: int = 32):
+    """生成总位宽为 total_bits 的随机变量定义"""
+    widths = [1] * field_count
+    for _ in range(total_bits - field_count):
+        widths[random.randrange(field_count)] += 1
+    return [[f"field_{i}", w] for i, w in enumerate(widths)]
+
+
+@benchmark('batch_decode')
+def bench_batch_decode(args: argparse.Namespace) -> None:
+    count = args.count
+    layout = make_layout(8, 32)
+    values = [random.getrandbits(32) for _ in range(count)]
+    section(f"batch_decode: {count} 个32位值, {len(layout)} 个变量")
+
+    def per_value():
+        for value in values:
+            decode_core.assign_bits_to_variables(value, layout)
+
+    report('assign_bits_to_variables', count, timeit(per_value))
+    report('decode_batch(list)', count, timeit(decode_core.decode_batch, values, layout))
+    if np is not None:
+        array = np.array(values, dtype=np.uint32)
+        report('decode_batch(uint32)', count, timeit(decode_core.decode_batch, array, layout))
+        array = array.astype(np.uint64)
+        report('decode_batch(uint64)', count, timeit(decode_core.decode_batch, array, layout))
+
+
+@benchmark('encode_batch')
+def bench_encode_batch(args: argparse.Namespace) -> None:
+    import io
+    import encode_cli
+
+    count = args.count
+    layout = make_layout(8, 32)
+    values = [random.getrandbits(32) for _ in range(count)]
+    columns = decode_core.decode_batch(values, layout)
+    section(f"encode_batch: {count} 个32位值, {len(layout)} 个变量")
+
+    compiled = decode_core.compile_layout(layout)
+    records = [compiled.decode(value) for value in values]
+
+    def per_value():
+        for record in records:
+            decode_core.encode_values(record, layout)
+
+    report('encode_values', count, timeit(per_value, repeat=1))
+    report('encode_batch(list)', count, timeit(decode_core.encode_batch, columns, layout))
+    if np is not None:
+        arrays = decode_core.decode_batch(np.array(values, dtype=np.uint32), layout)
+        report('encode_batch(numpy)', count, timeit(decode_core.encode_batch, arrays, layout))
+        report('encode_batch(numpy, 不检查)', count, timeit(decode_core.encode_batch, arrays, layout, False))
+        words = decode_core.encode_batch(arrays, layout)
+        report('往返校验(numpy)', count, timeit(encode_cli.check_round_trip, words, arrays, layout))
+
+    wide = make_layout(16, 256)
+    wide_count = max(1000, count // 10)
+    wide_columns = decode_core.decode_batch([random.getrandbits(256) for _ in range(wide_count)], wide)
+    section(f"encode_batch: {wide_count} 个256位值, {len(wide)} 个变量")
+    report('encode_batch(list)', wide_count, timeit(decode_core.encode_batch, wide_columns, wide))
+
+    # 生成并写出: 穷举/随机各生成 count 个向量
+    fields = encode_cli.unique_fields(layout)
+    section(f"encode_batch: 生成并写出 {count} 个向量")
+    for fmt in ('bin', 'hex'):
+        for label, batches in (('穷举', lambda: encode_cli.iter_exhaustive(fields, {}, count=count)),
+                               ('随机', lambda: encode_cli.iter_random(fields, {}, count, seed=args.seed))):
+            def generate():
+                writer = encode_cli.VectorWriter(io.BytesIO(), fmt, 4)
+                for batch in batches():
+                    writer.write(decode_core.encode_batch(batch, layout), batch)
+
+            report(f'{label} -> {fmt}', count, timeit(generate, repeat=1))
+
+
+@benchmark('parallel_decode')
+def bench_parallel_decode(args: argparse.Namespace) -> None:
+    import decode_cli
+    import parallel_decode
+
+    count = args.count
+    layout = make_layout(8, 32)
+    header = ['file', 'offset', 'value'] + [var_name for var_name, _ in layout]
+    pattern = re.compile(decode_cli.DEFAULT_PATTERN.encode('utf-8'))
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cpu_count})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.log')
+        with open(path, 'w') as f:
+            for _ in range(count):
+                f.write(f"[ERROR] code=0x{random.getrandbits(32):08X}\n")
+        section(f"parallel_decode: {count} 行日志, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        def run(workers):
+            with open(os.devnull, 'w') as out:
+                if workers == 1:
+                    rows = decode_cli.iter_rows(path, layout, pattern)
+                    decode_cli.write_rows(rows, header, 'csv', out)
+                else:
+                    # 块大小按进程数划分, 保证每个进程都有活干
+                    chunk_size = max(os.path.getsize(path) // (workers * 4), 1 << 16)
+                    parallel_decode.decode_files([path], layout, pattern, header, 'csv',
+                                                 workers=workers, chunk_size=chunk_size, out=out)
+
+        for workers in worker_counts:
+            report(f'{workers} 进程', count, timeit(run, workers, repeat=1))
+
+
+@benchmark('buffer_decode')
+def bench_buffer_decode(args: argparse.Namespace) -> None:
+    for word_bits, field_count in ((128, 16), (4096, 512), (65536, 8192)):
+        layout = make_layout(field_count, word_bits)
+        data = random.getrandbits(word_bits).to_bytes(word_bits // 8, 'little')
+        decoder = decode_core.BufferDecoder(layout)
+        section(f"buffer_decode: {word_bits} 位状态块, {field_count} 个变量")
+
+        def via_int():
+            decode_core.assign_bits_to_variables(int.from_bytes(data, 'little'), layout)
+
+        report_op('int.from_bytes + assign_bits', timeit(via_int))
+        report_op('BufferDecoder.decode', timeit(decoder.decode, data))
+
+
+@benchmark('record_decode')
+def bench_record_decode(args: argparse.Namespace) -> None:
+    import record_decode
+
+    count = args.count
+    record_size = 16
+    layout = make_layout(24, record_size * 8)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'records.bin')
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 64)
+            f.write(random.randbytes(count * record_size))
+        records = record_decode.RecordFile(path, record_size, header_offset=64)
+        section(f"record_decode: {count} 条{record_size}字节记录, {len(layout)} 个变量, "
+                f"{os.path.getsize(path) / 1e6:.1f} MB")
+
+        def decode_columns():
+            for _ in records.columns(layout).iter_chunks():
+                pass
+
+        report('RecordColumns(内存中)', count, timeit(decode_columns))
+        report('decode_to_npy', count,
+               timeit(record_decode.decode_to_npy, records, layout, os.path.join(tmp, 'out'), repeat=1))
+        sample = min(count, 100_000)
+        report('BufferDecoder 逐条', sample, timeit(lambda: [
+            None for _, _ in zip(range(sample), decode_core.BufferDecoder(layout).iter_records(
+                records.raw.reshape(-1), record_size))], repeat=1))
+
+
+@benchmark('column_store')
+def bench_column_store(args: argparse.Namespace) -> None:
+    import tracemalloc
+    import column_store
+
+    count = args.count
+    layout = make_layout(8, 32)
+    values = np.random.default_rng(args.seed).integers(0, 1 << 32, count, dtype=np.uint64)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'decoded.edcol')
+
+        def write():
+            with column_store.ColumnStoreWriter(path, layout) as writer:
+                for start in range(0, count, 1 << 16):
+                    writer.append_values(values[start:start + (1 << 16)])
+
+        write_time = timeit(write, repeat=1)
+        section(f"column_store: {count} 个32位值, {len(layout)} 个变量, "
+                f"文件 {os.path.getsize(path) / 1e6:.1f} MB")
+        report('ColumnStoreWriter 解码并写入', count, write_time)
+
+        # 逐值 assign_bits_to_variables 的结果常驻内存时的占用, 取样本估算
+        sample = values[:min(count, 20_000)].tolist()
+        tracemalloc.start()
+        decoded = [decode_core.assign_bits_to_variables(value, layout) for value in sample]
+        dict_bytes = tracemalloc.get_traced_memory()[0] / len(sample)
+        tracemalloc.stop()
+        del decoded
+        print(f"  {'dict 每个值占用':<28} {dict_bytes:10.0f} B, "
+              f"列式文件 {os.path.getsize(path) / count:.1f} B")
+
+        name = layout[0][0]
+        report_op('ColumnStore 打开', timeit(column_store.ColumnStore, path))
+        report('ColumnStore 打开并筛选', count,
+               timeit(lambda: column_store.ColumnStore(path).where({name: 1})))
+
+
+def make_header(struct_count: int, fields_per_struct: int = 16) -> str:
+    """生成包含宏、嵌套结构体和联合体的头文件"""
+    lines = ['#define FIELD_WIDTH 3', '']
+    for i in range(struct_count):
+        lines.append(f'typedef struct {{  /* reg {i} */')
+        for j in range(fields_per_struct):
+            lines.append(f'    unsigned int f{j} : {j % 7 + 1};  // field {j}')
+        lines.append('    union { struct { unsigned lo : 4; unsigned hi : 4; } nib; unsigned char raw; } u;')
+        lines.append('    unsigned int tail : FIELD_WIDTH;')
+        lines.append(f'}} reg_{i}_t;')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+@benchmark('struct_parse')
+def bench_struct_parse(args: argparse.Namespace) -> None:
+    import c_struct_parser
+
+    for struct_count in (20, 250):
+        header = make_header(struct_count)
+        line_count = header.count('\n') + 1
+        section(f"struct_parse: {line_count} 行头文件, {struct_count} 个结构体")
+
+        def line_parser():
+            # 逐行解析整个文件(原解析器只取第一对花括号, 这里按全部行计算以便对比)
+            decode_core.parse_variable_definitions(header)
+
+        def full_parser_cold():
+            c_struct_parser._header_cache.clear()
+            c_struct_parser.parse_layout(header)
+
+        report_op('parse_variable_definitions', timeit(line_parser))
+        report_op('c_struct_parser 首次解析', timeit(full_parser_cold))
+        report_op('c_struct_parser 缓存命中', timeit(c_struct_parser.parse_layout, header))
+
+
+@benchmark('header_import')
+def bench_header_import(args: argparse.Namespace) -> None:
+    import definition_store
+    import header_import
+    from variable_saver import VariableSaver
+
+    file_count = 400
+    cpu_count = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'include')
+        for i in range(file_count):
+            directory = os.path.join(root, f"module_{i // 50}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"regs_{i}.h"), 'w') as f:
+                f.write(make_header(10).replace('reg_', f'm{i}_reg_'))
+        section(f"header_import: {file_count} 个头文件, 每个10个结构体")
+
+        def run(workers, reset=True):
+            manifest = os.path.join(tmp, 'manifest.json')
+            if reset:
+                for path in (manifest, os.path.join(tmp, 'defines.json')):
+                    if os.path.exists(path):
+                        os.remove(path)
+            saver = VariableSaver(store=definition_store.open_store(os.path.join(tmp, 'defines.json')))
+            with open(os.devnull, 'w') as out, contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+                header_import.import_headers([root], saver, manifest, workers=workers)
+
+        for workers in sorted({1, cpu_count}):
+            report_op(f'首次导入 {workers} 进程', timeit(run, workers, repeat=1))
+        report_op('再次导入(无变化)', timeit(run, cpu_count, False))
+
+        def touch_one():
+            path = os.path.join(root, 'module_0', 'regs_0.h')
+            with open(path, 'a') as f:
+                f.write('\n')
+            run(cpu_count, False)
+
+        report_op('再次导入(改动1个文件)', timeit(touch_one, repeat=1))
+
+
+def make_struct_source(layout) -> str:
+    lines = ['struct {']
+    lines += [f'    unsigned int {name} : {width};  // {name}' for name, width in layout]
+    lines.append('} Synthetic;')
+    return '\n'.join(lines)
+
+
+@benchmark('layout_scaling')
+def bench_layout_scaling(args: argparse.Namespace) -> None:
+    import c_struct_parser
+
+    for field_count in args.sizes:
+        layout = make_layout(field_count, field_count * 4)
+        source = make_struct_source(layout)
+        number = random.getrandbits(field_count * 4)
+        section(f"layout_scaling: {field_count} 个变量")
+
+        def line_parse():
+            decode_core.parse_variable_definitions(decode_core.strip_external_braces(source))
+
+        def incremental_edit():
+            # 首次解析后修改一行, 只有这一行需要重新解析
+            parser = decode_core.IncrementalStructParser()
+            parser.parse(source)
+            start = time.perf_counter()
+            parser.parse(source.replace(f'{layout[0][0]} :', f'{layout[0][0]}x :', 1))
+            return time.perf_counter() - start
+
+        def full_parse():
+            c_struct_parser._header_cache.clear()
+            c_struct_parser.parse_layout(source)
+
+        report_op('parse_variable_definitions', timeit(line_parse))
+        report_op('增量解析(修改一行)', min(incremental_edit() for _ in range(3)))
+        report_op('c_struct_parser 首次解析', timeit(full_parse))
+        report_op('assign_bits_to_variables', timeit(decode_core.assign_bits_to_variables, number, layout))
+        report_op('BufferDecoder.decode', timeit(
+            decode_core.BufferDecoder(layout).decode, number.to_bytes(field_count * 4 // 8 + 1, 'little')))
+
+
+@benchmark('compiled_decode')
+def bench_compiled_decode(args: argparse.Namespace) -> None:
+    # 每项取 --repeat 次中最快的一次; 编译耗时折算为逐个解码的值数量, 即至少解码多少个值编译才划算
+    for field_count in (1, 2, 4, 8, 16, 64, 256, 1024):
+        layout = make_layout(field_count, field_count * 4)
+        # 宽定义逐个解码较慢, 按变量数减少值的数量
+        count = max(1000, min(args.count, 4_000_000 // field_count))
+        numbers = [random.getrandbits(field_count * 4) for _ in range(count)]
+        section(f"compiled_decode: {count} 个值, {field_count} 个变量")
+
+        def interpreted():
+            for number in numbers:
+                decode_core.assign_bits_to_variables(number, layout)
+
+        compiled = decode_core.compile_layout(layout)
+        compile_time = timeit(decode_core.CompiledLayout, layout, repeat=args.repeat)
+        report_op('compile_layout (首次)', compile_time)
+        baseline = timeit(interpreted, repeat=args.repeat)
+        report('assign_bits_to_variables', count, baseline)
+        for label, func in (('CompiledLayout.decode', compiled.decode),
+                            ('CompiledLayout.decode_record', compiled.decode_record),
+                            ('CompiledLayout.decode_dict', compiled.decode_dict)):
+            def run():
+                for number in numbers:
+                    func(number)
+
+            seconds = timeit(run, repeat=args.repeat)
+            report(label, count, seconds)
+            saved = (baseline - seconds) / count
+            break_even = f"{compile_time / saved:,.0f} 个值后编译划算" if saved > 0 else "编译不划算"
+            print(f"    {baseline / seconds:.2f} 倍, {break_even}")
+
+
+@benchmark('symbol_lookup')
+def bench_symbol_lookup(args: argparse.Namespace) -> None:
+    count = args.count
+    for width, names in ((4, 10), (12, 200), (24, 200)):
+        table = decode_core.SymbolTable({i * 3: f"NAME_{i}" for i in range(names)}, width)
+        values = [random.getrandbits(width) for _ in range(count)]
+        section(f"symbol_lookup: {count} 个值, 位宽 {width}, {names} 个名称, "
+                f"{'数组' if table.dense else '字典'}查表")
+        report('SymbolTable.column', count, timeit(table.column, values, repeat=1))
+
+    layout = make_layout(8, 32)
+    for var in layout[::2]:
+        var[2:] = [None, {str(i): f"{var[0]}_{i}" for i in range(0, min(1 << var[1], 256), 2)}]
+    compiled = decode_core.compile_layout(layout)
+    numbers = [random.getrandbits(32) for _ in range(count)]
+    section(f"symbol_lookup: {count} 个值, {len(layout)} 个变量, 其中 {len(layout[::2])} 个有含义")
+    for label, func in (('CompiledLayout.decode', compiled.decode),
+                        ('CompiledLayout.decode_symbols', compiled.decode_symbols)):
+        def run():
+            for number in numbers:
+                func(number)
+
+        report(label, count, timeit(run, repeat=1))
+
+
+@benchmark('delta_decode')
+def bench_delta_decode(args: argparse.Namespace) -> None:
+    for field_count, total_bits in ((8, 32), (256, 1024), (1024, 4096)):
+        layout = make_layout(field_count, total_bits)
+        count = max(1000, min(args.count, 20_000_000 // field_count))
+        # 相邻值之间随机翻转1~3位, 模拟连续的寄存器快照
+        values = [random.getrandbits(total_bits)]
+        for _ in range(count - 1):
+            value = values[-1]
+            for _ in range(random.randint(1, 3)):
+                value ^= 1 << random.randrange(total_bits)
+            values.append(value)
+        section(f"delta_decode: {count} 个{total_bits}位值, {field_count} 个变量, 每次翻转1~3位")
+
+        index = decode_core.DeltaIndex(layout)
+        compiled = decode_core.compile_layout(layout)
+
+        def delta():
+            changes = index.changes
+            for old, new in zip(values, values[1:]):
+                changes(old, new)
+
+        def full_compare():
+            decode = compiled.decode
+            previous = decode(values[0])
+            for value in values[1:]:
+                current = decode(value)
+                [i for i, (a, b) in enumerate(zip(previous, current)) if a != b]
+                previous = current
+
+        report_op('DeltaIndex (首次)', timeit(decode_core.DeltaIndex, layout, repeat=1))
+        report('DeltaIndex.changes', count, timeit(delta, repeat=1))
+        report('完整解码后逐个比较', count, timeit(full_compare, repeat=1))
+
+
+@benchmark('stream_decode')
+def bench_stream_decode(args: argparse.Namespace) -> None:
+    import asyncio
+    import stream_decode
+
+    layout = make_layout(8, 32)
+    count = args.count
+    numbers = [random.getrandbits(32) for _ in range(count)]
+    payloads = {
+        '文本 0x..\\n': b''.join(b'0x%X\n' % n for n in numbers),
+        '二进制 4字节': b''.join(n.to_bytes(4, 'little') for n in numbers),
+    }
+    section(f"stream_decode: 本机TCP回环, {count} 个32位值, {len(layout)} 个变量")
+
+    async def run(payload, framer_factory):
+        async def send(reader, writer):
+            writer.write(payload)
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(send, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        decoder = stream_decode.StreamDecoder(layout)
+        start = time.perf_counter()
+        async with server:
+            producer = asyncio.ensure_future(
+                stream_decode.run_sources([f'tcp://127.0.0.1:{port}'], decoder, framer_factory))
+            received = 0
+            async for batch in decoder.iter_batches():
+                received += len(batch.values)
+            await producer
+        assert received == count, (received, count)
+        return time.perf_counter() - start
+
+    for label, payload in payloads.items():
+        framer_factory = stream_decode.TextFramer if '文本' in label else (lambda: stream_decode.BinaryFramer(4))
+        report(label, count, asyncio.run(run(payload, framer_factory)))
+
+
+@benchmark('decode_server')
+def bench_decode_server(args: argparse.Namespace) -> None:
+    import asyncio
+    import socket
+    import threading
+    import decode_server
+    import definition_store
+    from variable_saver import VariableSaver
+
+    layout = make_layout(8, 32)
+    per_request = 1000
+    requests = max(10, args.count // per_request)
+    batches = [[random.getrandbits(32) for _ in range(per_request)] for _ in range(requests)]
+    expected = [decode_core.decode_batch(batch, layout) for batch in batches]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saver = VariableSaver(store=definition_store.JsonDefinitionStore(os.path.join(tmp, 'defs.json')))
+        saver.store.put('Bench', layout)
+        service = decode_server.DecodeService(saver)
+        loop = asyncio.new_event_loop()
+        ready = loop.create_future()
+        task = loop.create_task(service.serve('127.0.0.1', 0, ready))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        host, port = _wait_ready(loop, ready)
+
+        bodies = [json.dumps({'layout': 'Bench', 'values': batch}).encode() for batch in batches]
+        payloads = [b'POST /decode HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n%s'
+                    % (len(body), body) for body in bodies]
+
+        def read_response(stream) -> dict:
+            length = 0
+            while True:
+                line = stream.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            return json.loads(stream.read(length))
+
+        def check(results):
+            for result, columns in zip(results, expected):
+                if result['columns'] != columns:
+                    raise AssertionError("服务返回的解码结果与 decode_batch 不一致")
+
+        def sequential():
+            # 同一连接上逐个请求, 等到响应后再发下一个
+            with socket.create_connection((host, port)) as sock, sock.makefile('rb') as stream:
+                results = []
+                for payload in payloads:
+                    sock.sendall(payload)
+                    results.append(read_response(stream))
+            check(results)
+
+        def pipelined():
+            # 一次发出全部请求, 再依次读取响应
+            with socket.create_connection((host, port)) as sock, sock.makefile('rb') as stream:
+                sender = threading.Thread(target=sock.sendall, args=(b''.join(payloads),))
+                sender.start()
+                results = [read_response(stream) for _ in payloads]
+                sender.join()
+            check(results)
+
+        def new_connections():
+            results = []
+            for payload in payloads:
+                with socket.create_connection((host, port)) as sock, sock.makefile('rb') as stream:
+                    sock.sendall(payload.replace(b'Host: localhost', b'Host: localhost\r\nConnection: close'))
+                    results.append(read_response(stream))
+            check(results)
+
+        count = requests * per_request
+        section(f"decode_server: 本机HTTP, {requests} 个请求, 每个 {per_request} 个32位值, {len(layout)} 个变量")
+        report('keep-alive 逐个请求', count, timeit(sequential, repeat=1))
+        report('keep-alive 流水线', count, timeit(pipelined, repeat=1))
+        report('每个请求新建连接', count, timeit(new_connections, repeat=1))
+        metrics = service.metrics['/decode'].to_dict()
+        print(f"  服务端 /decode: p50 {metrics['latency_ms']['p50']:.2f} ms, p99 {metrics['latency_ms']['p99']:.2f} ms")
+
+        # 取消服务并等待其结束, 再停止事件循环
+        async def shutdown():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+def _wait_ready(loop, ready):
+    """等待在另一线程的事件循环中启动的服务开始监听, 返回 (地址, 端口)"""
+    import concurrent.futures
+    result = concurrent.futures.Future()
+    loop.call_soon_threadsafe(lambda: ready.add_done_callback(lambda f: result.set_result(f.result())))
+    return result.result(5)
+
+
+@benchmark('decode_cache')
+def bench_decode_cache(args: argparse.Namespace) -> None:
+    import decode_cache
+
+    # 未缓存的宽定义逐个解码很慢, 限制数量
+    count = min(args.count, 200_000)
+    for field_count, distinct in ((4, 20), (64, 20), (64, 10_000)):
+        layout = make_layout(field_count, field_count * 4)
+        codes = [random.getrandbits(field_count * 4) for _ in range(distinct)]
+        values = [random.choice(codes) for _ in range(count)]
+        section(f"decode_cache: {count} 个值, {field_count} 个变量, {distinct} 种不同的值")
+
+        def uncached():
+            for value in values:
+                decode_core.assign_bits_to_variables(value, layout)
+
+        cache = decode_cache.DecodeCache()
+        decoder = cache.layout(layout)
+
+        def cached():
+            for value in values:
+                decoder.decode(value)
+
+        report('assign_bits_to_variables', count, timeit(uncached, repeat=1))
+        report('DecodeCache', count, timeit(cached, repeat=1))
+        stats = cache.stats()
+        print(f"  命中率 {stats['hit_rate']:.1%}, 缓存 {stats['size']} 项, 约 {stats['memory_bytes'] / 1024:.0f} KB")
+
+
+@benchmark('field_stats')
+def bench_field_stats(args: argparse.Namespace) -> None:
+    import numpy as np
+    import field_stats
+
+    count = args.count
+    # 窄变量用数组计数, 32位的变量用sketch
+    for layout in (make_layout(8, 32), [['Low', 16], ['High', 16]], [['Word', 32], ['Flag', 1]]):
+        # 少量错误码重复出现, 接近实际日志
+        codes = np.array([random.getrandbits(33) for _ in range(1000)], dtype=np.uint64)
+        values = codes[np.random.default_rng(args.seed).zipf(1.5, count) % len(codes)]
+        widths = ','.join(str(field[1]) for field in layout)
+        section(f"field_stats: {count} 个值, 位宽 {widths}")
+
+        def update():
+            stats = field_stats.FieldStats(layout, window_size=100_000, clock='count')
+            for start in range(0, count, 4096):
+                stats.update(values[start:start + 4096])
+            return stats
+
+        report('FieldStats.update', count, timeit(update, repeat=1))
+        print(f"  统计占用约 {update().memory_usage() / 1024:.0f} KB")
+
+
+@benchmark('table_render')
+def bench_table_render(args: argparse.Namespace) -> None:
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QTableView
+    from decode_table_model import DecodeTableModel
+
+    app = QApplication.instance() or QApplication([])
+    keystrokes = 20
+    for field_count in args.sizes:
+        layout = make_layout(field_count, field_count * 4)
+        numbers = [random.getrandbits(field_count * 4) for _ in range(keystrokes)]
+        section(f"table_render: {field_count} 个变量, 每次输入的解码+渲染耗时")
+
+        # 原实现: 每次输入重建全部单元格
+        table = QTableWidget()
+        table.setColumnCount(3)
+        table.resize(500, 360)
+        table.show()
+
+        def rebuild(number):
+            result = decode_core.assign_bits_to_variables(number, layout)
+            table.setRowCount(len(result) + 1)
+            for row, name in enumerate(result, 1):
+                table.setItem(row, 0, QTableWidgetItem(name))
+                table.setItem(row, 1, QTableWidgetItem(str(result[name][0])))
+                table.setItem(row, 2, QTableWidgetItem(str(result[name][1])))
+            table.viewport().repaint()
+            app.processEvents()
+
+        # 模型实现: 定义不变时只更新变化的值
+        view = QTableView()
+        model = DecodeTableModel(view)
+        view.setModel(model)
+        view.resize(500, 360)
+        view.show()
+
+        def update(number):
+            model.update(number, layout)
+            view.viewport().repaint()
+            app.processEvents()
+
+        for label, func in (('QTableWidget 重建', rebuild), ('DecodeTableModel 更新', update)):
+            func(0)
+            start = time.perf_counter()
+            for number in numbers:
+                func(number)
+            per_key = (time.perf_counter() - start) / keystrokes
+            report_op(label, per_key)
+        table.close()
+        view.close()
+
+
+@benchmark('definition_store')
+def bench_definition_store(args: argparse.Namespace) -> None:
+    import definition_store
+
+    for size in args.store_sizes:
+        definitions = {f"define_{i}": make_layout(8, 32) for i in range(size)}
+        section(f"definition_store: {size} 个定义")
+        with tempfile.TemporaryDirectory() as tmp:
+            for suffix in ('.json', '.db'):
+                path = os.path.join(tmp, 'bench' + suffix)
+                store = definition_store.open_store(path)
+                store.put_many(definitions)
+                name = f"define_{size // 2}"
+                layout = make_layout(8, 32)
+
+                def cold_load():
+                    # 丢弃JSON缓存, 模拟首次读取
+                    definition_store.JsonDefinitionStore._cache.clear()
+                    definition_store.open_store(path).get(name)
+
+                kind = suffix[1:]
+                report_op(f'{kind} 首次读取', timeit(cold_load, repeat=1))
+                report_op(f'{kind} load_single', timeit(store.get, name))
+                report_op(f'{kind} list_variables', timeit(store.names))
+                report_op(f'{kind} save', timeit(store.put, name, layout, repeat=1))
+                report_op(f'{kind} delete', timeit(store.remove, [name], repeat=1))
+                store.close()
+
+
+def result_key(result: dict) -> tuple:
+    return (result['benchmark'], result['case'], result['label'])
+
+
+def compare(baseline_path: str, threshold: float) -> bool:
+    """与之前保存的结果对比, 返回是否没有超过阈值的性能退化"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+
+    ok = True
+    print(f"\n与 {baseline_path} 对比 (阈值 {threshold:.0%}):")
+    for result in RESULTS:
+        old = baseline.get(result_key(result))
+        if old is None or not old['seconds']:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  <-- 变慢'
+            ok = False
+        elif ratio < 1 - threshold:
+            flag = '  变快'
+        print(f"  [{result['benchmark']}] {result['case']} / {result['label']}: "
+              f"{old['seconds'] * 1000:.3f} ms -> {result['seconds'] * 1000:.3f} ms ({ratio:.2f}x){flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='ErrorDecode 性能测试')
+    parser.add_argument('names', nargs='*', help=f"要运行的测试, 可选: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--count', type=int, default=1_000_000, help='每个测试解码的值数量')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10_000],
+                        help='layout_scaling/table_render 测试的变量数量')
+    parser.add_argument('--store-sizes', type=int, nargs='+', default=[10, 1000, 10_000, 100_000],
+                        help='definition_store 测试的定义数量')
+    parser.add_argument('--seed', type=int, default=0, help='生成测试数据的随机种子')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='compiled_decode 每项重复的次数, 取最快的一次 (默认: %(default)s)')
+    parser.add_argument('--json', help='把结果保存为JSON文件')
+    parser.add_argument('--compare', help='与之前保存的JSON结果对比')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定为变慢的比例 (默认: %(default)s)')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的测试: {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        # 每个测试单独设置种子, 只运行部分测试时数据也与完整运行一致
+        random.seed(f"{args.seed}:{name}")
+        _context['benchmark'] = name
+        BENCHMARKS[name](args)
+
+    if args.json:
+        numpy_version = np.__version__ if np is not None else None
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'time': datetime.datetime.now().isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'cpu_count': os.cpu_count(),
+                    'numpy': numpy_version,
+                    'args': {k: v for k, v in vars(args).items() if k not in ('json', 'compare')},
+                },
+                'results': RESULTS,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.json}")
+
+    if args.compare and not compare(args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
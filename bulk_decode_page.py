@@ -0,0 +1,116 @@
+"""批量解码页面: 粘贴一批错误码(16/10进制混合, 以换行、逗号或空格分隔), 每个值一行、每个变量一列显示"""
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QFrame, QHBoxLayout, QHeaderView, QVBoxLayout
+from qfluentwidgets import BodyLabel, ComboBox, PlainTextEdit, PrimaryPushButton, SearchLineEdit, TableView
+
+# 共享的变量定义注册表
+from definition_registry import DefinitionRegistry
+# 后台解码任务
+from decode_worker import BulkDecodeTask, WorkerPool
+# 批量解码结果表格模型
+from bulk_table_model import BulkDecodeModel
+
+# 筛选条件输入停止多久(毫秒)后才开始筛选
+FILTER_DEBOUNCE_MS = 200
+
+
+class BulkDecodePage(QFrame):
+    def __init__(self, objectName, parent=None):
+        super().__init__(parent=parent)
+        self.setObjectName(objectName)
+
+        self.registry = DefinitionRegistry.instance("data_define.json")
+        self.registry.added.connect(self.data_define_added)
+        self.registry.updated.connect(self.data_define_updated)
+        self.registry.removed.connect(self.data_define_removed)
+
+        self.comboBox_data_define = ComboBox(self)
+        self.comboBox_data_define.addItems(self.registry.names())
+        self.pushButton_decode = PrimaryPushButton('解码', self)
+        self.textEdit_input = PlainTextEdit(self)
+        self.textEdit_input.setPlaceholderText('粘贴待解析值, 16进制/10进制均可, 以换行、逗号或空格分隔')
+        self.lineEdit_filter = SearchLineEdit(self)
+        self.lineEdit_filter.setPlaceholderText('筛选: Have=3 GOOD=0x1 state=STATE_IDLE, 或原始值的16进制片段')
+        self.label_summary = BodyLabel('', self)
+
+        # 表格只读取可见行, 排序/筛选由模型完成
+        self.table_model = BulkDecodeModel(self)
+        self.table = TableView(self)
+        self.table.setModel(self.table_model)
+        self.table.setBorderVisible(True)
+        self.table.setBorderRadius(8)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(self.comboBox_data_define, 1)
+        top_layout.addWidget(self.pushButton_decode)
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.lineEdit_filter, 2)
+        filter_layout.addWidget(self.label_summary, 1)
+        self.vBoxLayout = QVBoxLayout(self)
+        self.vBoxLayout.setContentsMargins(20, 20, 20, 20)
+        self.vBoxLayout.addLayout(top_layout)
+        self.vBoxLayout.addWidget(self.textEdit_input, 1)
+        self.vBoxLayout.addLayout(filter_layout)
+        self.vBoxLayout.addWidget(self.table, 3)
+
+        self.workers = WorkerPool(parent=self)
+        self.workers.finished.connect(self.decoded)
+        self.workers.failed.connect(self.decode_failed)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+        self.filter_timer.timeout.connect(self.filter_apply)
+
+        self.pushButton_decode.clicked.connect(self.decode)
+        self.comboBox_data_define.currentTextChanged.connect(self.decode)
+        self.lineEdit_filter.textChanged.connect(self.filter_timer.start)
+        self.lineEdit_filter.searchSignal.connect(self.filter_apply)
+
+    def data_define_added(self, name):
+        self.comboBox_data_define.addItem(name)
+
+    def data_define_updated(self, name):
+        if name == self.comboBox_data_define.currentText():
+            self.decode()
+
+    def data_define_removed(self, name):
+        index = self.comboBox_data_define.findText(name)
+        if index >= 0:
+            self.comboBox_data_define.removeItem(index)
+
+    def decode(self):
+        text = self.textEdit_input.toPlainText()
+        layout = self.registry.get(self.comboBox_data_define.currentText())
+        if not text.strip():
+            return
+        if not layout:
+            self.label_summary.setText('请先选择变量定义')
+            return
+        # 解析和解码在后台执行, 重复点击时旧任务被取消
+        self.label_summary.setText('正在解码...')
+        self.workers.submit('bulk', BulkDecodeTask(text, layout))
+
+    def decoded(self, channel, generation, result):
+        self.table_model.set_result(result.values, result.headers, result.columns, result.symbol_columns)
+        summary = f'{len(result.values)} 个值, 显示 {self.table_model.rowCount()} 行, 耗时 {result.elapsed * 1000:.0f}ms'
+        if result.invalid:
+            shown = ', '.join(result.invalid[:5]) + (' ...' if len(result.invalid) > 5 else '')
+            summary += f'; 无法解析 {len(result.invalid)} 个: {shown}'
+        self.label_summary.setText(summary)
+
+    def decode_failed(self, channel, generation, error):
+        self.label_summary.setText(f'解码出错: {error}')
+
+    def filter_apply(self):
+        self.filter_timer.stop()
+        try:
+            self.table_model.set_filter(self.lineEdit_filter.text())
+        except ValueError as e:
+            self.label_summary.setText(f'筛选条件有误: {e}')
+            return
+        self.label_summary.setText(f'{len(self.table_model.values)} 个值, 显示 {self.table_model.rowCount()} 行')
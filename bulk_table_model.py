@@ -0,0 +1,150 @@
+"""批量解码结果表格的数据模型
+
+每个值一行, 每个变量一列, 有含义的变量后面紧跟一列含义. 解码结果按列保存, 表格只按需读取可见行;
+排序和筛选都在模型中对行号列表进行, 不使用 QSortFilterProxyModel, 十万行也能及时响应.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+# 解码核心逻辑(不依赖Qt)
+import decode_core
+
+
+class BulkDecodeModel(QAbstractTableModel):
+    """原始值 | 变量1 | 变量2 | ..., 行表头为该值在输入中的序号"""
+
+    RAW_HEADER = '原始值'
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.values: List[int] = []
+        # 原始值之后各列的列名和值(解析值或含义)
+        self.headers: List[str] = []
+        self.columns: List[Sequence] = []
+        # 含义列的列号(从1开始, 0为原始值) -> 含义查找表, 这些列的值是字符串或None
+        self.symbol_columns: Dict[int, decode_core.SymbolTable] = {}
+        # 显示的行 -> 输入中的序号, 经过筛选和排序
+        self.rows: List[int] = []
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+        # 筛选条件: [(列号, 值)], 列号0为原始值; 以及原始值16进制中需要包含的片段
+        self.conditions: List[Tuple[int, Union[int, str]]] = []
+        self.patterns: List[str] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers) + 1
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return super().headerData(section, orientation, role)
+        if orientation == Qt.Horizontal:
+            return self.RAW_HEADER if section == 0 else self.headers[section - 1]
+        return str(self.rows[section] + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        source = self.rows[index.row()]
+        column = index.column()
+        if column == 0:
+            return f"0x{self.values[source]:X}"
+        value = self.columns[column - 1][source]
+        return '' if value is None else str(value)
+
+    def set_result(self, values: List[int], headers: List[str], columns: List[Sequence],
+                   symbol_columns: Optional[Dict[int, decode_core.SymbolTable]] = None) -> None:
+        """显示新的解码结果, 保留当前的排序和筛选条件(列仍然存在时)
+
+        Args:
+            values: 原始值
+            headers: 原始值之后各列的列名
+            columns: 与 headers 对应的各列的值
+            symbol_columns: 含义列在 columns 中的下标 -> 该变量的含义查找表
+        """
+        self.beginResetModel()
+        self.values = values
+        self.headers = headers
+        self.columns = columns
+        self.symbol_columns = {index + 1: table for index, table in (symbol_columns or {}).items()}
+        if self.sort_column > len(headers):
+            self.sort_column = -1
+        self.conditions = [(column, value) for column, value in self.conditions
+                           if column <= len(headers) and isinstance(value, str) == (column in self.symbol_columns)]
+        self.rows = self.compute_rows()
+        self.endResetModel()
+
+    def column_values(self, column: int) -> Sequence:
+        return self.values if column == 0 else self.columns[column - 1]
+
+    def column_index(self, name: str) -> Optional[int]:
+        """列名对应的列号, 重名变量取第一个"""
+        if name == self.RAW_HEADER:
+            return 0
+        for column, header in enumerate(self.headers, 1):
+            if header == name:
+                return column
+        return None
+
+    def compute_rows(self) -> List[int]:
+        rows = range(len(self.values))
+        for column, target in self.conditions:
+            data = self.column_values(column)
+            rows = [i for i in rows if data[i] == target]
+        if self.patterns:
+            values = self.values
+            patterns = self.patterns
+            rows = [i for i in rows if all(p in f"{values[i]:X}" for p in patterns)]
+        rows = list(rows)
+        if self.sort_column >= 0:
+            # 稳定排序, 值相同的行保持输入顺序; 没有含义的行按空字符串排序
+            data = self.column_values(self.sort_column)
+            key = (lambda i: data[i] or '') if self.sort_column in self.symbol_columns else data.__getitem__
+            rows.sort(key=key, reverse=self.sort_order == Qt.DescendingOrder)
+        return rows
+
+    def sort(self, column: int, order=Qt.AscendingOrder) -> None:
+        self.beginResetModel()
+        self.sort_column = column
+        self.sort_order = order
+        self.rows = self.compute_rows()
+        self.endResetModel()
+
+    def set_filter(self, text: str) -> None:
+        """按文本筛选行
+
+        以空白分隔的条件同时满足才显示: `变量名=值` 要求该变量等于值(值的进制规则同输入框);
+        该变量有含义列时先查含义名称, 如 `state=STATE_IDLE`, `state=BAD` 也按含义而不是16进制数0xBAD匹配;
+        其它片段要求原始值的16进制表示中包含该片段(不区分大小写, 可带0x前缀).
+
+        Raises:
+            ValueError: 变量名不存在或值无法解析
+        """
+        conditions = []
+        patterns = []
+        for token in text.split():
+            if '=' in token:
+                name, _, value = token.partition('=')
+                column = self.column_index(name)
+                if column is None:
+                    raise ValueError(f"没有变量 {name}")
+                if column in self.symbol_columns:
+                    conditions.append((column, value))
+                    continue
+                # 紧跟的含义列
+                table = self.symbol_columns.get(column + 1)
+                if table is not None and value in table.names.values():
+                    conditions.append((column + 1, value))
+                else:
+                    conditions.append((column, decode_core.parse_number(value)))
+            else:
+                pattern = token.upper()
+                patterns.append(pattern[2:] if pattern.startswith('0X') else pattern)
+        self.beginResetModel()
+        self.conditions = conditions
+        self.patterns = patterns
+        self.rows = self.compute_rows()
+        self.endResetModel()
@@ -0,0 +1,874 @@
+"""C头文件位域结构体解析, 不依赖PyQt5
+
+支持:
+    - 单行/多行注释, 行尾续行符
+    - #define 对象宏(按C预处理规则在词法层面展开), 其余预处理指令忽略(#if 的各分支都会被解析)
+    - typedef, 嵌套 struct/union, 匿名成员, 数组, 枚举, 常量表达式位宽
+解析结果是一棵类型树, 可以展开为每个叶子变量的 (名称, 起始位, 位宽).
+
+默认按紧凑方式排布(与 assign_bits_to_variables 一致, 变量从最低位开始依次紧挨),
+packed=False 时按常见ABI规则对齐: 普通成员按自身大小对齐, 位域不跨越其声明类型的存储单元.
+
+同一段文本的解析结果按内容哈希缓存, 重复打开同一个头文件只需一次字典查找.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Dict, List, Optional, Tuple
+
+
+class CParseError(ValueError):
+    """头文件无法解析"""
+
+
+# ---------------------------------------------------------------- 词法分析
+
+Token = namedtuple('Token', 'kind text line')
+
+TOKEN_RE = re.compile(r'''
+    (?P<newline>\n)
+  | (?P<ws>[ \t\r\f\v]+|\\\n)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<pp>\#(?:\\\n|/\*.*?\*/|[^\n])*)
+  | (?P<number>0[xX][0-9a-fA-F]+[uUlL]*|0[bB][01]+[uUlL]*|[0-9]+[uUlL]*)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<op><<|>>|->|[{}\[\]();:,=+\-*/%&|^~<>!?.])
+  | (?P<other>.)
+''', re.S | re.X)
+
+DEFINE_RE = re.compile(r'#\s*define\s+([A-Za-z_][A-Za-z0-9_]*)(\()?(.*)', re.S)
+COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.S)
+
+
+def tokenize(text: str) -> Tuple[List[Token], Dict[str, List[Token]]]:
+    """把源码切分为记号, 同时收集 #define 对象宏
+
+    Returns:
+        (记号列表, 宏名 -> 宏体记号)
+    """
+    tokens = []
+    macros = {}
+    line = 1
+    for match in TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'pp':
+            define = DEFINE_RE.match(value)
+            # 只处理对象宏, 函数宏直接忽略
+            if define and not define.group(2):
+                body = COMMENT_RE.sub(' ', define.group(3).replace('\\\n', ' '))
+                macros[define.group(1)] = tokenize(body)[0]
+        elif kind in ('ident', 'number', 'op', 'string', 'other'):
+            tokens.append(Token(kind, value, line))
+        line += value.count('\n')
+    return tokens, macros
+
+
+def expand_macros(tokens: List[Token], macros: Dict[str, List[Token]]) -> List[Token]:
+    """展开对象宏, 宏体中再次出现的同名宏不会无限递归"""
+    if not macros:
+        return tokens
+
+    def expand(seq, active):
+        out = []
+        for tok in seq:
+            if tok.kind == 'ident' and tok.text in macros and tok.text not in active:
+                # 展开出的记号沿用宏调用处的行号, 便于报错
+                body = [Token(t.kind, t.text, tok.line) for t in macros[tok.text]]
+                out.extend(expand(body, active | {tok.text}))
+            else:
+                out.append(tok)
+        return out
+
+    return expand(tokens, frozenset())
+
+
+# ---------------------------------------------------------------- 类型
+
+class CType:
+    """C类型, bits为占用的位数, align为对齐位数"""
+    bits = 0
+    align = 8
+
+
+class ScalarType(CType):
+    def __init__(self, name: str, bits: int):
+        self.name = name
+        self.bits = bits
+        self.align = min(max(bits, 8), 64)
+
+    def __repr__(self):
+        return f"ScalarType({self.name!r}, {self.bits})"
+
+
+class EnumType(ScalarType):
+    def __init__(self, tag: Optional[str], bits: int = 32):
+        super().__init__(f"enum {tag}" if tag else 'enum', bits)
+        self.tag = tag
+        # 枚举值 -> 枚举名(同值只保留第一个名字)
+        self.values: Dict[int, str] = {}
+
+
+class ArrayType(CType):
+    def __init__(self, elem: CType, count: int):
+        self.elem = elem
+        self.count = count
+
+    @property
+    def bits(self):
+        return self.elem.bits * self.count
+
+    @property
+    def align(self):
+        return self.elem.align
+
+    def __repr__(self):
+        return f"ArrayType({self.elem!r}, {self.count})"
+
+
+Member = namedtuple('Member', 'name ctype bitwidth')
+
+
+class RecordType(CType):
+    """struct 或 union"""
+
+    def __init__(self, kind: str, tag: Optional[str], packed: bool = True):
+        self.kind = kind
+        self.tag = tag
+        self.packed = packed
+        self.members: Optional[List[Member]] = None
+        self._layout = None
+
+    @property
+    def complete(self) -> bool:
+        return self.members is not None
+
+    def layout(self) -> Tuple[List[Tuple[Member, int]], int, int]:
+        """计算成员位置
+
+        Returns:
+            ([(成员, 起始位)], 总位数, 对齐位数)
+        """
+        if self._layout is None:
+            if self.members is None:
+                raise CParseError(f"{self.kind} {self.tag} 未定义")
+            self._layout = (_layout_union if self.kind == 'union' else _layout_struct)(self.members, self.packed)
+        return self._layout
+
+    @property
+    def bits(self):
+        return self.layout()[1]
+
+    @property
+    def align(self):
+        return self.layout()[2]
+
+    def __repr__(self):
+        return f"RecordType({self.kind!r}, {self.tag!r}, {len(self.members or ())} members)"
+
+
+def _round_up(value: int, unit: int) -> int:
+    return (value + unit - 1) // unit * unit if unit else value
+
+
+def _layout_struct(members: List[Member], packed: bool):
+    placements = []
+    offset = 0
+    align = 8
+    for member in members:
+        unit = member.ctype.align
+        if member.bitwidth is not None:
+            width = member.bitwidth
+            if not packed:
+                storage = max(member.ctype.bits, 8)
+                if width == 0 or (offset % storage) + width > storage:
+                    # 0宽位域或放不下时从下一个存储单元开始
+                    offset = _round_up(offset, storage)
+                align = max(align, unit)
+            if width:
+                placements.append((member, offset))
+            offset += width
+        else:
+            if not packed:
+                offset = _round_up(offset, unit)
+                align = max(align, unit)
+            placements.append((member, offset))
+            offset += member.ctype.bits
+    size = offset if packed else _round_up(offset, align)
+    return placements, size, align
+
+
+def _layout_union(members: List[Member], packed: bool):
+    placements = []
+    size = 0
+    align = 8
+    for member in members:
+        width = member.bitwidth if member.bitwidth is not None else member.ctype.bits
+        if member.bitwidth != 0:
+            placements.append((member, 0))
+        size = max(size, width)
+        if not packed:
+            align = max(align, member.ctype.align)
+    return placements, (size if packed else _round_up(size, align)), align
+
+
+# 展开后的叶子变量
+Field = namedtuple('Field', 'name offset width ctype')
+
+
+def flatten(ctype: CType, name: str = '', offset: int = 0) -> List[Field]:
+    """把类型树展开为叶子变量列表, 嵌套成员以 . 连接, 数组元素以 [i] 标注"""
+    fields = []
+    _flatten(ctype, name, offset, fields)
+    return fields
+
+
+def _flatten(ctype, name, offset, fields):
+    if isinstance(ctype, RecordType):
+        for member, member_offset in ctype.layout()[0]:
+            if member.name is None:
+                # 匿名结构体/联合体成员直接并入外层
+                member_name = name
+            else:
+                member_name = f"{name}.{member.name}" if name else member.name
+            if member.bitwidth is not None:
+                if member.name is not None:
+                    fields.append(Field(member_name, offset + member_offset, member.bitwidth, member.ctype))
+            else:
+                _flatten(member.ctype, member_name, offset + member_offset, fields)
+    elif isinstance(ctype, ArrayType):
+        elem_bits = ctype.elem.bits
+        for i in range(ctype.count):
+            _flatten(ctype.elem, f"{name}[{i}]", offset + i * elem_bits, fields)
+    elif ctype.bits:
+        fields.append(Field(name, offset, ctype.bits, ctype))
+
+
+def to_var_info(fields: List[Field], value_names: Optional[List[Optional[Dict[int, str]]]] = None) -> List[list]:
+    """转换为 VariableSaver 保存的格式
+
+    与前一个变量紧挨的变量保存为 [变量名, 位宽], 否则为 [变量名, 位宽, 起始位].
+    value_names 给出某个变量的取值含义时保存为 [变量名, 位宽, 起始位或None, {"值": "名称"}],
+    值以10进制字符串作为键, 与JSON格式保存后读回的内容相同.
+    """
+    var_info = []
+    offset = 0
+    for i, field in enumerate(fields):
+        names = value_names[i] if value_names else None
+        field_offset = None if field.offset == offset else field.offset
+        if names:
+            var_info.append([field.name, field.width, field_offset,
+                             {str(value): name for value, name in sorted(names.items())}])
+        elif field_offset is None:
+            var_info.append([field.name, field.width])
+        else:
+            var_info.append([field.name, field.width, field.offset])
+        offset = field.offset + field.width
+    return var_info
+
+
+# ---------------------------------------------------------------- 语法分析
+
+# 类型关键字及其位数, long 的位数由 long_bits 决定
+BASE_TYPE_WORDS = {'void', 'char', 'short', 'int', 'long', 'signed', 'unsigned',
+                   'float', 'double', '_Bool', 'bool', '__int8', '__int16', '__int32', '__int64'}
+FIXED_TYPE_BITS = {
+    'int8_t': 8, 'uint8_t': 8, 'int16_t': 16, 'uint16_t': 16,
+    'int32_t': 32, 'uint32_t': 32, 'int64_t': 64, 'uint64_t': 64,
+    'u8': 8, 's8': 8, 'u16': 16, 's16': 16, 'u32': 32, 's32': 32, 'u64': 64, 's64': 64,
+    'UINT8': 8, 'INT8': 8, 'UINT16': 16, 'INT16': 16, 'UINT32': 32, 'INT32': 32,
+    'UINT64': 64, 'INT64': 64, 'BYTE': 8, 'WORD': 16, 'DWORD': 32, 'BOOL': 32,
+    'size_t': 64, 'uintptr_t': 64, 'intptr_t': 64,
+}
+QUALIFIERS = {'const', 'volatile', 'static', 'extern', 'register', 'inline', 'auto',
+              '__inline', '__inline__', '__extension__', '__packed', 'restrict', '__restrict'}
+ATTRIBUTE_WORDS = {'__attribute__', '__declspec', '_Alignas', 'alignas', '__aligned'}
+
+# 这些后缀的宏通常表示位宽、掩码等, 不作为变量取值的含义
+NON_SYMBOL_SUFFIXES = ('_WIDTH', '_BITS', '_MASK', '_SHIFT', '_SIZE', '_LEN', '_OFFSET', '_POS',
+                       '_MAX', '_MIN', '_COUNT', '_NUM')
+ARRAY_INDEX_RE = re.compile(r'\[\d+\]')
+
+# 二元运算符优先级
+BINARY_PRECEDENCE = {
+    '|': 1, '^': 2, '&': 3, '<<': 5, '>>': 5, '+': 6, '-': 6, '*': 7, '/': 7, '%': 7,
+}
+
+
+class HeaderInfo:
+    """头文件的解析结果"""
+
+    def __init__(self):
+        # 名称 -> 类型, 名称可以是 typedef 名、结构体标签或变量名
+        self.types: Dict[str, CType] = {}
+        # 枚举常量
+        self.constants: Dict[str, int] = {}
+        # 能求值为整数的 #define 对象宏
+        self.defines: Dict[str, int] = {}
+        # 常量名去掉最后若干个 _XXX 后的大写前缀 -> [(常量名, 值)], 首次查询含义时建立
+        self._symbol_index: Optional[Dict[str, List[Tuple[str, int]]]] = None
+        # 按出现顺序记录的结构体/联合体名称
+        self.record_names: List[str] = []
+        # 无法识别而按 int 处理的类型名
+        self.warnings: List[str] = []
+        self._layouts: Dict[str, List[Field]] = {}
+
+    @property
+    def default_name(self) -> str:
+        """最后定义的结构体名, 与 get_struct_name 取最后一个 } 之后名称的习惯一致"""
+        return self.record_names[-1] if self.record_names else ''
+
+    def fields(self, name: Optional[str] = None) -> List[Field]:
+        """展开指定结构体的全部叶子变量"""
+        name = name or self.default_name
+        if name not in self._layouts:
+            ctype = self.types.get(name)
+            if ctype is None:
+                raise CParseError(f"未找到结构体: {name}")
+            self._layouts[name] = flatten(ctype)
+        return self._layouts[name]
+
+    def value_names(self, field: Field) -> Optional[Dict[int, str]]:
+        """变量取值的含义(值 -> 名称)
+
+        枚举类型的变量取枚举名; 其它变量取以 变量名(大写)_ 开头的 #define 或枚举常量,
+        如变量 state 对应 STATE_IDLE/STATE_RUN, 同值只保留第一个名字. 没有含义时返回None.
+        """
+        if isinstance(field.ctype, EnumType) and field.ctype.values:
+            return dict(field.ctype.values)
+        if self._symbol_index is None:
+            index = {}
+            for source in (self.defines, self.constants):
+                for name, value in source.items():
+                    upper = name.upper()
+                    if upper.endswith(NON_SYMBOL_SUFFIXES):
+                        continue
+                    # STATE_RUN_FAST 可以是变量 state 或 state_run 的含义
+                    for pos, char in enumerate(upper):
+                        if char == '_' and pos:
+                            index.setdefault(upper[:pos], []).append((name, value))
+            self._symbol_index = index
+        leaf = ARRAY_INDEX_RE.sub('', field.name).rsplit('.', 1)[-1].upper()
+        names = {}
+        for name, value in self._symbol_index.get(leaf, ()):
+            names.setdefault(value, name)
+        return names or None
+
+
+class _Parser:
+    def __init__(self, tokens: List[Token], packed: bool, long_bits: int, pointer_bits: int):
+        self.tokens = tokens
+        self.pos = 0
+        self.packed = packed
+        self.long_bits = long_bits
+        self.pointer_bits = pointer_bits
+        self.info = HeaderInfo()
+        self.typedefs: Dict[str, CType] = {}
+        self.tags: Dict[Tuple[str, str], CType] = {}
+
+    # ---- 记号操作
+    def peek(self, ahead: int = 0) -> Optional[Token]:
+        index = self.pos + ahead
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def peek_text(self, ahead: int = 0) -> Optional[str]:
+        tok = self.peek(ahead)
+        return tok.text if tok else None
+
+    def next(self) -> Token:
+        tok = self.peek()
+        if tok is None:
+            raise CParseError("意外的文件结尾")
+        self.pos += 1
+        return tok
+
+    def accept(self, text: str) -> bool:
+        if self.peek_text() == text:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, text: str) -> Token:
+        tok = self.next()
+        if tok.text != text:
+            raise CParseError(f"第{tok.line}行: 期望 '{text}', 实际为 '{tok.text}'")
+        return tok
+
+    def skip_group(self) -> None:
+        """跳过一组配对的括号, 当前记号必须是左括号"""
+        pairs = {'(': ')', '[': ']', '{': '}'}
+        stack = [pairs[self.next().text]]
+        while stack:
+            text = self.next().text
+            if text in pairs:
+                stack.append(pairs[text])
+            elif text == stack[-1]:
+                stack.pop()
+
+    def skip_statement(self) -> None:
+        """跳过到下一个顶层 ; 或配对的 {} 之后"""
+        while self.peek() is not None:
+            text = self.peek_text()
+            if text == ';':
+                self.pos += 1
+                return
+            if text == '{':
+                self.skip_group()
+                if self.peek_text() != ';':
+                    return
+            elif text in ('(', '['):
+                self.skip_group()
+            else:
+                self.pos += 1
+
+    def skip_attributes(self) -> None:
+        while self.peek_text() in ATTRIBUTE_WORDS:
+            self.pos += 1
+            if self.peek_text() == '(':
+                self.skip_group()
+
+    # ---- 顶层
+    def parse(self) -> HeaderInfo:
+        while self.peek() is not None:
+            self.parse_external_declaration()
+        return self.info
+
+    def parse_external_declaration(self) -> None:
+        if self.accept(';') or self.accept('}'):
+            # 多余的分号, 或 extern "C" { ... } 的结尾
+            return
+        if self.peek_text() == 'extern' and self.peek(1) is not None and self.peek(1).kind == 'string':
+            # extern "C" 只跳过声明本身, 块内的定义照常解析
+            self.pos += 2
+            self.accept('{')
+            return
+        is_typedef = self.accept('typedef')
+        start = self.pos
+        ctype = self.parse_type_spec()
+        if ctype is None:
+            self.pos = start
+            self.skip_statement()
+            return
+        if self.accept(';'):
+            return
+        while True:
+            name, decl_type, _ = self.parse_declarator(ctype, allow_bitfield=False)
+            if self.peek_text() == '(':
+                # 函数声明或定义
+                self.skip_group()
+                self.skip_attributes()
+                if self.peek_text() == '{':
+                    self.skip_group()
+                    return
+                self.skip_statement()
+                return
+            if self.accept('='):
+                self.skip_initializer()
+            if name:
+                self.register(name, decl_type, is_typedef)
+            if not self.accept(','):
+                break
+        if not self.accept(';'):
+            self.skip_statement()
+
+    def skip_initializer(self) -> None:
+        while self.peek_text() not in (',', ';', None):
+            if self.peek_text() in ('(', '[', '{'):
+                self.skip_group()
+            else:
+                self.pos += 1
+
+    def register(self, name: str, ctype: CType, is_typedef: bool) -> None:
+        if is_typedef:
+            self.typedefs[name] = ctype
+        self.info.types[name] = ctype
+        if isinstance(ctype, RecordType) or (isinstance(ctype, ArrayType) and isinstance(ctype.elem, RecordType)):
+            self.register_record_name(name)
+
+    # ---- 类型
+    def is_type_start(self) -> bool:
+        text = self.peek_text()
+        return (text in BASE_TYPE_WORDS or text in QUALIFIERS or text in ('struct', 'union', 'enum')
+                or text in self.typedefs or text in FIXED_TYPE_BITS)
+
+    def parse_type_spec(self) -> Optional[CType]:
+        words = []
+        ctype = None
+        while True:
+            tok = self.peek()
+            if tok is None:
+                break
+            text = tok.text
+            if text in QUALIFIERS:
+                self.pos += 1
+            elif text in ATTRIBUTE_WORDS:
+                self.skip_attributes()
+            elif text in ('struct', 'union') and ctype is None and not words:
+                self.pos += 1
+                ctype = self.parse_record(text)
+            elif text == 'enum' and ctype is None and not words:
+                self.pos += 1
+                ctype = self.parse_enum()
+            elif text in BASE_TYPE_WORDS and ctype is None:
+                words.append(text)
+                self.pos += 1
+            elif tok.kind == 'ident' and ctype is None and not words:
+                if text in self.typedefs:
+                    ctype = self.typedefs[text]
+                elif text in FIXED_TYPE_BITS:
+                    ctype = ScalarType(text, FIXED_TYPE_BITS[text])
+                elif self.peek(1) is not None and (self.peek(1).kind == 'ident' or self.peek_text(1) == '*'):
+                    # 其他头文件中定义的类型, 按 int 处理
+                    self.info.warnings.append(f"第{tok.line}行: 未知类型 {text}, 按32位处理")
+                    ctype = ScalarType(text, 32)
+                else:
+                    break
+                self.pos += 1
+            else:
+                break
+        if words:
+            return ScalarType(' '.join(words), self.base_type_bits(words))
+        return ctype
+
+    def base_type_bits(self, words: List[str]) -> int:
+        if 'char' in words or '__int8' in words or '_Bool' in words or 'bool' in words:
+            return 8
+        if 'short' in words or '__int16' in words:
+            return 16
+        if words.count('long') >= 2 or '__int64' in words or 'double' in words:
+            return 64
+        if 'long' in words:
+            return self.long_bits
+        if words == ['void']:
+            return 0
+        return 32
+
+    def parse_record(self, kind: str) -> RecordType:
+        self.skip_attributes()
+        tag = None
+        if self.peek() is not None and self.peek().kind == 'ident':
+            tag = self.next().text
+        self.skip_attributes()
+        if self.peek_text() != '{':
+            # 只引用标签, 可能是前向声明
+            record = self.tags.get((kind, tag))
+            if record is None:
+                record = self.tags[(kind, tag)] = RecordType(kind, tag, self.packed)
+            return record
+
+        record = self.tags.get((kind, tag)) if tag else None
+        if record is None or record.complete:
+            record = RecordType(kind, tag, self.packed)
+        if tag:
+            self.tags[(kind, tag)] = record
+        self.expect('{')
+        members = []
+        while not self.accept('}'):
+            self.parse_member(members)
+        record.members = members
+        self.skip_attributes()
+        if tag:
+            self.info.types.setdefault(tag, record)
+            self.register_record_name(tag)
+        return record
+
+    def register_record_name(self, name: str) -> None:
+        if name in self.info.record_names:
+            self.info.record_names.remove(name)
+        self.info.record_names.append(name)
+
+    def parse_member(self, members: List[Member]) -> None:
+        if self.accept(';'):
+            return
+        start = self.pos
+        ctype = self.parse_type_spec()
+        if ctype is None:
+            tok = self.peek()
+            self.pos = start
+            if tok is not None and tok.text == ':':
+                # 省略类型的位域按 int 处理
+                ctype = ScalarType('int', 32)
+            else:
+                raise CParseError(f"第{tok.line if tok else '?'}行: 无法识别的成员类型 '{tok.text if tok else ''}'")
+        if self.accept(';'):
+            # 匿名结构体/联合体成员
+            if isinstance(ctype, RecordType):
+                members.append(Member(None, ctype, None))
+            return
+        while True:
+            name, decl_type, bitwidth = self.parse_declarator(ctype, allow_bitfield=True)
+            members.append(Member(name, decl_type, bitwidth))
+            if not self.accept(','):
+                break
+        self.expect(';')
+
+    def parse_enum(self) -> EnumType:
+        self.skip_attributes()
+        tag = None
+        if self.peek() is not None and self.peek().kind == 'ident':
+            tag = self.next().text
+        if self.peek_text() != '{':
+            enum = self.tags.get(('enum', tag))
+            if enum is None:
+                enum = self.tags[('enum', tag)] = EnumType(tag)
+            return enum
+
+        enum = EnumType(tag)
+        if tag:
+            self.tags[('enum', tag)] = enum
+        self.expect('{')
+        value = 0
+        while not self.accept('}'):
+            name = self.next()
+            if name.kind != 'ident':
+                raise CParseError(f"第{name.line}行: 无效的枚举名 '{name.text}'")
+            if self.accept('='):
+                value = self.parse_const_expr()
+            self.info.constants[name.text] = value
+            enum.values.setdefault(value, name.text)
+            value += 1
+            if not self.accept(','):
+                self.expect('}')
+                break
+        self.skip_attributes()
+        return enum
+
+    def parse_declarator(self, base: CType, allow_bitfield: bool) -> Tuple[Optional[str], CType, Optional[int]]:
+        """解析声明符
+
+        Returns:
+            (名称, 类型, 位域宽度或None)
+        """
+        ctype = base
+        while self.peek_text() == '*':
+            self.pos += 1
+            ctype = ScalarType('pointer', self.pointer_bits)
+            while self.peek_text() in QUALIFIERS:
+                self.pos += 1
+        self.skip_attributes()
+
+        name = None
+        if self.peek_text() == '(' and self.peek_text(1) == '*':
+            # 函数指针 (*name)(...)
+            self.pos += 2
+            if self.peek() is not None and self.peek().kind == 'ident':
+                name = self.next().text
+            dims = []
+            while self.accept('['):
+                dims.append(self.parse_const_expr())
+                self.expect(']')
+            self.expect(')')
+            if self.peek_text() == '(':
+                self.skip_group()
+            ctype = ScalarType('pointer', self.pointer_bits)
+            for count in reversed(dims):
+                ctype = ArrayType(ctype, count)
+        elif self.peek() is not None and self.peek().kind == 'ident':
+            name = self.next().text
+
+        dims = []
+        while self.accept('['):
+            if self.accept(']'):
+                # 柔性数组不占空间
+                dims.append(0)
+                continue
+            dims.append(self.parse_const_expr())
+            self.expect(']')
+        for count in reversed(dims):
+            ctype = ArrayType(ctype, count)
+        self.skip_attributes()
+
+        bitwidth = None
+        if allow_bitfield and self.accept(':'):
+            bitwidth = self.parse_const_expr()
+            if bitwidth < 0:
+                raise CParseError(f"位域 {name} 的宽度不能为负数")
+        self.skip_attributes()
+        return name, ctype, bitwidth
+
+    def evaluate_macros(self, macros: Dict[str, List[Token]]) -> Dict[str, int]:
+        """计算能求值为整数常量的对象宏, 用于给变量取值匹配含义"""
+        defines = {}
+        for name, body in macros.items():
+            self.tokens = expand_macros(body, macros)
+            self.pos = 0
+            if not self.tokens:
+                continue
+            try:
+                value = self.parse_const_expr()
+            except (CParseError, ValueError):
+                continue
+            if self.pos == len(self.tokens):
+                defines[name] = value
+        return defines
+
+    # ---- 常量表达式
+    def parse_const_expr(self, min_precedence: int = 0) -> int:
+        left = self.parse_unary()
+        while True:
+            op = self.peek_text()
+            if op == '?' and min_precedence == 0:
+                self.pos += 1
+                true_value = self.parse_const_expr()
+                self.expect(':')
+                false_value = self.parse_const_expr()
+                left = true_value if left else false_value
+                continue
+            precedence = BINARY_PRECEDENCE.get(op)
+            if precedence is None or precedence <= min_precedence:
+                return left
+            self.pos += 1
+            right = self.parse_const_expr(precedence)
+            left = self.apply_binary(op, left, right)
+
+    @staticmethod
+    def apply_binary(op: str, left: int, right: int) -> int:
+        if op in ('/', '%') and right == 0:
+            raise CParseError("常量表达式中除数为0")
+        if op == '/':
+            # C的整数除法向0取整
+            return int(left / right)
+        return {
+            '|': lambda: left | right, '^': lambda: left ^ right, '&': lambda: left & right,
+            '<<': lambda: left << right, '>>': lambda: left >> right,
+            '+': lambda: left + right, '-': lambda: left - right, '*': lambda: left * right,
+            '%': lambda: left - int(left / right) * right,
+        }[op]()
+
+    def parse_unary(self) -> int:
+        tok = self.next()
+        text = tok.text
+        if text == '-':
+            return -self.parse_unary()
+        if text == '+':
+            return self.parse_unary()
+        if text == '~':
+            return ~self.parse_unary()
+        if text == '!':
+            return int(not self.parse_unary())
+        if text == '(':
+            if self.is_type_start():
+                # 类型转换, 直接取被转换的值
+                self.parse_type_spec()
+                while self.accept('*'):
+                    pass
+                self.expect(')')
+                return self.parse_unary()
+            value = self.parse_const_expr()
+            self.expect(')')
+            return value
+        if text == 'sizeof':
+            paren = self.accept('(')
+            ctype = self.parse_type_spec() if self.is_type_start() else None
+            if ctype is None:
+                raise CParseError(f"第{tok.line}行: 不支持的 sizeof 表达式")
+            if paren:
+                self.expect(')')
+            return ctype.bits // 8
+        if tok.kind == 'number':
+            return parse_int(text)
+        if tok.kind == 'ident' and text in self.info.constants:
+            return self.info.constants[text]
+        raise CParseError(f"第{tok.line}行: 无法计算的常量表达式 '{text}'")
+
+
+def parse_int(text: str) -> int:
+    """解析C整数字面量"""
+    text = text.rstrip('uUlL')
+    if text[:2] in ('0x', '0X'):
+        return int(text, 16)
+    if text[:2] in ('0b', '0B'):
+        return int(text, 2)
+    if len(text) > 1 and text.startswith('0'):
+        return int(text, 8)
+    return int(text)
+
+
+# ---------------------------------------------------------------- 缓存与对外接口
+
+# 缓存的头文件数量上限
+CACHE_SIZE = 64
+# (内容哈希, 选项) -> HeaderInfo
+_header_cache: "OrderedDict[tuple, HeaderInfo]" = OrderedDict()
+_cache_stats = {'hits': 0, 'misses': 0}
+# 多个标签页的后台线程会同时访问缓存
+_cache_lock = threading.Lock()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def parse_header(text: str, packed: bool = True, long_bits: int = 32, pointer_bits: int = 64) -> HeaderInfo:
+    """解析C头文件, 相同内容和选项的结果直接从缓存返回
+
+    Args:
+        text: 头文件内容
+        packed: True时变量从最低位开始紧挨排列, False时按ABI规则对齐
+        long_bits: long 的位数
+        pointer_bits: 指针的位数
+
+    Raises:
+        CParseError: 语法错误
+    """
+    key = (content_hash(text), packed, long_bits, pointer_bits)
+    with _cache_lock:
+        info = _header_cache.get(key)
+        if info is not None:
+            _header_cache.move_to_end(key)
+            _cache_stats['hits'] += 1
+            return info
+        _cache_stats['misses'] += 1
+
+    tokens, macros = tokenize(text)
+    parser = _Parser(expand_macros(tokens, macros), packed, long_bits, pointer_bits)
+    info = parser.parse()
+    info.defines = parser.evaluate_macros(macros)
+    with _cache_lock:
+        _header_cache[key] = info
+        if len(_header_cache) > CACHE_SIZE:
+            _header_cache.popitem(last=False)
+    return info
+
+
+LayoutResult = namedtuple('LayoutResult', 'name var_info fields')
+
+
+def is_cached(text: str, packed: bool = True, long_bits: int = 32, pointer_bits: int = 64) -> bool:
+    """判断这段文本是否已经解析过"""
+    return (content_hash(text), packed, long_bits, pointer_bits) in _header_cache
+
+
+def parse_layout(text: str, name: Optional[str] = None, value_names: bool = True, **options) -> LayoutResult:
+    """解析头文件并展开指定结构体(默认为最后定义的结构体)
+
+    Args:
+        value_names: 是否在变量定义中附带取值含义(枚举名和 #define 常量名), 见 HeaderInfo.value_names
+
+    Returns:
+        LayoutResult(结构体名, VariableSaver格式的变量定义, 叶子变量列表)
+
+    Raises:
+        CParseError: 语法错误或找不到结构体
+    """
+    info = parse_header(text, **options)
+    name = name or info.default_name
+    fields = info.fields(name)
+    names = [info.value_names(field) for field in fields] if value_names else None
+    return LayoutResult(name, to_var_info(fields, names), fields)
+
+
+def cache_info() -> Dict[str, int]:
+    """返回解析缓存的命中/未命中次数和当前缓存数量"""
+    return dict(_cache_stats, size=len(_header_cache))
+
+
+# 出现这些写法时原来的逐行解析无法正确处理
+FULL_PARSER_RE = re.compile(r'#\s*define|\bunion\b|\btypedef\b|\benum\b|\[|/\*[^\n]*\n')
+
+
+def needs_full_parser(text: str) -> bool:
+    """判断输入是否需要完整的C解析器(嵌套结构体、联合体、数组、宏、多行注释等)"""
+    return text.count('{') > 1 or FULL_PARSER_RE.search(text) is not None
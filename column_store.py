@@ -0,0 +1,395 @@
+"""列式存储解码结果, 需要numpy
+
+每个变量一列, 使用能容纳其位宽的最窄无符号类型(见 decode_core.field_dtype), 所有列连续存放在一个文件中,
+打开时以 np.memmap 映射, 只有真正读取的列和页才会占用内存. 文件末尾保存来源定义等元数据:
+
+    [魔数 8字节][补齐到64字节] [列1][补齐] [列2][补齐] ... [JSON元数据][元数据长度 8字节][魔数 8字节]
+
+元数据放在末尾, 写入时各列的位置边写边确定; 每列都按64字节对齐.
+
+用法:
+    python column_store.py write <定义名> app.log [more.log ...] -o decoded.edcol [--pattern 正则]
+    python column_store.py info decoded.edcol
+    python column_store.py query decoded.edcol "state=1 level=2,3" [--head 20] [--format csv|jsonl]
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+import decode_core
+
+MAGIC = b'EDCOLS01'
+# 每列的起始位置按该字节数对齐
+ALIGNMENT = 64
+FORMAT_VERSION = 1
+DEFAULT_SUFFIX = '.edcol'
+# 原始值列的名称
+RAW_COLUMN = '__value__'
+
+
+def _pad(size: int) -> int:
+    return -size % ALIGNMENT
+
+
+class ColumnStoreWriter:
+    """按批追加解码结果, 关闭时写成一个列式文件
+
+    各列先分别追加到同目录的临时文件, 关闭时依次拷贝到目标文件并写入元数据, 最后原子替换;
+    内存占用只与每批的大小有关.
+
+    Args:
+        path: 输出文件路径
+        var_info: 变量定义
+        layout_name: 定义名, 写入元数据
+        source: 数据来源说明(如日志文件列表), 写入元数据
+        raw: 是否同时保存原始值列(总位宽不超过64位时)
+
+    Raises:
+        ValueError: 有变量超过64位
+    """
+
+    def __init__(self, path: str, var_info: List[list], layout_name: str = '',
+                 source: Optional[Sequence[str]] = None, raw: bool = True):
+        self.path = path
+        self.var_info = var_info
+        self.layout_name = layout_name
+        self.source = list(source or [])
+        # 重名变量只保留一列, 值取最后一个(与 decode_batch 一致)
+        fields = {}
+        for name, offset, width in decode_core.field_offsets(var_info):
+            if width > 64:
+                raise ValueError(f"变量 {name} 宽度 {width} 超过64位, 无法按列保存")
+            fields.pop(name, None)
+            fields[name] = (offset, width)
+        self.fields = fields
+        self.total_bits = decode_core.layout_bits(var_info)
+        self.dtypes = {name: np.dtype(decode_core.field_dtype(width)) for name, (_, width) in fields.items()}
+        # 原始值中超出定义的高位也保留(不超过64位)
+        if raw and self.total_bits <= 64:
+            self.dtypes[RAW_COLUMN] = np.dtype(np.uint64)
+        self.count = 0
+        self.directory = os.path.dirname(os.path.abspath(path))
+        self.parts = {}
+        for name in self.dtypes:
+            fd, part_path = tempfile.mkstemp(prefix='.column_', dir=self.directory)
+            self.parts[name] = (os.fdopen(fd, 'wb'), part_path)
+
+    def append(self, columns: Dict[str, Sequence[int]], raw: Optional[Sequence[int]] = None) -> None:
+        """追加一批, columns 为 decode_batch 的结果; raw 为对应的原始值(保存原始值列时必须给出)"""
+        count = len(raw) if raw is not None else len(next(iter(columns.values()), ()))
+        for name, dtype in self.dtypes.items():
+            if name == RAW_COLUMN:
+                if raw is None:
+                    raise ValueError("需要给出原始值")
+                column = raw
+            else:
+                column = columns[name]
+            # 列表中的Python整数先转换为uint64再收窄, np.asarray 遇到大于等于2^63的值会得到float64
+            array = column if isinstance(column, np.ndarray) else decode_core.uint64_array(column)
+            if len(array) != count:
+                raise ValueError(f"列 {name} 的长度 {len(array)} 与其它列 {count} 不一致")
+            array.astype(dtype.newbyteorder('<'), copy=False).tofile(self.parts[name][0])
+        self.count += count
+
+    def append_values(self, values: Union[Sequence[int], np.ndarray]) -> None:
+        """解码一批原始值并追加"""
+        if not isinstance(values, np.ndarray) and self.total_bits <= 64:
+            # 超过64位的值只保留低64位, 不影响解码
+            values = decode_core.uint64_array(values)
+        self.append(decode_core.decode_batch(values, self.var_info), values)
+
+    def close(self) -> int:
+        """写出文件, 返回记录数"""
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix=DEFAULT_SUFFIX, dir=self.directory)
+        try:
+            columns = []
+            with os.fdopen(fd, 'wb') as out:
+                out.write(MAGIC + b'\0' * _pad(len(MAGIC)))
+                for name, dtype in self.dtypes.items():
+                    part, part_path = self.parts[name]
+                    part.close()
+                    position = out.tell()
+                    with open(part_path, 'rb') as f:
+                        shutil.copyfileobj(f, out, 1 << 20)
+                    nbytes = out.tell() - position
+                    out.write(b'\0' * _pad(nbytes))
+                    entry = {'name': name, 'dtype': dtype.newbyteorder('<').str, 'offset': position, 'nbytes': nbytes}
+                    if name in self.fields:
+                        entry['bit_offset'], entry['width'] = self.fields[name]
+                    columns.append(entry)
+                metadata = {
+                    'version': FORMAT_VERSION,
+                    'count': self.count,
+                    'layout_name': self.layout_name,
+                    'layout': self.var_info,
+                    'fingerprint': decode_core.layout_fingerprint(self.var_info),
+                    'total_bits': self.total_bits,
+                    'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                    'source': self.source,
+                    'columns': columns,
+                }
+                footer = json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+                out.write(footer)
+                out.write(len(footer).to_bytes(8, 'little') + MAGIC)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+        finally:
+            self._remove_parts()
+        return self.count
+
+    def abort(self) -> None:
+        """放弃写入, 删除临时文件"""
+        self._remove_parts()
+
+    def _remove_parts(self) -> None:
+        for part, part_path in self.parts.values():
+            part.close()
+            with contextlib.suppress(OSError):
+                os.remove(part_path)
+        self.parts = {}
+
+    def __enter__(self) -> "ColumnStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ColumnStore:
+    """打开列式文件, 各列按需映射, 不读入内存
+
+    Args:
+        path: ColumnStoreWriter 写出的文件
+
+    Raises:
+        ValueError: 不是列式文件或版本不支持
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            head = f.read(len(MAGIC))
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if head != MAGIC or size < 2 * len(MAGIC) + 8:
+                raise ValueError(f"{path} 不是列式存储文件")
+            f.seek(size - len(MAGIC) - 8)
+            tail = f.read(8 + len(MAGIC))
+            if tail[8:] != MAGIC:
+                raise ValueError(f"{path} 不完整")
+            footer_size = int.from_bytes(tail[:8], 'little')
+            if footer_size > size - 2 * len(MAGIC) - 8:
+                raise ValueError(f"{path} 不完整")
+            f.seek(size - len(MAGIC) - 8 - footer_size)
+            self.metadata = json.loads(f.read(footer_size).decode('utf-8'))
+        if self.metadata.get('version') != FORMAT_VERSION:
+            raise ValueError(f"不支持的列式存储版本: {self.metadata.get('version')}")
+        self.count: int = self.metadata['count']
+        self.layout: List[list] = self.metadata['layout']
+        self.layout_name: str = self.metadata['layout_name']
+        self._entries = {entry['name']: entry for entry in self.metadata['columns']}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries and name != RAW_COLUMN
+
+    @property
+    def names(self) -> List[str]:
+        """变量列名, 按定义顺序"""
+        return [name for name in self._entries if name != RAW_COLUMN]
+
+    def column(self, name: str) -> np.ndarray:
+        """只读的列, 第一次访问时映射
+
+        Raises:
+            KeyError: 没有该列
+        """
+        column = self._columns.get(name)
+        if column is None:
+            entry = self._entries.get(name)
+            if entry is None:
+                raise KeyError(name)
+            dtype = np.dtype(entry['dtype'])
+            if self.count == 0:
+                column = np.zeros(0, dtype=dtype)
+            else:
+                column = np.memmap(self.path, dtype=dtype, mode='r', offset=entry['offset'], shape=(self.count,))
+            self._columns[name] = column
+        return column
+
+    __getitem__ = column
+
+    @property
+    def raw(self) -> Optional[np.ndarray]:
+        """原始值列(低64位), 总位宽超过64位或写入时未保存时为None"""
+        return self.column(RAW_COLUMN) if RAW_COLUMN in self._entries else None
+
+    def mask(self, conditions: Dict[str, Union[int, Sequence[int]]]) -> np.ndarray:
+        """满足全部条件的行为True; 条件值为整数时要求相等, 为列表时要求属于其中之一
+
+        超出列取值范围的值不会匹配任何行.
+
+        Raises:
+            KeyError: 没有该列
+        """
+        result = np.ones(self.count, dtype=bool)
+        for name, value in conditions.items():
+            column = self.column(name)
+            high = np.iinfo(column.dtype).max
+            if isinstance(value, (list, tuple, set, frozenset)):
+                # 列中不可能出现的值(负数或超出列类型)直接去掉, 不能转换后截断成其它值
+                values = sorted(item for item in set(value) if 0 <= item <= high)
+                if values:
+                    result &= np.isin(column, np.array(values, dtype=column.dtype))
+                else:
+                    result[:] = False
+            elif not 0 <= value <= high:
+                result[:] = False
+            else:
+                result &= column == column.dtype.type(value)
+        return result
+
+    def where(self, conditions: Dict[str, Union[int, Sequence[int]]]) -> np.ndarray:
+        """满足全部条件的行号"""
+        return np.flatnonzero(self.mask(conditions))
+
+    def rows(self, indexes: Sequence[int], names: Optional[List[str]] = None) -> Iterator[list]:
+        """按行号逐行产出 [行号, 原始值(如有), 变量1, 变量2, ...]"""
+        names = names or self.names
+        indexes = np.asarray(indexes)
+        raw = self.raw
+        for start in range(0, len(indexes), 4096):
+            chunk = indexes[start:start + 4096]
+            data = [self.column(name)[chunk].tolist() for name in names]
+            raw_values = raw[chunk].tolist() if raw is not None else None
+            for i, index in enumerate(chunk.tolist()):
+                row = [index]
+                if raw_values is not None:
+                    row.append(f"0x{raw_values[i]:X}")
+                row.extend(column[i] for column in data)
+                yield row
+
+
+def parse_conditions(text: str) -> Dict[str, Union[int, List[int]]]:
+    """解析 `变量名=值` 条件, 以空白分隔; 值可以用逗号给出多个, 进制规则同界面输入框
+
+    Raises:
+        ValueError: 格式不对或值无法解析
+    """
+    conditions = {}
+    for token in text.split():
+        name, sep, value = token.partition('=')
+        if not sep or not name or not value:
+            raise ValueError(f"应为 变量名=值: {token}")
+        values = [decode_core.parse_number(item) for item in value.split(',')]
+        conditions[name] = values[0] if len(values) == 1 else values
+    return conditions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='列式存储解码结果')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    write = commands.add_parser('write', help='解码日志文件并保存为列式文件')
+    write.add_argument('layout', help='config/data_define.json 中保存的定义名')
+    write.add_argument('files', nargs='+', help='日志文件')
+    write.add_argument('-o', '--output', required=True, help=f'输出文件, 建议扩展名 {DEFAULT_SUFFIX}')
+    write.add_argument('--pattern', help='查找错误码的正则, 同 decode_cli.py')
+    write.add_argument('--base', type=int, choices=[0, 10, 16], default=0, help='数值进制, 0为自动判断')
+    write.add_argument('--define-file', default='data_define.json', help='config目录下的定义文件名')
+
+    info = commands.add_parser('info', help='显示列式文件的元数据')
+    info.add_argument('file')
+
+    query = commands.add_parser('query', help='按条件筛选并输出行')
+    query.add_argument('file')
+    query.add_argument('conditions', nargs='?', default='', help='如 "state=1 level=2,3", 为空时输出全部')
+    query.add_argument('--head', type=int, help='最多输出的行数')
+    query.add_argument('--count', action='store_true', help='只输出满足条件的行数')
+    query.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='输出格式')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    import decode_cli
+
+    if args.command == 'write':
+        import re
+        layout = decode_cli.load_layout(args.layout, args.define_file)
+        if not layout:
+            print(f"未找到变量定义: {args.layout}", file=sys.stderr)
+            return 1
+        pattern = re.compile((args.pattern or decode_cli.DEFAULT_PATTERN).encode('utf-8'))
+        try:
+            writer = ColumnStoreWriter(args.output, layout, args.layout, args.files)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        try:
+            with writer:
+                for path in args.files:
+                    for batch in decode_cli.iter_batches(decode_cli.iter_codes(path, pattern, args.base), 1 << 16):
+                        writer.append_values([value for _, value in batch])
+        except OSError as e:
+            print(f"无法读取日志文件: {e}", file=sys.stderr)
+            return 1
+        print(f"共保存 {writer.count} 个值到 {args.output}", file=sys.stderr)
+        return 0
+
+    try:
+        store = ColumnStore(args.file)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if args.command == 'info':
+        metadata = dict(store.metadata)
+        metadata['file_size'] = os.path.getsize(args.file)
+        print(json.dumps(metadata, ensure_ascii=False, indent=2))
+        return 0
+
+    try:
+        conditions = parse_conditions(args.conditions)
+        indexes = store.where(conditions) if conditions else np.arange(store.count)
+    except KeyError as e:
+        print(f"没有变量 {e.args[0]}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"条件有误: {e}", file=sys.stderr)
+        return 1
+    if args.count:
+        print(len(indexes))
+        return 0
+    if args.head is not None:
+        indexes = indexes[:args.head]
+    header = ['index'] + (['value'] if store.raw is not None else []) + store.names
+    try:
+        decode_cli.write_rows(store.rows(indexes), header, args.format)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    print(f"{len(indexes)} 行", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""重复错误码的解码缓存, 不依赖PyQt5
+
+实际日志中少数几个错误码会重复出现成千上万次, 缓存以 (变量定义指纹, 值) 为键,
+保存不可修改的解码结果, 所有调用方共享同一个结果对象; 超过容量时淘汰最久未使用的项.
+缓存项由定义内容决定, 不需要随定义名失效: 重新保存的定义内容不同, 指纹也不同, 以新定义创建的解码器
+不会取到旧结果, 旧定义的缓存项不再被访问, 随后按最久未使用被淘汰; 仍持有的旧解码器继续按它自己的定义解码.
+
+用法:
+    cache = DecodeCache()
+    decoder = cache.layout(var_info)
+    result = decoder.decode(0x1234)     # 变量名 -> (位宽, 解析值), 只读
+"""
+import sys
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Mapping
+
+import decode_core
+
+# 默认最多缓存的解码结果数
+DEFAULT_MAXSIZE = 65536
+
+
+class CachedLayout:
+    """绑定到某个变量定义的缓存解码器, 指纹和编译好的解码函数只在创建时获取一次"""
+
+    __slots__ = ('cache', 'fingerprint', 'compiled', 'names', 'widths')
+
+    def __init__(self, cache: "DecodeCache", var_info: List[list]):
+        self.cache = cache
+        self.compiled = decode_core.compile_layout(var_info)
+        self.fingerprint = self.compiled.fingerprint
+        self.names = self.compiled.names
+        self.widths = self.compiled.widths
+
+    def decode(self, value: int) -> Mapping[str, tuple]:
+        """等价于 assign_bits_to_variables, 但返回共享的只读结果 变量名 -> (位宽, 解析值)"""
+        cache = self.cache
+        entries = cache.entries
+        key = (self.fingerprint, value)
+        result = entries.get(key)
+        if result is not None:
+            entries.move_to_end(key)
+            cache.hits += 1
+            return result
+
+        cache.misses += 1
+        result = MappingProxyType(dict(zip(self.names, zip(self.widths, self.compiled.decode(value)))))
+        entries[key] = result
+        if len(entries) > cache.maxsize:
+            entries.popitem(last=False)
+            cache.evictions += 1
+        return result
+
+    def decode_values(self, value: int) -> tuple:
+        """只返回解析值, 顺序与结果中的变量名相同"""
+        return tuple(v for _, v in self.decode(value).values())
+
+
+class DecodeCache:
+    """LRU解码缓存
+
+    Args:
+        maxsize: 最多缓存的解码结果数
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize <= 0:
+            raise ValueError("缓存容量必须大于0")
+        self.maxsize = maxsize
+        # (指纹, 值) -> 解码结果, 按最近使用排序
+        self.entries: "OrderedDict[tuple, Mapping[str, tuple]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def layout(self, var_info: List[list]) -> CachedLayout:
+        """为变量定义创建缓存解码器, 内容相同的定义共享缓存项"""
+        return CachedLayout(self, var_info)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def memory_usage(self) -> int:
+        """估算缓存占用的字节数(键、结果字典和其中的元组与整数), 需要遍历全部缓存项"""
+        size = sys.getsizeof(self.entries)
+        getsizeof = sys.getsizeof
+        for key, result in self.entries.items():
+            size += getsizeof(key) + getsizeof(key[1]) + getsizeof(result)
+            # 结果字典本身, 变量名与指纹字符串为各项共享, 不计入
+            mapping = dict(result)
+            size += getsizeof(mapping)
+            for item in mapping.values():
+                size += getsizeof(item)
+                # -5~256 的小整数是解释器共享的对象
+                if not -5 <= item[1] <= 256:
+                    size += getsizeof(item[1])
+        return size
+
+    def stats(self) -> Dict[str, float]:
+        """命中/未命中/淘汰次数, 命中率, 缓存项数和估算内存"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+            'size': len(self.entries),
+            'memory_bytes': self.memory_usage(),
+        }
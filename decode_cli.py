@@ -0,0 +1,414 @@
+"""命令行批量解码日志文件, 不启动Qt
+
+用法:
+    python decode_cli.py <定义名> <日志文件> [<日志文件> ...] [--pattern 正则] [--format csv|jsonl] [-j 进程数]
+    python decode_cli.py <定义名> --stream tcp://0.0.0.0:9000 --listen [--word-size 4]
+    python decode_cli.py <定义名> <日志文件> --stats [--top 10] [--window 100000] > stats.json
+    python decode_cli.py <定义名> <日志文件> --symbols    # 有含义的变量追加一列 <变量名>_symbol
+    python decode_cli.py <定义名> <日志文件> --delta      # 只输出相邻两个值之间变化的变量
+
+日志文件以mmap方式映射(管道和 /dev/stdin 按行读取), 按正则逐个查找错误码并流式输出到stdout, 内存占用与文件大小无关.
+--stream 从套接字/管道/串口实时读取, 见 stream_decode.py.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import mmap
+import os
+import re
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import decode_core
+from variable_saver import VariableSaver
+
+# 默认匹配 0x 开头的16进制数或独立的10进制数
+DEFAULT_PATTERN = r'0[xX][0-9a-fA-F]+|\b[0-9]+\b'
+# 每批解码的值数量
+BATCH_SIZE = 4096
+
+
+def load_layout(name: str, define_file: str) -> Optional[List[list]]:
+    """从 config/<define_file> 读取已保存的变量定义"""
+    # VariableSaver 会向stdout打印提示, 这里转到stderr以免污染输出
+    with contextlib.redirect_stdout(sys.stderr):
+        return VariableSaver(define_file).load_single(name)
+
+
+def iter_codes(path: str, pattern: "re.Pattern[bytes]", base: int = 0,
+               start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+    """在文件中查找错误码
+
+    普通文件以mmap方式映射; 空文件以及管道、/dev/stdin 等无法映射的文件改为按行读取,
+    此时匹配不会跨越换行符.
+
+    Args:
+        path: 日志文件路径
+        pattern: bytes正则, 有分组时取第1个分组, 否则取整个匹配
+        base: 0表示按输入框规则自动判断进制, 否则为固定进制
+        start: 查找的起始字节偏移
+        end: 查找的结束字节偏移, None表示到文件末尾
+
+    Yields:
+        (字节偏移, 数值)
+
+    Raises:
+        OSError: 文件不存在或无法读取
+    """
+    group = 1 if pattern.groups else 0
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            mm = None
+        if mm is None:
+            yield from _iter_line_codes(f, pattern, group, base, start, end)
+            return
+        with mm:
+            if end is None:
+                end = len(mm)
+            yield from _parse_matches(pattern.finditer(mm, start, end), group, base)
+
+
+def _iter_line_codes(f, pattern: "re.Pattern[bytes]", group: int, base: int,
+                     start: int, end: Optional[int]) -> Iterator[Tuple[int, int]]:
+    """按行读取无法映射的文件, 偏移与mmap方式相同"""
+    offset = 0
+    for line in f:
+        line_end = offset + len(line)
+        if line_end > start:
+            endpos = len(line) if end is None else min(end - offset, len(line))
+            yield from _parse_matches(pattern.finditer(line, max(start - offset, 0), endpos), group, base, offset)
+        offset = line_end
+        if end is not None and offset >= end:
+            break
+
+
+def _parse_matches(matches: Iterator["re.Match[bytes]"], group: int, base: int,
+                   offset: int = 0) -> Iterator[Tuple[int, int]]:
+    for match in matches:
+        token = match.group(group)
+        try:
+            text = token.decode('ascii')
+            value = decode_core.parse_number(text) if base == 0 else int(text, base)
+        except (UnicodeDecodeError, ValueError):
+            continue
+        yield offset + match.start(group), value
+
+
+def iter_batches(items: Iterator, size: int = BATCH_SIZE) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def symbol_fields(layout: List[list]) -> List[Tuple[int, str, decode_core.SymbolTable]]:
+    """有含义的变量: (在输出变量列中的序号, 变量名, 查找表)
+
+    重名变量的解析值取最后一个, 含义也按最后一个变量的定义查找.
+    """
+    tables = {}
+    for var, table in zip(layout, decode_core.layout_symbols(layout)):
+        tables[var[0]] = table
+    return [(i, name, table) for i, (name, table) in enumerate(tables.items()) if table is not None]
+
+
+def add_symbols(rows: Iterator[list], symbols: List[tuple], first: int = 3) -> Iterator[list]:
+    """在每行末尾追加有含义变量的含义, 没有含义的值为空
+
+    Args:
+        rows: iter_rows 等产出的行, 变量列从第 first 列开始
+        symbols: symbol_fields 的返回值
+    """
+    lookups = [(first + i, table.lookup) for i, _, table in symbols]
+    for row in rows:
+        row.extend([lookup(row[i]) or '' for i, lookup in lookups])
+        yield row
+
+
+def iter_rows(path: str, layout: List[list], pattern: "re.Pattern[bytes]", base: int = 0,
+              start: int = 0, end: Optional[int] = None, cache=None, symbols: bool = False) -> Iterator[list]:
+    """逐行产出解码结果: [文件, 偏移, 原始值, 变量1, 变量2, ...]
+
+    cache 为 decode_cache.CachedLayout 时重复出现的值直接取缓存结果;
+    symbols 为True时每行末尾追加有含义变量的含义(见 symbol_fields)
+    """
+    if symbols:
+        tables = symbol_fields(layout)
+        if tables:
+            yield from add_symbols(iter_rows(path, layout, pattern, base, start, end, cache), tables)
+            return
+    if cache is not None:
+        for offset, value in iter_codes(path, pattern, base, start, end):
+            yield [path, offset, f"0x{value:X}", *cache.decode_values(value)]
+        return
+    for batch in iter_batches(iter_codes(path, pattern, base, start, end)):
+        values = [value for _, value in batch]
+        columns = list(decode_core.decode_batch(values, layout).values())
+        for i, (offset, value) in enumerate(batch):
+            yield [path, offset, f"0x{value:X}"] + [column[i] for column in columns]
+
+
+def iter_delta_rows(source, items: Iterator[Tuple[int, int]], index: decode_core.DeltaIndex,
+                    previous: Dict, symbols: Optional[list] = None) -> Iterator[list]:
+    """与同一来源的上一个值比较, 每个变化的变量一行: [来源, 位置, 原始值, 变量名, 旧值, 新值]
+
+    Args:
+        source: 来源(文件名或数据源), 不同来源分别比较
+        items: (位置, 值)
+        index: 变量定义的 decode_core.DeltaIndex
+        previous: 来源 -> 上一个值, 跨批次保存比较基准; 每个来源的第一个值只作为基准
+        symbols: decode_core.layout_symbols 的返回值, 给出时每行追加旧值和新值的含义
+    """
+    last = previous.get(source)
+    for position, value in items:
+        if last is not None and last != value:
+            for change in index.changes(last, value):
+                row = [source, position, f"0x{value:X}", change.name, change.old, change.new]
+                if symbols is not None:
+                    table = symbols[change.index]
+                    row += [table.lookup(change.old) or '', table.lookup(change.new) or ''] if table else ['', '']
+                yield row
+        last = value
+    previous[source] = last
+
+
+def write_rows(rows: Iterator[list], header: List[str], fmt: str, out=None,
+               write_header: bool = True) -> int:
+    """把解码结果写到输出流(默认为调用时的 sys.stdout), 返回写出的行数"""
+    if out is None:
+        out = sys.stdout
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(out, lineterminator='\n')
+        if write_header:
+            writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        # 键只编码一次, 整数直接转为字符串, 输出与 json.dumps(dict(zip(header, row))) 相同
+        keys = [json.dumps(name, ensure_ascii=False) + ': ' for name in header]
+        dumps = json.dumps
+        for row in rows:
+            out.write('{' + ', '.join([key + (str(value) if type(value) is int else dumps(value, ensure_ascii=False))
+                                       for key, value in zip(keys, row)]) + '}\n')
+            count += 1
+    return count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='按已保存的变量定义批量解码日志文件中的错误码')
+    parser.add_argument('layout', help='config/data_define.json 中保存的定义名')
+    parser.add_argument('files', nargs='*', help='日志文件')
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN,
+                        help='查找错误码的正则, 有分组时取第1个分组 (默认: %(default)s)')
+    parser.add_argument('--base', type=int, choices=[0, 10, 16], default=0,
+                        help='数值进制, 0为自动判断 (默认: %(default)s)')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='输出格式')
+    parser.add_argument('--define-file', default='data_define.json', help='config目录下的定义文件名')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='并行解码的进程数, 0为CPU核数 (默认: %(default)s)')
+    parser.add_argument('--chunk-size', type=int, default=16,
+                        help='并行解码时每块的大小, 单位MB (默认: %(default)s)')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='缓存最近解码结果的数量, 适合大量重复的错误码, 0为不缓存 (默认: %(default)s)')
+    parser.add_argument('--symbols', action='store_true',
+                        help='有含义(枚举/#define名称)的变量追加一列 <变量名>_symbol')
+    parser.add_argument('--delta', action='store_true',
+                        help='只输出与上一个值相比变化的变量, 每个变化一行: 变量名, 旧值, 新值')
+    stream = parser.add_argument_group('实时数据源')
+    stream.add_argument('--stream', action='append', default=[], metavar='URL',
+                        help='tcp://host:port, udp://host:port 或 pipe:///path, 可指定多个')
+    stream.add_argument('--listen', action='store_true', help='TCP数据源作为服务端监听')
+    stream.add_argument('--word-size', type=int, default=0,
+                        help='按定长二进制字分帧的字节数, 0为按文本查找错误码 (默认: %(default)s)')
+    stream.add_argument('--byteorder', choices=['little', 'big'], default='little', help='二进制字的字节序')
+    stream.add_argument('--queue-size', type=int, default=64, help='解码队列最多缓存的批数')
+    stats = parser.add_argument_group('统计')
+    stats.add_argument('--stats', action='store_true',
+                       help='不输出每行结果, 只输出每个变量的取值统计(JSON), 统计时不使用多进程')
+    stats.add_argument('--top', type=int, default=10, help='每个变量输出的高频值数量 (默认: %(default)s)')
+    stats.add_argument('--window', type=float,
+                       help='统计窗口大小, 日志文件为值的数量(默认100000), 实时数据源为秒(默认60)')
+    return parser
+
+
+def decode_stream(args: argparse.Namespace, layout: List[list], pattern: "re.Pattern[bytes]",
+                  header: List[str], stats=None) -> int:
+    """从实时数据源读取并输出解码结果, 直到数据源结束或被中断, 返回写出的行数
+
+    stats 为 field_stats.FieldStats 时只累计统计, 不输出每行结果
+    """
+    import asyncio
+    import stream_decode
+
+    symbols = symbol_fields(layout) if args.symbols else []
+
+    if args.word_size:
+        framer_factory = lambda: stream_decode.BinaryFramer(args.word_size, args.byteorder)
+    else:
+        framer_factory = lambda: stream_decode.TextFramer(pattern, args.base)
+
+    # 已写出的行数, 被中断时也能返回
+    written = [0]
+    delta_index = decode_core.DeltaIndex(layout) if args.delta else None
+    # 数据源 -> 上一个值
+    previous = {}
+    delta_symbols = decode_core.layout_symbols(layout) if args.delta and args.symbols else None
+
+    async def run():
+        decoder = stream_decode.StreamDecoder(layout, args.queue_size)
+        producer = asyncio.ensure_future(
+            stream_decode.run_sources(args.stream, decoder, framer_factory, args.listen))
+        # 数据源 -> 已输出的值数量, 作为每个值的序号
+        indexes = {}
+        try:
+            async for batch in decoder.iter_batches():
+                if stats is not None:
+                    stats.update(batch.values)
+                    written[0] += len(batch.values)
+                    continue
+                start = indexes.get(batch.source, 0)
+                indexes[batch.source] = start + len(batch.values)
+                if delta_index is not None:
+                    rows = iter_delta_rows(batch.source, enumerate(batch.values, start), delta_index,
+                                           previous, delta_symbols)
+                    written[0] += write_rows(rows, header, args.format, write_header=not written[0])
+                    sys.stdout.flush()
+                    continue
+                columns = list(batch.columns.values())
+                rows = ([batch.source, start + i, f"0x{value:X}"] + [column[i] for column in columns]
+                        for i, value in enumerate(batch.values))
+                if symbols:
+                    rows = add_symbols(rows, symbols)
+                written[0] += write_rows(rows, header, args.format, write_header=not written[0])
+                sys.stdout.flush()
+        finally:
+            producer.cancel()
+        # 数据源出错(如连接被拒绝)时抛出异常
+        if not producer.cancelled():
+            producer.result()
+        if decoder.dropped:
+            print(f"队列已满, 丢弃 {decoder.dropped} 个值", file=sys.stderr)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return written[0]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    layout = load_layout(args.layout, args.define_file)
+    if not layout:
+        print(f"未找到变量定义: {args.layout}", file=sys.stderr)
+        return 1
+    if not args.files and not args.stream:
+        print("请指定日志文件或 --stream 数据源", file=sys.stderr)
+        return 1
+    missing = [path for path in args.files if not os.path.exists(path)]
+    if missing:
+        print(f"日志文件不存在: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    pattern = re.compile(args.pattern.encode('utf-8'))
+    # 重名变量在解码结果中只保留一列
+    fields = list(dict.fromkeys(var[0] for var in layout))
+    if args.delta and args.stats:
+        print("--delta 不能与 --stats 同时使用", file=sys.stderr)
+        return 1
+    if args.delta:
+        fields = ['field', 'old', 'new'] + (['old_symbol', 'new_symbol'] if args.symbols else [])
+    elif args.symbols:
+        fields += [f"{name}_symbol" for _, name, _ in symbol_fields(layout)]
+    header = ['file', 'offset', 'value'] + fields
+
+    if args.workers != 1 and not all(os.path.isfile(path) for path in args.files):
+        # 管道等只能从头顺序读取, 无法切块并行
+        args.workers = 1
+
+    cache = None
+    if args.cache_size and args.workers == 1:
+        # 多进程解码时每个进程各自缓存
+        import decode_cache
+        cache = decode_cache.DecodeCache(args.cache_size)
+
+    stats = None
+    if args.stats:
+        import field_stats
+        if args.stream:
+            stats = field_stats.FieldStats(layout, window_size=args.window or 60, clock='time',
+                                           top_k=max(args.top, field_stats.DEFAULT_TOP_K))
+        else:
+            stats = field_stats.FieldStats(layout, window_size=args.window or 100_000, clock='count',
+                                           top_k=max(args.top, field_stats.DEFAULT_TOP_K))
+
+    def all_rows():
+        cached_layout = cache.layout(layout) if cache is not None else None
+        for path in args.files:
+            yield from iter_rows(path, layout, pattern, args.base, cache=cached_layout, symbols=args.symbols)
+
+    def delta_rows():
+        # 相邻值必须按顺序比较, 不使用多进程
+        index = decode_core.DeltaIndex(layout)
+        symbols = decode_core.layout_symbols(layout) if args.symbols else None
+        for path in args.files:
+            yield from iter_delta_rows(path, iter_codes(path, pattern, args.base), index, {}, symbols)
+
+    def collect_stats():
+        for path in args.files:
+            for batch in iter_batches(iter_codes(path, pattern, args.base)):
+                stats.update([value for _, value in batch])
+        return stats.count
+
+    try:
+        if args.stream:
+            try:
+                count = decode_stream(args, layout, pattern, ['source', 'index', 'value'] + fields, stats)
+            except BrokenPipeError:
+                raise
+            except (OSError, ValueError) as e:
+                print(f"数据源出错: {e}", file=sys.stderr)
+                return 1
+        elif stats is not None:
+            count = collect_stats()
+        elif args.delta:
+            count = write_rows(delta_rows(), header, args.format)
+        elif args.workers == 1:
+            count = write_rows(all_rows(), header, args.format)
+        else:
+            import parallel_decode
+            count = parallel_decode.decode_files(
+                args.files, layout, pattern, header, args.format,
+                base=args.base, workers=args.workers or None,
+                chunk_size=args.chunk_size * 1024 * 1024, cache_size=args.cache_size, symbols=args.symbols)
+        if stats is not None:
+            json.dump(stats.to_dict(args.top), sys.stdout, ensure_ascii=False, indent=2)
+            sys.stdout.write('\n')
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # 下游(如 head)提前关闭管道时安静退出
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except OSError as e:
+        print(f"无法读取日志文件: {e}", file=sys.stderr)
+        return 1
+    print(f"共输出 {count} 个变化" if args.delta else f"共解码 {count} 个值", file=sys.stderr)
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(f"缓存命中率 {cache_stats['hit_rate']:.1%}, 缓存 {cache_stats['size']} 项, "
+              f"约 {cache_stats['memory_bytes'] / 1024:.0f} KB", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,709 @@
+"""解码核心逻辑, 不依赖PyQt5, 可在命令行/脚本中直接使用"""
+import hashlib
+import re
+import sys
+from collections import OrderedDict, namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# numpy为可选依赖, 没有安装时批量解码退回到纯Python整数列表.
+# 只在批量解码时才导入, 界面启动和单值解码不需要加载numpy
+
+
+# 去除花括号之外的数据
+def strip_external_braces(s: str) -> str:
+    start_index = s.find("{")
+    end_index = s.find("}")
+
+    if start_index == -1:
+        start_index = 0
+    if end_index == -1:
+        end_index = len(s)
+    return s[start_index + 1:end_index]
+
+
+def assign_bits_to_variables(decimal_value: int, var_info: List[list]) -> Dict[str, list]:
+    """按变量定义拆分数值
+
+    Args:
+        decimal_value: 待解码的值
+        var_info: [变量名, 位宽] 列表, 从最低位开始依次排列;
+            也可以是 [变量名, 位宽, 起始位], 用于联合体等位置不连续的定义
+
+    Returns:
+        变量名 -> [位宽, 解析值]
+    """
+    result = {}
+    offset = 0
+    # 从右到左处理每个变量（从最低位开始）
+    for var in var_info:
+        var_name, width = var[0], var[1]
+        if len(var) > 2 and var[2] is not None:
+            offset = var[2]
+        # 计算掩码, 用于提取指定位数
+        mask = (1 << width) - 1
+        # 提取对应位的值, 存入结果字典
+        result[var_name] = [width, (decimal_value >> offset) & mask]
+        # 下一个变量紧接在当前变量之后
+        offset += width
+    return result
+
+
+# 预编译的注释正则
+LINE_COMMENT_RE = re.compile(r'//.*')
+BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', flags=re.DOTALL)
+
+
+def parse_variable_line(line: str) -> Optional[list]:
+    """解析单行变量定义 `类型 变量名 : 位宽;`, 不是变量定义时返回None"""
+    # 跳过空行
+    if not line.strip():
+        return None
+    # 删除注释
+    line = LINE_COMMENT_RE.sub('', line)
+    line = BLOCK_COMMENT_RE.sub('', line)
+
+    # 移除分号
+    line = line.replace(';', '')
+    # 按冒号分割行, 获取变量名和位宽部分
+    parts = line.split(':')
+    if len(parts) != 2:
+        return None
+    # 获取位宽并转换为整数
+    try:
+        width = int(parts[1].strip())
+    except ValueError:
+        return None
+
+    # 获取变量名
+    # 从变量名部分移除类型信息
+    var_parts = parts[0].strip().split()
+    var_name = var_parts[-1].strip()
+    return [var_name, width]
+
+
+def parse_variable_definitions(data_define: str) -> List[list]:
+    # 初始化结果列表
+    result = []
+    for line in data_define.strip().split('\n'):
+        var = parse_variable_line(line)
+        if var is not None:
+            # 添加到结果列表
+            result.append(var)
+    return result
+
+
+class IncrementalStructParser:
+    """增量解析结构体定义
+
+    按行缓存解析结果, 输入变化时只有新出现的行需要重新解析,
+    在大段定义中修改一个字符的代价与行数基本无关.
+    """
+
+    def __init__(self, max_cache_lines: int = 100_000):
+        # 行内容 -> parse_variable_line 的结果
+        self._line_cache: Dict[str, Optional[list]] = {}
+        self.max_cache_lines = max_cache_lines
+        # 最近一次解析的行数和实际重新解析的行数
+        self.last_line_count = 0
+        self.last_parsed_count = 0
+
+    def parse(self, c_code: str) -> List[list]:
+        """等价于 parse_variable_definitions(strip_external_braces(c_code))"""
+        lines = strip_external_braces(c_code).strip().split('\n')
+        cache = self._line_cache
+        if len(cache) + len(lines) > self.max_cache_lines:
+            cache.clear()
+
+        result = []
+        parsed = 0
+        for line in lines:
+            try:
+                var = cache[line]
+            except KeyError:
+                var = cache[line] = parse_variable_line(line)
+                parsed += 1
+            if var is not None:
+                # 复制一份, 调用方修改结果不会影响缓存
+                result.append(list(var))
+        self.last_line_count = len(lines)
+        self.last_parsed_count = parsed
+        return result
+
+
+def get_struct_name(input_string: str) -> str:
+    """
+    提取字符串中在"}"之后的内容，直到遇到非字母数字下划线的字符
+    """
+    # 找到最后一个"}"的位置
+    string = input_string.replace(' ', '').replace('\n', '').replace('\r', '')
+    brace_index = string.rfind("}")
+
+    if brace_index == -1:
+        return ""
+
+    # 从"}"后面的位置开始提取
+    start_index = brace_index + 1
+
+    # 查找第一个非字母数字下划线的字符
+    end_index = start_index
+    while end_index < len(string) and (string[end_index].isalnum() or string[end_index] == '_'):
+        end_index += 1
+
+    # 提取符合条件的内容
+    return string[start_index:end_index]
+
+
+HEX_CHARS = frozenset('abcdefABCDEF')
+
+
+def parse_number(num_str: str) -> int:
+    """按界面输入框的规则解析数字: 含a-f或以0x开头为16进制, 否则为10进制
+
+    Raises:
+        ValueError: 无法解析为数字
+    """
+    num_str = num_str.strip()
+    if num_str.startswith(('0x', '0X')) or any(c in HEX_CHARS for c in num_str):
+        return int(num_str, 16)
+    return int(num_str, 10)
+
+
+# 批量输入中数字之间的分隔符
+NUMBER_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+def parse_numbers(text: str) -> Tuple[List[int], List[str]]:
+    """解析粘贴的一批数字, 以空白、逗号或分号分隔, 每个数字按 parse_number 的规则判断进制
+
+    Returns:
+        (数值列表, 无法解析的片段列表)
+    """
+    values = []
+    invalid = []
+    for token in NUMBER_SEPARATORS.split(text):
+        if not token:
+            continue
+        try:
+            if token.startswith(('0x', '0X')) or not HEX_CHARS.isdisjoint(token):
+                values.append(int(token, 16))
+            else:
+                values.append(int(token, 10))
+        except ValueError:
+            invalid.append(token)
+    return values, invalid
+
+
+def field_offsets(var_info: List[list]) -> List[tuple]:
+    """把 [变量名, 位宽(, 起始位)] 列表换算成 (变量名, 起始位, 位宽)
+
+    Args:
+        var_info: parse_variable_definitions 的返回值, 从最低位开始排列;
+            带起始位的变量按指定位置, 其后的变量紧接其后
+
+    Returns:
+        每个变量的 (name, offset, width) 元组列表
+    """
+    fields = []
+    offset = 0
+    for var in var_info:
+        var_name, width = var[0], var[1]
+        if len(var) > 2 and var[2] is not None:
+            offset = var[2]
+        fields.append((var_name, offset, width))
+        offset += width
+    return fields
+
+
+def layout_fingerprint(var_info: List[list]) -> str:
+    """变量定义的指纹, 内容相同的定义指纹相同, 可用作缓存键"""
+    return hashlib.sha1(repr(var_info).encode('utf-8')).hexdigest()
+
+
+def field_dtype(width: int):
+    """返回能容纳指定位宽的最窄无符号numpy类型"""
+    import numpy as np
+
+    if width <= 8:
+        return np.uint8
+    if width <= 16:
+        return np.uint16
+    if width <= 32:
+        return np.uint32
+    return np.uint64
+
+
+UINT64_MASK = (1 << 64) - 1
+
+
+def uint64_array(values: Sequence[int], keep_wide: bool = False):
+    """把Python整数序列转换为numpy数组, 需要numpy
+
+    np.asarray 遇到大于等于2^63的值会得到float64(丢失精度), 遇到超过64位的值或负数会抛出 OverflowError;
+    这里都能放入uint64时直接转换, 否则按 keep_wide 处理.
+
+    Args:
+        values: Python整数序列
+        keep_wide: False 时只保留每个值的低64位(负数按补码), 总位宽不超过64位的定义解码结果不变;
+            True 时返回原值组成的对象数组, 用于需要保留原值的统计
+
+    Returns:
+        uint64数组, keep_wide=True 且有值放不下时为对象数组
+    """
+    import numpy as np
+
+    try:
+        return np.array(values, dtype=np.uint64)
+    except OverflowError:
+        if keep_wide:
+            return np.array(values, dtype=object)
+        return np.fromiter((value & UINT64_MASK for value in values), dtype=np.uint64, count=len(values))
+
+
+def decode_batch(values: Union[Sequence[int], "numpy.ndarray"], var_info: List[list]) -> Dict[str, Sequence[int]]:
+    """批量解码, 每个变量输出一列
+
+    numpy无符号整数数组(uint8/16/32/64)走整列的移位/掩码运算;
+    Python整数列表(可超过64位)按列用列表推导计算.
+
+    Args:
+        values: 待解码的值数组
+        var_info: parse_variable_definitions 的返回值
+
+    Returns:
+        变量名 -> 该变量在所有输入值上的解码结果列
+    """
+    fields = field_offsets(var_info)
+    result = {}
+
+    # 传入的是numpy数组时numpy必然已经导入
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(values, np.ndarray):
+        if values.dtype.kind == 'i':
+            # 有符号数按同宽度无符号数解释, 不复制数据
+            values = values.view(values.dtype.str.replace('i', 'u'))
+        if values.dtype.kind != 'u':
+            raise TypeError(f"不支持的数组类型: {values.dtype}")
+        bits = values.dtype.itemsize * 8
+        utype = values.dtype.type
+        for var_name, offset, width in fields:
+            out_type = field_dtype(width)
+            if offset >= bits:
+                # 超出数组位宽的变量恒为0
+                result[var_name] = np.zeros(len(values), dtype=out_type)
+                continue
+            mask = (1 << min(width, bits - offset)) - 1
+            column = (values >> utype(offset)) & utype(mask)
+            result[var_name] = column.astype(out_type, copy=False)
+        return result
+
+    for var_name, offset, width in fields:
+        mask = (1 << width) - 1
+        result[var_name] = [(value >> offset) & mask for value in values]
+    return result
+
+
+def layout_bits(var_info: List[list]) -> int:
+    """变量定义占用的总位宽, 即最高变量的结束位"""
+    return max((offset + width for _, offset, width in field_offsets(var_info)), default=0)
+
+
+def _check_column(name: str, width: int, column) -> None:
+    """检查一列值都在 [0, 2^位宽) 范围内
+
+    Raises:
+        ValueError: 有值为负或超出位宽
+    """
+    if len(column) == 0:
+        return
+    if hasattr(column, 'min'):
+        # numpy数组整列比较, 不逐个转换为Python整数
+        low, high = int(column.min()), int(column.max())
+    else:
+        low, high = min(column), max(column)
+    if low < 0 or high >> width:
+        bad = low if low < 0 else high
+        raise ValueError(f"变量 {name} 的值 {bad} 超出 {width} 位的范围 0~{(1 << width) - 1}")
+
+
+def encode_values(values: Union[Dict[str, int], Sequence[int]], var_info: List[list], check: bool = True) -> int:
+    """assign_bits_to_variables 的逆运算: 把各变量的值组装成一个整数
+
+    Args:
+        values: 变量名 -> 值, 没有给出的变量为0; 或按定义顺序的值序列(如 CompiledLayout.decode 的结果)
+        var_info: 变量定义
+        check: 是否检查值在变量位宽范围内, 不检查时超出的高位被截掉
+
+    Returns:
+        组装后的整数; 位置重叠的变量(联合体)后面的覆盖前面的
+
+    Raises:
+        ValueError: check 为True且有值超出位宽
+    """
+    fields = field_offsets(var_info)
+    if not isinstance(values, dict):
+        if len(values) != len(fields):
+            raise ValueError(f"值的数量 {len(values)} 与变量数量 {len(fields)} 不一致")
+        items = zip(fields, values)
+    else:
+        items = ((field, values[field[0]]) for field in fields if field[0] in values)
+    result = 0
+    for (var_name, offset, width), value in items:
+        mask = (1 << width) - 1
+        if check and not 0 <= value <= mask:
+            raise ValueError(f"变量 {var_name} 的值 {value} 超出 {width} 位的范围 0~{mask}")
+        result = (result & ~(mask << offset)) | ((value & mask) << offset)
+    return result
+
+
+def encode_batch(columns: Dict[str, Sequence[int]], var_info: List[list],
+                 check: bool = True) -> Union[List[int], "numpy.ndarray"]:
+    """批量编码, decode_batch 的逆运算
+
+    有numpy数组列且总位宽不超过64位时整列做移位/或运算, 返回能容纳总位宽的最窄无符号数组;
+    否则返回Python整数列表(可超过64位).
+
+    Args:
+        columns: 变量名 -> 该变量的一列值, 各列长度相同; 没有给出的变量为0, 重名变量使用同一列
+        var_info: 变量定义
+        check: 是否检查值在变量位宽范围内
+
+    Raises:
+        ValueError: 各列长度不同, 或 check 为True且有值超出位宽
+    """
+    fields = [field for field in field_offsets(var_info) if field[0] in columns]
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"各列长度不一致: {sorted(lengths)}")
+    count = lengths.pop() if lengths else 0
+    if check:
+        for var_name, _, width in fields:
+            _check_column(var_name, width, columns[var_name])
+    total_bits = layout_bits(var_info)
+
+    np = sys.modules.get('numpy')
+    if (np is not None and total_bits <= 64
+            and any(isinstance(column, np.ndarray) for column in columns.values())):
+        words = np.zeros(count, dtype=np.uint64)
+        occupied = 0
+        for var_name, offset, width in fields:
+            mask = (1 << width) - 1
+            column = np.asarray(columns[var_name])
+            if column.dtype.kind == 'i':
+                column = column.view(column.dtype.str.replace('i', 'u'))
+            column = column.astype(np.uint64, copy=False)
+            if not check:
+                column = column & np.uint64(mask)
+            if occupied & (mask << offset):
+                # 与前面的变量重叠, 先清掉这些位
+                words &= np.uint64(~(mask << offset) & 0xFFFFFFFFFFFFFFFF)
+            words |= column << np.uint64(offset)
+            occupied |= mask << offset
+        return words.astype(field_dtype(total_bits), copy=False)
+
+    words = [0] * count
+    occupied = 0
+    for var_name, offset, width in fields:
+        mask = (1 << width) - 1
+        column = columns[var_name]
+        if not isinstance(column, list):
+            column = column.tolist() if hasattr(column, 'tolist') else list(column)
+        if not check:
+            column = [value & mask for value in column]
+        if occupied & (mask << offset):
+            clear = ~(mask << offset)
+            words = [(word & clear) | (value << offset) for word, value in zip(words, column)]
+        elif offset:
+            words = [word | (value << offset) for word, value in zip(words, column)]
+        else:
+            words = [word | value for word, value in zip(words, column)]
+        occupied |= mask << offset
+    return words
+
+
+class BufferDecoder:
+    """直接从字节缓冲区解码, 适用于128~4096位甚至更宽的状态块
+
+    每个变量只读取覆盖它的几个字节(memoryview切片, 不复制缓冲区),
+    不需要先把整个缓冲区转换成一个巨大的Python整数.
+
+    Args:
+        var_info: 变量定义, 同 assign_bits_to_variables
+        byteorder: 'little' 或 'big', 缓冲区按该字节序组成一个整数
+        bit_order: 'lsb0' 时第0位为整数的最低位(与 assign_bits_to_variables 一致);
+            'msb0' 时第0位为整数的最高位, 变量的第一位是其最高位
+    """
+
+    def __init__(self, var_info: List[list], byteorder: str = 'little', bit_order: str = 'lsb0'):
+        if byteorder not in ('little', 'big'):
+            raise ValueError(f"不支持的字节序: {byteorder}")
+        if bit_order not in ('lsb0', 'msb0'):
+            raise ValueError(f"不支持的位序: {bit_order}")
+        self.fields = field_offsets(var_info)
+        self.byteorder = byteorder
+        self.bit_order = bit_order
+        # 缓冲区字节数 -> 每个变量的 (名称, 起始字节, 结束字节, 右移位数, 掩码)
+        self._plans: Dict[int, List[tuple]] = {}
+
+    def plan(self, nbytes: int) -> List[tuple]:
+        """计算每个变量在指定长度缓冲区中的位置, 结果按长度缓存"""
+        plan = self._plans.get(nbytes)
+        if plan is not None:
+            return plan
+
+        total_bits = nbytes * 8
+        plan = []
+        for var_name, offset, width in self.fields:
+            # 换算为从整数最低位开始的位置
+            lsb = offset if self.bit_order == 'lsb0' else total_bits - offset - width
+            end = min(lsb + width, total_bits)
+            lsb = max(lsb, 0)
+            if width <= 0 or lsb >= end:
+                # 变量完全落在缓冲区之外
+                plan.append((var_name, 0, 0, 0, 0))
+                continue
+            if self.byteorder == 'little':
+                start_byte, end_byte = lsb // 8, (end - 1) // 8 + 1
+            else:
+                start_byte, end_byte = nbytes - 1 - (end - 1) // 8, nbytes - lsb // 8
+            plan.append((var_name, start_byte, end_byte, lsb % 8, (1 << (end - lsb)) - 1))
+        self._plans[nbytes] = plan
+        return plan
+
+    def values(self, buffer) -> List[int]:
+        """按变量定义顺序返回解码值(重名变量各占一项)"""
+        view = memoryview(buffer).cast('B')
+        from_bytes = int.from_bytes
+        order = self.byteorder
+        return [(from_bytes(view[a:b], order) >> shift) & mask
+                for _, a, b, shift, mask in self.plan(len(view))]
+
+    def decode(self, buffer) -> Dict[str, int]:
+        """解码一个缓冲区, 返回 变量名 -> 解码值"""
+        view = memoryview(buffer).cast('B')
+        from_bytes = int.from_bytes
+        order = self.byteorder
+        return {var_name: (from_bytes(view[a:b], order) >> shift) & mask
+                for var_name, a, b, shift, mask in self.plan(len(view))}
+
+    def iter_records(self, buffer, record_size: int, header_offset: int = 0):
+        """把缓冲区(可以是mmap)视为连续的定长记录, 逐条产出解码值列表"""
+        view = memoryview(buffer).cast('B')
+        for start in range(header_offset, len(view) - record_size + 1, record_size):
+            yield self.values(view[start:start + record_size])
+
+
+def decode_buffer(buffer, var_info: List[list], byteorder: str = 'little', bit_order: str = 'lsb0') -> Dict[str, int]:
+    """从 bytes/bytearray/memoryview/mmap 直接解码, 参数同 BufferDecoder"""
+    return BufferDecoder(var_info, byteorder, bit_order).decode(buffer)
+
+
+# 两个值之间变化的一个变量: 变量在定义中的序号, 变量名, 旧值, 新值
+FieldChange = namedtuple('FieldChange', 'index name old new')
+
+
+class DeltaIndex:
+    """比较相邻两个值时只处理变化的位
+
+    变量的起止位把定义切成若干段, 每段内覆盖它的变量相同(联合体中可能有多个);
+    预先建立 位 -> 段 的索引. 比较时对两个值异或, 每次取最低的变化位, 查出所在段的变量后跳到段尾,
+    耗时与变化的段数成正比, 与定义的总位宽无关.
+
+    Args:
+        var_info: 变量定义, 同 assign_bits_to_variables
+    """
+
+    def __init__(self, var_info: List[list]):
+        self.fields = field_offsets(var_info)
+        self.total_bits = max((offset + width for _, offset, width in self.fields), default=0)
+        self.mask = (1 << self.total_bits) - 1
+        bounds = sorted({0, self.total_bits}
+                        | {offset for _, offset, _ in self.fields}
+                        | {offset + width for _, offset, width in self.fields})
+        starts = {bound: segment for segment, bound in enumerate(bounds)}
+        # 每段的结束位和覆盖它的变量序号
+        self.segment_ends: List[int] = bounds[1:]
+        covering = [[] for _ in self.segment_ends]
+        for i, (_, offset, width) in enumerate(self.fields):
+            for segment in range(starts[offset], starts[offset + width]):
+                covering[segment].append(i)
+        self.segment_fields: List[Tuple[int, ...]] = [tuple(fields) for fields in covering]
+        # 位 -> 段序号
+        self.bit_segments: List[int] = []
+        for segment, (start, end) in enumerate(zip(bounds, bounds[1:])):
+            self.bit_segments.extend([segment] * (end - start))
+        # 没有联合体时每个变量恰好是一段, 段的顺序就是变量的起始位顺序, 不需要去重
+        self.disjoint = (all(len(fields) <= 1 for fields in covering)
+                         and sum(map(len, covering)) == len(self.fields))
+
+    def changed_fields(self, diff: int) -> List[int]:
+        """异或结果中有变化位的变量序号, 按定义顺序; 定义之外的位被忽略"""
+        diff &= self.mask
+        found = []
+        bit_segments = self.bit_segments
+        segment_fields = self.segment_fields
+        segment_ends = self.segment_ends
+        while diff:
+            segment = bit_segments[(diff & -diff).bit_length() - 1]
+            found.extend(segment_fields[segment])
+            end = segment_ends[segment]
+            diff = diff >> end << end
+        if self.disjoint:
+            # 起始位顺序与定义顺序一般相同, 带起始位的定义可能不同
+            return found if all(a < b for a, b in zip(found, found[1:])) else sorted(found)
+        return sorted(set(found))
+
+    def changes(self, old: int, new: int) -> List[FieldChange]:
+        """两个值之间变化的变量及其新旧值, 按定义顺序"""
+        result = []
+        fields = self.fields
+        for i in self.changed_fields(old ^ new):
+            name, offset, width = fields[i]
+            mask = (1 << width) - 1
+            result.append(FieldChange(i, name, (old >> offset) & mask, (new >> offset) & mask))
+        return result
+
+
+def iter_deltas(values, var_info: List[list]):
+    """依次比较相邻的值, 对有变量变化的值产出 (序号, 值, 变化列表); 第一个值作为基准不产出"""
+    index = DeltaIndex(var_info)
+    previous = None
+    for i, value in enumerate(values):
+        if previous is not None:
+            changes = index.changes(previous, value)
+            if changes:
+                yield i, value, changes
+        previous = value
+
+
+# 不超过该位宽、且取值不太稀疏的变量用数组查表, 其余用字典
+DENSE_SYMBOL_BITS = 12
+
+
+class SymbolTable:
+    """变量值 -> 含义 的查找表
+
+    窄变量预先展开为长度 2^位宽 的元组, 解析值经过掩码后一定在范围内, 查表就是一次下标访问;
+    宽变量或含义很少的变量用字典. 负数的枚举值在该位宽有符号数范围内时按补码存入, 与解析值一致;
+    放不下的常量(如2位变量的 MODE_FAST=4)不可能出现, 直接忽略, 不截断到其它值上.
+
+    Args:
+        names: 值 -> 名称, 键可以是整数或10进制字符串(JSON读回的格式)
+        width: 变量位宽
+    """
+
+    __slots__ = ('width', 'names', 'table', 'lookup')
+
+    def __init__(self, names: Dict, width: int):
+        mask = (1 << width) - 1
+        self.width = width
+        self.names: Dict[int, str] = {}
+        for value, name in names.items():
+            value = int(value)
+            if -(1 << width >> 1) <= value < 0:
+                value &= mask
+            if 0 <= value <= mask:
+                self.names.setdefault(value, name)
+        size = 1 << width
+        if width <= DENSE_SYMBOL_BITS and size <= max(256, 16 * len(self.names)):
+            self.table = tuple(self.names.get(value) for value in range(size))
+            self.lookup = self.table.__getitem__
+        else:
+            self.table = self.names
+            self.lookup = self.names.get
+
+    @property
+    def dense(self) -> bool:
+        return self.table is not self.names
+
+    def column(self, values: Sequence[int]) -> List[Optional[str]]:
+        """整列查表, 没有含义的值为None"""
+        np = sys.modules.get('numpy')
+        if np is not None and isinstance(values, np.ndarray):
+            values = values.tolist()
+        return list(map(self.lookup, values))
+
+
+def layout_symbols(var_info: List[list]) -> List[Optional[SymbolTable]]:
+    """按变量定义顺序返回每个变量的含义查找表, 定义中没有第4项(值 -> 名称)的变量为None"""
+    return [SymbolTable(var[3], var[1]) if len(var) > 3 and var[3] else None for var in var_info]
+
+
+# 最多缓存的编译解码器数量
+COMPILED_CACHE_SIZE = 256
+# 生成并编译解码函数的耗时约等于逐个解码几十到几百个值(见 benchmark.py compiled_decode),
+# 同一定义逐个解码的次数超过该值后才值得编译, 之前按变量逐个移位
+COMPILE_AFTER = 256
+# 变量定义指纹 -> CompiledLayout, 按最近使用排序
+_compiled_layouts: "OrderedDict[str, CompiledLayout]" = OrderedDict()
+
+
+class CompiledLayout:
+    """为一个变量定义生成的专用解码函数, 起始位和掩码都是代码中的常量, 解码时没有循环也不创建字典
+
+    decode(value) 返回解析值元组, decode_record(value) 返回以变量名为属性的命名元组,
+    decode_dict(value) 返回与 assign_bits_to_variables 相同的结果,
+    decode_symbols(value) 返回每个变量的含义(没有含义时为None), 查找表同样以常量形式编入函数.
+    编译本身有开销, 只解码少量值时 assign_bits_to_variables 更快, 见 COMPILE_AFTER.
+    """
+
+    __slots__ = ('fingerprint', 'names', 'widths', 'symbols', 'source', 'decode', 'decode_record',
+                 'decode_dict', 'decode_symbols', 'record_type')
+
+    def __init__(self, var_info: List[list], fingerprint: Optional[str] = None):
+        fields = field_offsets(var_info)
+        self.fingerprint = fingerprint or layout_fingerprint(var_info)
+        self.names = tuple(name for name, _, _ in fields)
+        self.widths = tuple(width for _, _, width in fields)
+        # 变量名不是合法标识符或重名时由 namedtuple 改为 _序号
+        self.record_type = namedtuple('Record', self.names, rename=True)
+
+        self.symbols = tuple(layout_symbols(var_info))
+
+        namespace = {'_Record': self.record_type}
+        terms = []
+        dict_items = []
+        symbol_terms = []
+        for i, ((name, offset, width), table) in enumerate(zip(fields, self.symbols)):
+            mask = hex((1 << width) - 1)
+            term = f"value >> {offset} & {mask}" if offset else f"value & {mask}"
+            terms.append(term)
+            # 重名变量与 assign_bits_to_variables 相同, 后面的覆盖前面的
+            dict_items.append(f"{name!r}: [{width}, {term}]")
+            if table is None:
+                symbol_terms.append('None')
+            else:
+                namespace[f'_s{i}'] = table.lookup
+                symbol_terms.append(f"_s{i}({term})")
+        items = ', '.join(terms)
+        comma = ',' if len(terms) == 1 else ''
+        self.source = (f"def decode(value):\n    return ({items}{comma})\n"
+                       f"def decode_record(value):\n    return _Record({items})\n"
+                       f"def decode_dict(value):\n    return {{{', '.join(dict_items)}}}\n"
+                       f"def decode_symbols(value):\n    return ({', '.join(symbol_terms)}{comma})\n")
+        exec(compile(self.source, f"<layout {self.fingerprint[:8]}>", 'exec'), namespace)
+        self.decode = namespace['decode']
+        self.decode_record = namespace['decode_record']
+        self.decode_dict = namespace['decode_dict']
+        self.decode_symbols = namespace['decode_symbols']
+
+
+def cached_layout(var_info: List[list]) -> Optional[CompiledLayout]:
+    """已经编译过的解码器, 没有时返回None而不编译"""
+    compiled = _compiled_layouts.get(layout_fingerprint(var_info))
+    if compiled is not None:
+        _compiled_layouts.move_to_end(compiled.fingerprint)
+    return compiled
+
+
+def compile_layout(var_info: List[list]) -> CompiledLayout:
+    """返回变量定义的编译解码器, 内容相同的定义共用同一个, 生成的代码按指纹缓存"""
+    fingerprint = layout_fingerprint(var_info)
+    compiled = _compiled_layouts.get(fingerprint)
+    if compiled is not None:
+        _compiled_layouts.move_to_end(fingerprint)
+        return compiled
+    compiled = CompiledLayout(var_info, fingerprint)
+    _compiled_layouts[fingerprint] = compiled
+    if len(_compiled_layouts) > COMPILED_CACHE_SIZE:
+        _compiled_layouts.popitem(last=False)
+    return compiled
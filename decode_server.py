@@ -0,0 +1,425 @@
+"""本地批量解码服务, 基于asyncio的HTTP/JSON接口, 不依赖PyQt5
+
+变量定义从 config/<定义文件> 读取一次后常驻内存, 定义文件被修改后下一个请求自动使用新内容;
+每个定义的编译解码器、变化索引和含义查找表也都缓存, 请求中只做解码本身.
+连接默认保持(HTTP/1.1 keep-alive), 同一连接上可以连续发送多个请求(流水线), 响应按请求顺序返回.
+
+接口:
+    GET  /health                    {"status": "ok"}
+    GET  /layouts                   已保存的定义名列表
+    GET  /layouts/<定义名>           定义内容
+    POST /decode                    {"layout": "Hello", "values": ["0x1234", 4660], "symbols": false,
+                                     "format": "columns" | "records"}
+    POST /delta                     {"layout": "Hello", "values": [...], "previous": "0x0"}
+    GET  /metrics                   每个接口的请求数、值数量、耗时分位数和吞吐量
+
+用法:
+    python decode_server.py [--host 127.0.0.1] [--port 8765] [--define-file data_define.json]
+    curl -s localhost:8765/decode -d '{"layout": "Hello", "values": ["0x1234", "0xffff"]}'
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import decode_core
+from variable_saver import VariableSaver
+
+DEFAULT_PORT = 8765
+# 请求行和请求头的最大字节数
+MAX_HEADER_SIZE = 1 << 16
+# 请求体的最大字节数
+MAX_BODY_SIZE = 64 << 20
+# 超过该大小的请求体放到线程池中处理, 不阻塞同时在处理的其它连接
+OFFLOAD_BODY_SIZE = 256 << 10
+# 空闲连接保持的秒数
+KEEPALIVE_TIMEOUT = 30.0
+# 每个接口保留最近多少次请求的耗时, 用于计算分位数
+LATENCY_WINDOW = 4096
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           411: 'Length Required', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+           500: 'Internal Server Error'}
+
+
+class HttpError(Exception):
+    """以指定状态码返回给客户端的错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LayoutEntry:
+    """一个定义的常驻数据, 定义内容不变时在请求之间复用"""
+
+    __slots__ = ('var_info', 'names', 'tables', 'total_bits', '_delta')
+
+    def __init__(self, var_info: List[list]):
+        self.var_info = var_info
+        # 解码结果中的变量名, 重名变量只保留一列, 值取最后一个(与 decode_batch 一致)
+        tables = {}
+        for var, table in zip(var_info, decode_core.layout_symbols(var_info)):
+            tables[var[0]] = table
+        self.names = list(tables)
+        # 有含义的变量 -> 含义查找表
+        self.tables = {name: table for name, table in tables.items() if table is not None}
+        self.total_bits = decode_core.layout_bits(var_info)
+        self._delta: Optional[decode_core.DeltaIndex] = None
+
+    def decode(self, values: List[int]) -> Dict[str, list]:
+        """批量解码, 返回可直接序列化为JSON的列; 不超过64位且安装了numpy时整列运算"""
+        if self.total_bits <= 64 and values:
+            try:
+                import numpy as np
+            except ImportError:
+                np = None
+            if np is not None:
+                # 超过64位的值只保留低64位, 不影响不超过64位的定义的解码结果
+                columns = decode_core.decode_batch(decode_core.uint64_array(values), self.var_info)
+                return {name: column.tolist() for name, column in columns.items()}
+        return decode_core.decode_batch(values, self.var_info)
+
+    @property
+    def delta(self) -> decode_core.DeltaIndex:
+        if self._delta is None:
+            self._delta = decode_core.DeltaIndex(self.var_info)
+        return self._delta
+
+
+class EndpointMetrics:
+    """单个接口的计数和最近若干次请求的耗时"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.values = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        # 处理请求的累计耗时(秒), 不含网络传输
+        self.busy = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds: float, values: int, bytes_in: int, bytes_out: int, error: bool) -> None:
+        self.requests += 1
+        self.errors += error
+        self.values += values
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.busy += seconds
+        self.latencies.append(seconds)
+
+    def to_dict(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'values': self.values,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99),
+                           'max': latencies[-1] * 1000 if latencies else 0.0},
+            'values_per_second': self.values / self.busy if self.busy else 0.0,
+        }
+
+
+class DecodeService:
+    """解码服务: 管理常驻的定义并处理HTTP请求
+
+    Args:
+        saver: 读取定义用的 VariableSaver, JSON存储在文件未变化时直接返回缓存的内容
+    """
+
+    def __init__(self, saver: VariableSaver):
+        self.saver = saver
+        self.entries: Dict[str, LayoutEntry] = {}
+        self.metrics: Dict[str, EndpointMetrics] = {}
+        self.started = time.time()
+        self.connections = 0
+        self.open_connections = 0
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('GET', '/layouts'): self.layouts,
+            ('GET', '/metrics'): self.get_metrics,
+            ('POST', '/decode'): self.decode,
+            ('POST', '/delta'): self.delta,
+        }
+        # 启动时读取一次全部定义
+        for name, var_info in saver.load().items():
+            self.entries[name] = LayoutEntry(var_info)
+
+    def layout(self, name) -> LayoutEntry:
+        """按名称取常驻的定义, 定义内容变化时重新建立
+
+        Raises:
+            HttpError: 定义不存在
+        """
+        if not isinstance(name, str):
+            raise HttpError(400, "layout 应为定义名")
+        var_info = self.saver.store.get(name)
+        if not var_info:
+            raise HttpError(404, f"未找到变量定义: {name}")
+        entry = self.entries.get(name)
+        # JSON存储在文件未变化时返回同一个对象, 不需要逐项比较
+        if entry is None or (entry.var_info is not var_info and entry.var_info != var_info):
+            entry = LayoutEntry(var_info)
+            self.entries[name] = entry
+        return entry
+
+    @staticmethod
+    def parse_values(request: dict) -> Tuple[List[int], List[str]]:
+        """请求中的 values(整数或字符串列表) 和 text(以空白/逗号分隔的文本), 返回 (数值, 无法解析的项)"""
+        items = request.get('values', [])
+        if not isinstance(items, list):
+            raise HttpError(400, "values 应为列表")
+        # 常见情况是全部为非负整数, 一次过滤即可
+        values = [item for item in items if type(item) is int and item >= 0]
+        invalid = []
+        if len(values) != len(items):
+            # 有字符串或无效的项时逐个解析
+            values = []
+            for item in items:
+                if type(item) is int:
+                    if item >= 0:
+                        values.append(item)
+                        continue
+                elif isinstance(item, str):
+                    try:
+                        values.append(decode_core.parse_number(item))
+                        continue
+                    except ValueError:
+                        pass
+                invalid.append(str(item))
+        text = request.get('text')
+        if text:
+            if not isinstance(text, str):
+                raise HttpError(400, "text 应为字符串")
+            parsed, bad = decode_core.parse_numbers(text)
+            values.extend(parsed)
+            invalid.extend(bad)
+        return values, invalid
+
+    def health(self, request) -> Tuple[dict, int]:
+        return {'status': 'ok'}, 0
+
+    def layouts(self, request) -> Tuple[dict, int]:
+        return {'layouts': self.saver.store.names()}, 0
+
+    def layout_detail(self, name: str) -> Tuple[dict, int]:
+        entry = self.layout(name)
+        return {'layout': name, 'definition': entry.var_info}, 0
+
+    def get_metrics(self, request) -> Tuple[dict, int]:
+        return {
+            'uptime': time.time() - self.started,
+            'connections': self.connections,
+            'open_connections': self.open_connections,
+            'layouts_loaded': len(self.entries),
+            'endpoints': {path: metrics.to_dict() for path, metrics in self.metrics.items()},
+        }, 0
+
+    def decode(self, request: dict) -> Tuple[dict, int]:
+        entry = self.layout(request.get('layout'))
+        values, invalid = self.parse_values(request)
+        columns = entry.decode(values)
+        result = {'layout': request['layout'], 'count': len(values), 'invalid': invalid, 'fields': entry.names}
+        fmt = request.get('format', 'columns')
+        if fmt == 'columns':
+            result['values'] = list(map('0x{:X}'.format, values))
+            result['columns'] = columns
+        elif fmt == 'records':
+            data = [columns[name] for name in entry.names]
+            result['records'] = [dict(zip(entry.names, row), value=f"0x{value:X}")
+                                 for value, row in zip(values, zip(*data))] if data else \
+                [{'value': f"0x{value:X}"} for value in values]
+        else:
+            raise HttpError(400, f"不支持的 format: {fmt}")
+        if request.get('symbols'):
+            result['symbols'] = {name: table.column(columns[name]) for name, table in entry.tables.items()}
+        return result, len(values)
+
+    def delta(self, request: dict) -> Tuple[dict, int]:
+        entry = self.layout(request.get('layout'))
+        values, invalid = self.parse_values(request)
+        previous = request.get('previous')
+        if previous is not None:
+            try:
+                previous = decode_core.parse_number(previous) if isinstance(previous, str) else int(previous)
+            except (TypeError, ValueError):
+                raise HttpError(400, f"previous 无法解析: {previous}")
+        changes = entry.delta.changes
+        result = []
+        for i, value in enumerate(values):
+            if previous is not None and previous != value:
+                fields = {change.name: [change.old, change.new] for change in changes(previous, value)}
+                if fields:
+                    result.append({'index': i, 'value': f"0x{value:X}", 'fields': fields})
+            previous = value
+        return {'layout': request['layout'], 'count': len(values), 'invalid': invalid, 'changes': result,
+                'last': None if previous is None else f"0x{previous:X}"}, len(values)
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[str, int, bytes, int, float]:
+        """处理一个请求, 可在线程池中调用
+
+        Returns:
+            (指标中的接口名, 状态码, JSON响应体, 解码的值数量, 处理耗时秒数)
+        """
+        start = time.perf_counter()
+        count = 0
+        if path.startswith('/layouts/') and method == 'GET':
+            route, handler = '/layouts/*', lambda request: self.layout_detail(unquote(path[len('/layouts/'):]))
+        else:
+            route, handler = path, self.routes.get((method, path))
+        try:
+            if handler is None:
+                if any(key[1] == path for key in self.routes):
+                    raise HttpError(405, f"{path} 不支持 {method}")
+                route = '(other)'
+                raise HttpError(404, f"没有接口 {path}")
+            request = {}
+            if method == 'POST':
+                try:
+                    request = json.loads(body)
+                except (UnicodeDecodeError, ValueError) as e:
+                    raise HttpError(400, f"请求体不是有效的JSON: {e}")
+                if not isinstance(request, dict):
+                    raise HttpError(400, "请求体应为JSON对象")
+            payload, count = handler(request)
+            status = 200
+        except HttpError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return route, status, data, count, time.perf_counter() - start
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一个连接上的全部请求, 按顺序逐个读取和响应, 客户端可以不等响应连续发送(流水线)"""
+        self.connections += 1
+        self.open_connections += 1
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(error_response(431, "请求头过长"))
+                    break
+                try:
+                    method, target, version, headers = parse_head(head)
+                except ValueError:
+                    writer.write(error_response(400, "请求格式错误"))
+                    break
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                if 'transfer-encoding' in headers:
+                    writer.write(error_response(411, "只支持带 Content-Length 的请求体"))
+                    break
+                try:
+                    length = int(headers.get('content-length', '0'))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_SIZE:
+                    writer.write(error_response(413 if length > 0 else 400, "请求体长度无效"))
+                    break
+                try:
+                    body = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                path = target.split('?', 1)[0]
+                if length > OFFLOAD_BODY_SIZE:
+                    route, status, data, count, elapsed = await loop.run_in_executor(
+                        None, self.handle, method, path, body)
+                else:
+                    route, status, data, count, elapsed = self.handle(method, path, body)
+                # 指标只在事件循环线程中更新
+                self.metrics.setdefault(route, EndpointMetrics()).record(
+                    elapsed, count, len(body), len(data), status != 200)
+                writer.write(response(status, data, keep_alive))
+                # 写缓冲未超过高水位时立即返回, 流水线上的后续请求不必等待前一个响应发送完毕
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.open_connections -= 1
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                    ready: Optional[asyncio.Future] = None) -> None:
+        """监听并一直运行; ready 给出时在开始监听后设为实际的 (地址, 端口)"""
+        server = await asyncio.start_server(self.serve_connection, host, port, limit=MAX_HEADER_SIZE)
+        if ready is not None:
+            ready.set_result(server.sockets[0].getsockname()[:2])
+        async with server:
+            await server.serve_forever()
+
+
+def parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    """解析请求行和请求头, 请求头名称转为小写
+
+    Raises:
+        ValueError: 格式不正确
+    """
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ')
+    if not version.startswith('HTTP/1.'):
+        raise ValueError(version)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, sep, value = line.partition(':')
+            if not sep:
+                raise ValueError(line)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+def error_response(status: int, message: str) -> bytes:
+    """无法继续读取该连接时返回的错误响应, 发送后关闭连接"""
+    return response(status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'), False)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='本地批量解码服务(HTTP/JSON)')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: %(default)s)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口 (默认: %(default)s)')
+    parser.add_argument('--define-file', default='data_define.json', help='config目录下的定义文件名')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    service = DecodeService(VariableSaver(args.define_file))
+    print(f"已加载 {len(service.entries)} 个定义, 监听 http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"无法监听: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""解码结果表格的数据模型
+
+表格只按需读取可见行, 模型本身只保存每个变量的位置和当前值,
+变量定义不变时只更新值并对真正变化的行发出 dataChanged.
+"""
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+# 解码核心逻辑(不依赖Qt)
+import decode_core
+
+
+# 超过该位数的值先转为字节再按字节切片解码, 避免对巨大整数反复移位
+WIDE_BITS = 1024
+
+
+class FieldPlan:
+    """一个变量定义的解码计划, 不依赖Qt, 可在后台线程中创建和使用
+
+    不超过 WIDE_BITS 位的定义逐个变量移位解码, 同一计划解码超过 decode_core.COMPILE_AFTER 次
+    (或该定义已经编译过)后改用编译好的解码函数; 更宽的定义按字节切片解码.
+    """
+
+    def __init__(self, var_info: List[list]):
+        self.var_info = var_info
+        # (变量名, 起始位, 位宽)
+        self.fields: List[tuple] = decode_core.field_offsets(var_info)
+        self.total_bits = max((offset + width for _, offset, width in self.fields), default=0)
+        # 每个变量的含义查找表, 没有含义的变量为None
+        self.tables = decode_core.layout_symbols(var_info)
+        self.compiled: Optional[decode_core.CompiledLayout] = None
+        self.decodes = 0
+        if self.total_bits > WIDE_BITS:
+            self.buffer_decoder = decode_core.BufferDecoder(var_info)
+        else:
+            self.buffer_decoder = None
+            self.compiled = decode_core.cached_layout(var_info)
+            # (起始位, 掩码), 编译前使用
+            self.masks = [(offset, (1 << width) - 1) for _, offset, width in self.fields]
+        # (行号, 含义查找表), 只包含有含义的变量
+        self.symbol_fields = [(row, table) for row, table in enumerate(self.tables) if table is not None]
+        self._delta_index: Optional[decode_core.DeltaIndex] = None
+
+    @property
+    def delta_index(self) -> decode_core.DeltaIndex:
+        """比较相邻值用的 位 -> 变量 索引, 第一次使用时才建立"""
+        if self._delta_index is None:
+            self._delta_index = decode_core.DeltaIndex(self.var_info)
+        return self._delta_index
+
+    def changes(self, old: int, new: int) -> List[decode_core.FieldChange]:
+        """两个值之间变化的变量, 耗时与变化的位数成正比"""
+        return self.delta_index.changes(old, new)
+
+    def values(self, number: int) -> List[int]:
+        """按变量定义顺序计算每个变量的解析值"""
+        if self.compiled is not None:
+            return list(self.compiled.decode(number))
+        if self.buffer_decoder is None:
+            self.decodes += 1
+            if self.decodes > decode_core.COMPILE_AFTER:
+                self.compiled = decode_core.compile_layout(self.var_info)
+                return list(self.compiled.decode(number))
+            return [(number >> offset) & mask for offset, mask in self.masks]
+        nbytes = (self.total_bits + 7) // 8
+        data = (number & ((1 << (nbytes * 8)) - 1)).to_bytes(nbytes, 'little')
+        return self.buffer_decoder.values(data)
+
+    def symbols(self, values: List[int]) -> Dict[int, str]:
+        """有含义的变量: 行号 -> 当前值的含义"""
+        result = {}
+        for row, table in self.symbol_fields:
+            name = table.lookup(values[row])
+            if name is not None:
+                result[row] = name
+        return result
+
+
+class DecodeTableModel(QAbstractTableModel):
+    """变量 | 位宽 | 解析值 | 含义"""
+
+    HEADERS = ['变量', '位宽', '解析值', '含义']
+    VALUE_COLUMN = 2
+    SYMBOL_COLUMN = 3
+    # 单次更新最多发出的 dataChanged 区间数
+    MAX_CHANGED_RANGES = 32
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.var_info: Optional[List[list]] = None
+        self.plan: Optional[FieldPlan] = None
+        # (变量名, 起始位, 位宽)
+        self.fields: List[tuple] = []
+        self.values: List[int] = []
+        # 行号 -> 当前值的含义
+        self.symbols: Dict[int, str] = {}
+        # 最近一次 update 中值发生变化的行数
+        self.last_changed_rows = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.fields)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if column == 0:
+            return self.fields[row][0]
+        if column == 1:
+            return str(self.fields[row][2])
+        if column == self.SYMBOL_COLUMN:
+            return self.symbols.get(row, '')
+        return str(self.values[row])
+
+    def set_layout(self, var_info: List[list], plan: Optional[FieldPlan] = None) -> None:
+        """更换变量定义, 整表重置; plan 为已在后台创建好的解码计划"""
+        self.beginResetModel()
+        self.var_info = var_info
+        self.plan = plan or FieldPlan(var_info)
+        self.fields = self.plan.fields
+        self.values = [0] * len(self.fields)
+        self.symbols = {}
+        self.endResetModel()
+
+    def plan_for(self, var_info: List[list]) -> Optional[FieldPlan]:
+        """变量定义与当前相同时返回当前的解码计划, 供后台任务复用"""
+        if self.plan is not None and (var_info is self.var_info or var_info == self.var_info):
+            return self.plan
+        return None
+
+    def update(self, number: int, var_info: List[list]) -> None:
+        """按新的值刷新表格
+
+        变量定义与上次相同时只比较并更新解析值一列,
+        连续变化的行合并为一个 dataChanged 区间.
+        """
+        plan = self.plan_for(var_info) or FieldPlan(var_info)
+        self.set_values(plan.values(number), var_info, plan)
+
+    def set_values(self, new_values: List[int], var_info: List[list], plan: Optional[FieldPlan] = None) -> None:
+        """显示已经算好的解析值(如后台解码任务的结果), 规则同 update"""
+        if var_info is not self.var_info and var_info != self.var_info:
+            self.set_layout(var_info, plan)
+            self.values = new_values
+            self.symbols = self.plan.symbols(new_values)
+            self.last_changed_rows = len(new_values)
+            return
+
+        old_values = self.values
+        self.values = new_values
+        self.symbols = self.plan.symbols(new_values)
+        self.var_info = var_info
+
+        changed = 0
+        runs = []
+        run_start = None
+        for row, (old, new) in enumerate(zip(old_values, new_values)):
+            if old != new:
+                changed += 1
+                if run_start is None:
+                    run_start = row
+            elif run_start is not None:
+                runs.append((run_start, row - 1))
+                run_start = None
+        if run_start is not None:
+            runs.append((run_start, len(new_values) - 1))
+        self.last_changed_rows = changed
+
+        if len(runs) > self.MAX_CHANGED_RANGES:
+            # 变化过于分散时合并为一个区间, 视图只重绘可见部分, 比逐段通知更快
+            runs = [(runs[0][0], runs[-1][1])]
+        for first_row, last_row in runs:
+            self.emit_value_changed(first_row, last_row)
+
+    def emit_value_changed(self, first_row: int, last_row: int) -> None:
+        # 含义随解析值一起变化
+        self.dataChanged.emit(self.index(first_row, self.VALUE_COLUMN),
+                              self.index(last_row, self.SYMBOL_COLUMN), [Qt.DisplayRole])
+
+
+class DeltaTableModel(QAbstractTableModel):
+    """相邻两个值之间变化的变量: 变量 | 旧值 | 新值 | 含义"""
+
+    HEADERS = ['变量', '旧值', '新值', '含义']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.changes: List[decode_core.FieldChange] = []
+        # 变量序号 -> 含义查找表, 与 changes 来自同一个解码计划
+        self.tables: List[Optional[decode_core.SymbolTable]] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.changes)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        change = self.changes[index.row()]
+        column = index.column()
+        if column == 0:
+            return change.name
+        if column == 1:
+            return str(change.old)
+        if column == 2:
+            return str(change.new)
+        table = self.tables[change.index] if self.tables else None
+        if table is None:
+            return ''
+        old, new = table.lookup(change.old), table.lookup(change.new)
+        return f"{old or change.old} → {new or change.new}" if old or new else ''
+
+    def set_changes(self, changes: List[decode_core.FieldChange], plan: Optional[FieldPlan] = None) -> None:
+        """显示新的变化列表, plan 为产生这些变化的解码计划(用于查找含义)"""
+        self.beginResetModel()
+        self.changes = changes
+        self.tables = plan.tables if plan is not None else []
+        self.endResetModel()
@@ -0,0 +1,269 @@
+"""后台解码/解析任务, 避免在界面线程中执行耗时的数值转换、解码和结构体解析
+
+任务按通道(如 'decode', 'parse')提交到 WorkerPool, 同一通道同时最多运行一个任务:
+新任务提交时正在运行的旧任务被取消, 还没开始的旧任务直接被替换;
+结果带有代数, 回到界面线程后只有最新一代的结果会发出, 乱序或过期的结果被丢弃.
+不同通道、不同页面的任务在共享线程池中并行执行.
+"""
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# 解码核心逻辑(不依赖Qt)
+import decode_core
+# 解码计划, 可在后台线程中创建
+from decode_table_model import FieldPlan
+# 完整的C解析器在第一次解析时才在后台线程中导入, 不占用界面启动时间
+
+# 结构体解析结果: 结构体名, 变量定义, 解析耗时(秒), 总行数, 重新解析的行数
+StructParseResult = namedtuple('StructParseResult', 'name layout elapsed line_count parsed_count')
+# 批量解码结果: 数值列表, 无法解析的片段, 列名, 各列的值(解析值或含义), 含义列在 columns 中的下标, 耗时(秒)
+BulkDecodeResult = namedtuple('BulkDecodeResult', 'values invalid headers columns symbol_columns elapsed')
+# 批量解码时含义列的列名后缀
+SYMBOL_HEADER_SUFFIX = '(含义)'
+
+# 解码结果: 数值, 识别出的进制(都不匹配时为None), 数值标签文本, 变量定义, 解码计划, 各变量解析值, 耗时(秒)
+DecodeResult = namedtuple('DecodeResult', 'number base label layout plan values elapsed')
+
+
+class TaskCancelled(Exception):
+    """任务在运行中被取消"""
+
+
+class WorkerTask(QRunnable):
+    """可取消的后台任务, 子类实现 compute(), 耗时的循环中调用 check_cancelled()"""
+
+    def __init__(self):
+        super().__init__()
+        # 由 WorkerPool 持有引用直到结果回到界面线程
+        self.setAutoDelete(False)
+        self.channel = ''
+        self.generation = 0
+        self.cancelled = False
+        self.done = None
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def compute(self):
+        raise NotImplementedError
+
+    def run(self):
+        result, error = None, ''
+        try:
+            self.check_cancelled()
+            result = self.compute()
+        except TaskCancelled:
+            self.cancelled = True
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        self.done.emit(self.channel, self.generation, result, error)
+
+
+class WorkerPool(QObject):
+    """按通道管理后台任务, 结果通过信号回到界面线程
+
+    Args:
+        thread_pool: 执行任务的线程池, 默认使用全局线程池, 各页面的任务可以并行
+    """
+
+    # 通道, 代数, 结果
+    finished = pyqtSignal(str, int, object)
+    # 通道, 代数, 错误信息
+    failed = pyqtSignal(str, int, str)
+    # 任务线程发出, 排队回到界面线程
+    _done = pyqtSignal(str, int, object, str)
+
+    def __init__(self, thread_pool: Optional[QThreadPool] = None, parent=None):
+        super().__init__(parent)
+        self.thread_pool = thread_pool or QThreadPool.globalInstance()
+        # 通道 -> 最新代数
+        self.generations: Dict[str, int] = {}
+        # 通道 -> 正在运行的任务 / 等待运行的最新任务
+        self.running: Dict[str, WorkerTask] = {}
+        self.pending: Dict[str, WorkerTask] = {}
+        # 统计: 被替换或取消的任务数, 丢弃的过期结果数
+        self.cancelled_count = 0
+        self.stale_count = 0
+        self._done.connect(self.task_done)
+
+    def submit(self, channel: str, task: WorkerTask) -> int:
+        """提交任务并取消同一通道的旧任务, 返回新任务的代数"""
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        task.channel, task.generation, task.done = channel, generation, self._done
+
+        if self.pending.pop(channel, None) is not None:
+            self.cancelled_count += 1
+        running = self.running.get(channel)
+        if running is None:
+            self.start(task)
+        else:
+            # 等正在运行的任务退出后再开始, 同一通道的任务不会并发
+            running.cancel()
+            self.pending[channel] = task
+        return generation
+
+    def cancel(self, channel: str) -> None:
+        """取消通道中的全部任务, 已经在路上的结果也会被丢弃"""
+        self.generations[channel] = self.generations.get(channel, 0) + 1
+        if self.pending.pop(channel, None) is not None:
+            self.cancelled_count += 1
+        running = self.running.get(channel)
+        if running is not None:
+            running.cancel()
+
+    def is_current(self, channel: str, generation: int) -> bool:
+        return self.generations.get(channel) == generation
+
+    def is_busy(self, channel: str) -> bool:
+        return channel in self.running or channel in self.pending
+
+    def start(self, task: WorkerTask) -> None:
+        self.running[task.channel] = task
+        self.thread_pool.start(task)
+
+    def task_done(self, channel: str, generation: int, result, error: str) -> None:
+        task = self.running.pop(channel, None)
+        next_task = self.pending.pop(channel, None)
+        if next_task is not None:
+            self.start(next_task)
+
+        if task is not None and task.cancelled:
+            self.cancelled_count += 1
+            return
+        if not self.is_current(channel, generation):
+            self.stale_count += 1
+            return
+        if error:
+            self.failed.emit(channel, generation, error)
+        else:
+            self.finished.emit(channel, generation, result)
+
+
+class DecodeTask(WorkerTask):
+    """把输入的文本转为数值并按变量定义解码
+
+    Args:
+        layout: 变量定义, None时只转换数值
+        plan: 当前表格使用的解码计划, 变量定义不变时复用
+        number: 不给出 text 时直接解码的数值
+        text: 输入的数字文本
+        bases: 依次尝试的进制, 都转换失败时数值为0
+    """
+
+    def __init__(self, layout: Optional[List[list]], plan: Optional[FieldPlan] = None, number: int = 0,
+                 text: Optional[str] = None, bases: Sequence[int] = ()):
+        super().__init__()
+        self.layout = layout
+        self.plan = plan
+        self.number = number
+        self.text = text
+        self.bases = bases
+
+    def compute(self):
+        start = time.perf_counter()
+        number, used_base = self.number, None
+        if self.text is not None:
+            number = 0
+            for base in self.bases:
+                try:
+                    number, used_base = int(self.text, base), base
+                    break
+                except ValueError:
+                    continue
+            self.check_cancelled()
+        label = number_label(number)
+
+        values = None
+        plan = self.plan
+        if self.layout is not None:
+            if plan is None:
+                plan = FieldPlan(self.layout)
+            self.check_cancelled()
+            values = plan.values(number)
+        return DecodeResult(number, used_base, label, self.layout, plan, values, time.perf_counter() - start)
+
+
+class BulkDecodeTask(WorkerTask):
+    """解析粘贴的一批数字并一次性按列解码
+
+    Args:
+        text: 粘贴的文本, 数字以空白、逗号或分号分隔
+        layout: 变量定义
+    """
+
+    def __init__(self, text: str, layout: List[list]):
+        super().__init__()
+        self.text = text
+        self.layout = layout
+
+    def compute(self):
+        start = time.perf_counter()
+        values, invalid = decode_core.parse_numbers(self.text)
+        fields = decode_core.field_offsets(self.layout)
+        tables = decode_core.layout_symbols(self.layout)
+        headers = []
+        columns = []
+        symbol_columns = {}
+        # 每列一次列表推导, 重名变量也各占一列; 有含义的变量后面紧跟一列含义
+        for (name, offset, width), table in zip(fields, tables):
+            self.check_cancelled()
+            mask = (1 << width) - 1
+            column = [(value >> offset) & mask for value in values]
+            headers.append(name)
+            columns.append(column)
+            if table is not None:
+                symbol_columns[len(columns)] = table
+                headers.append(name + SYMBOL_HEADER_SUFFIX)
+                columns.append(table.column(column))
+        return BulkDecodeResult(values, invalid, headers, columns, symbol_columns, time.perf_counter() - start)
+
+
+def number_label(number: int) -> str:
+    """数值标签文本, 十进制位数超过解释器限制时只显示16进制"""
+    try:
+        return f"DEC: {number} | HEX: 0x{number:X}"
+    except ValueError:
+        return f"DEC: ({number.bit_length()}位) | HEX: 0x{number:X}"
+
+
+class StructParseTask(WorkerTask):
+    """解析结构体定义, 同一页面的解析在同一通道中按顺序执行, 增量解析器不会被并发使用"""
+
+    def __init__(self, parser: decode_core.IncrementalStructParser, c_code: str):
+        super().__init__()
+        self.parser = parser
+        self.c_code = c_code
+
+    def compute(self):
+        import c_struct_parser
+
+        start = time.perf_counter()
+        result = None
+        if c_struct_parser.needs_full_parser(self.c_code):
+            result = self.parse_full()
+        if result is None:
+            self.check_cancelled()
+            name = decode_core.get_struct_name(self.c_code)
+            layout = self.parser.parse(self.c_code)
+            result = StructParseResult(name, layout, 0.0, self.parser.last_line_count, self.parser.last_parsed_count)
+        return result._replace(elapsed=time.perf_counter() - start)
+
+    def parse_full(self):
+        """用完整的C解析器解析嵌套结构体/联合体/数组/宏, 解析失败时返回None退回逐行解析"""
+        import c_struct_parser
+
+        line_count = self.c_code.count('\n') + 1
+        cached = c_struct_parser.is_cached(self.c_code)
+        try:
+            name, layout, _ = c_struct_parser.parse_layout(self.c_code)
+        except c_struct_parser.CParseError:
+            return None
+        return StructParseResult(name, layout, 0.0, line_count, 0 if cached else line_count)
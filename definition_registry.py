@@ -0,0 +1,108 @@
+"""进程内共享的变量定义注册表
+
+所有解码页和数据管理页共用同一个注册表: 定义文件只在第一次使用时读取一次,
+保存/删除后通过信号把增量变化推送给所有订阅的界面, 并监视定义文件被外部修改.
+"""
+import os
+from typing import Dict, List, Optional
+
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+# 变量定义存取
+from variable_saver import VariableSaver
+
+# 文件变化后等待多久(毫秒)再重新读取, 合并一次保存产生的多个通知
+RELOAD_DELAY_MS = 100
+
+
+class DefinitionRegistry(QObject):
+    """变量定义注册表, 持有解析后的全部定义
+
+    信号参数为定义名, 订阅者收到信号后通过 get() 读取最新内容.
+    """
+
+    added = pyqtSignal(str)
+    updated = pyqtSignal(str)
+    removed = pyqtSignal(str)
+
+    # 定义文件名 -> 注册表
+    _instances: Dict[str, "DefinitionRegistry"] = {}
+
+    @classmethod
+    def instance(cls, file_path: str = "data_define.json") -> "DefinitionRegistry":
+        """返回指定定义文件(config目录下)的共享注册表"""
+        registry = cls._instances.get(file_path)
+        if registry is None:
+            registry = cls._instances[file_path] = cls(file_path)
+        return registry
+
+    def __init__(self, file_path: str = "data_define.json", parent=None):
+        super().__init__(parent)
+        self.saver = VariableSaver(file_path)
+        # 定义名 -> 变量定义, 保持文件中的顺序
+        self.definitions: Dict[str, list] = dict(self.saver.load())
+        # 重新读取文件的次数, 用于确认打开多个页面时没有重复读取
+        self.reload_count = 0
+
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reload)
+        # 同时监视文件和所在目录: 原子替换写入后文件监视会失效, 文件新建时也只有目录会收到通知
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.file_changed)
+        self.watcher.directoryChanged.connect(self.file_changed)
+        directory = os.path.dirname(self.saver.file_path)
+        if os.path.isdir(directory):
+            self.watcher.addPath(directory)
+        self.watch_file()
+
+    def watch_file(self) -> None:
+        if os.path.exists(self.saver.file_path) and self.saver.file_path not in self.watcher.files():
+            self.watcher.addPath(self.saver.file_path)
+
+    def names(self) -> List[str]:
+        return list(self.definitions)
+
+    def get(self, name: str) -> Optional[list]:
+        return self.definitions.get(name)
+
+    def save(self, name: str, data: list) -> None:
+        """保存定义并通知所有订阅者"""
+        self.saver.save(name, data)
+        is_new = name not in self.definitions
+        self.definitions[name] = data
+        (self.added if is_new else self.updated).emit(name)
+
+    def delete(self, *names: str) -> List[str]:
+        """删除定义并通知所有订阅者, 返回实际删除的名称"""
+        existing = [name for name in names if name in self.definitions]
+        if not existing:
+            return []
+        self.saver.delete(*existing)
+        for name in existing:
+            del self.definitions[name]
+            self.removed.emit(name)
+        return existing
+
+    def file_changed(self, path: str) -> None:
+        self.watch_file()
+        self.reload_timer.start()
+
+    def reload(self) -> None:
+        """重新读取定义文件, 与内存中的定义比较后只发出变化部分的信号
+
+        自己写入的内容在保存时已经更新到内存, 重新读取后没有差异, 不会重复通知.
+        """
+        self.reload_count += 1
+        old = self.definitions
+        new = dict(self.saver.load()) if self.saver.store.exists() else {}
+        self.definitions = new
+        for name in old:
+            if name not in new:
+                self.removed.emit(name)
+        for name, data in new.items():
+            if name not in old:
+                self.added.emit(name)
+            elif old[name] != data:
+                self.updated.emit(name)
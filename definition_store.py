@@ -0,0 +1,280 @@
+"""变量定义的存储后端, 不依赖PyQt5
+
+JsonDefinitionStore: 原有的JSON文件格式, 写入时先写临时文件再原子替换.
+SqliteDefinitionStore: SQLite数据库, 按名称建主键索引, 单个定义的读写为O(log n), 写入在事务中完成.
+
+用法:
+    python definition_store.py convert config/data_define.json config/data_define.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# 使用SQLite后端的文件扩展名
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def _copy_json(value):
+    """复制由 json.load 得到的嵌套列表/字典, 比 copy.deepcopy 快; 字符串和数字不可变, 直接共享"""
+    if type(value) is list:
+        return [_copy_json(item) if type(item) in (list, dict) else item for item in value]
+    if type(value) is dict:
+        return {key: _copy_json(item) if type(item) in (list, dict) else item for key, item in value.items()}
+    return value
+
+
+class DefinitionStore:
+    """存储后端接口, 所有定义都以 名称 -> 二维列表 的形式存取"""
+
+    def exists(self) -> bool:
+        raise NotImplementedError
+
+    def get(self, name: str) -> Optional[list]:
+        raise NotImplementedError
+
+    def put(self, name: str, data: list) -> None:
+        self.put_many({name: data})
+
+    def put_many(self, items: Dict[str, list]) -> None:
+        raise NotImplementedError
+
+    def remove(self, names: Iterable[str]) -> List[str]:
+        """删除定义, 返回实际删除的名称"""
+        raise NotImplementedError
+
+    def names(self) -> List[str]:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        return len(self.names())
+
+    def load_all(self) -> Dict[str, list]:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonDefinitionStore(DefinitionStore):
+    """JSON文件后端
+
+    解析后的文件内容按路径缓存在内存中, 被所有实例共享,
+    只有文件的修改时间或大小变化时才重新读取. 读出和写入的定义都是副本,
+    调用方修改返回值或写入后继续修改传入的列表, 都不会影响缓存.
+    """
+
+    # 文件绝对路径 -> ((修改时间, 大小), 解析后的内容)
+    _cache: Dict[str, tuple] = {}
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        # 缓存命中/未命中计数
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cache_path(self) -> str:
+        return os.path.abspath(self.file_path)
+
+    def _file_stamp(self) -> Optional[tuple]:
+        """返回文件的 (修改时间, 大小), 文件不存在时返回None"""
+        try:
+            st = os.stat(self.file_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load_cached(self) -> Dict[str, list]:
+        """读取文件内容, 文件未变化时直接返回缓存(调用方不得修改返回值)"""
+        stamp = self._file_stamp()
+        if stamp is None:
+            JsonDefinitionStore._cache.pop(self._cache_path(), None)
+            return {}
+
+        cached = JsonDefinitionStore._cache.get(self._cache_path())
+        if cached is not None and cached[0] == stamp:
+            self.cache_hits += 1
+            return cached[1]
+
+        self.cache_misses += 1
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                loaded_data = json.load(f)
+        except Exception as e:
+            print(f"加载文件时出错: {e}")
+            return {}
+        JsonDefinitionStore._cache[self._cache_path()] = (stamp, loaded_data)
+        return loaded_data
+
+    def _write(self, data: Dict[str, list]) -> None:
+        """先写同目录下的临时文件再原子替换, 写入中途崩溃不会损坏原文件"""
+        directory = os.path.dirname(self.file_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directory)
+        try:
+            # mkstemp 创建的文件只有属主可读写, 沿用原文件的权限
+            try:
+                mode = stat.S_IMODE(os.stat(self.file_path).st_mode)
+            except OSError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # 写文件后刷新缓存, 避免下次读取时重新解析自己刚写入的内容
+        stamp = self._file_stamp()
+        if stamp is not None:
+            JsonDefinitionStore._cache[self._cache_path()] = (stamp, data)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.file_path)
+
+    def get(self, name: str) -> Optional[list]:
+        return _copy_json(self._load_cached().get(name))
+
+    def put_many(self, items: Dict[str, list]) -> None:
+        data = dict(self._load_cached())
+        data.update(_copy_json(dict(items)))
+        self._write(data)
+
+    def remove(self, names: Iterable[str]) -> List[str]:
+        data = dict(self._load_cached())
+        removed = [name for name in names if data.pop(name, None) is not None]
+        if removed:
+            self._write(data)
+        return removed
+
+    def names(self) -> List[str]:
+        return list(self._load_cached().keys())
+
+    def count(self) -> int:
+        return len(self._load_cached())
+
+    def load_all(self) -> Dict[str, list]:
+        return _copy_json(self._load_cached())
+
+    def write_all(self, data: Dict[str, list]) -> None:
+        """用给定内容整体替换文件"""
+        self._write(_copy_json(dict(data)))
+
+    def clear(self) -> None:
+        self._write({})
+
+
+class SqliteDefinitionStore(DefinitionStore):
+    """SQLite后端, 每个定义一行, 内容以JSON文本保存"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.file_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS definitions ('
+                         'name TEXT PRIMARY KEY, data TEXT NOT NULL)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def exists(self) -> bool:
+        return os.path.exists(self.file_path)
+
+    def get(self, name: str) -> Optional[list]:
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT data FROM definitions WHERE name = ?', (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, items: Dict[str, list]) -> None:
+        rows = [(name, json.dumps(data, ensure_ascii=False)) for name, data in items.items()]
+        with self._lock, self._connect() as conn:
+            # 保留原有行号, 这样 names() 的顺序与首次保存的顺序一致
+            conn.executemany('INSERT INTO definitions (name, data) VALUES (?, ?) '
+                             'ON CONFLICT(name) DO UPDATE SET data = excluded.data', rows)
+
+    def remove(self, names: Iterable[str]) -> List[str]:
+        removed = []
+        with self._lock, self._connect() as conn:
+            for name in names:
+                if conn.execute('DELETE FROM definitions WHERE name = ?', (name,)).rowcount:
+                    removed.append(name)
+        return removed
+
+    def names(self) -> List[str]:
+        with self._lock:
+            rows = self._connect().execute('SELECT name FROM definitions ORDER BY rowid').fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM definitions').fetchone()[0]
+
+    def load_all(self) -> Dict[str, list]:
+        with self._lock:
+            rows = self._connect().execute('SELECT name, data FROM definitions ORDER BY rowid').fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM definitions')
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def open_store(file_path: str) -> DefinitionStore:
+    """按扩展名选择存储后端"""
+    if file_path.lower().endswith(SQLITE_SUFFIXES):
+        return SqliteDefinitionStore(file_path)
+    return JsonDefinitionStore(file_path)
+
+
+def convert(src_path: str, dst_path: str) -> int:
+    """在两种格式之间导入/导出全部定义, 返回定义数量"""
+    src = open_store(src_path)
+    dst = open_store(dst_path)
+    try:
+        data = src.load_all()
+        dst.put_many(data)
+        return len(data)
+    finally:
+        src.close()
+        dst.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='变量定义存储格式转换')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('convert', help='把源文件中的全部定义导入目标文件(按扩展名识别JSON/SQLite)')
+    p.add_argument('src')
+    p.add_argument('dst')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        count = convert(args.src, args.dst)
+        print(f"已导入 {count} 个定义: {args.src} -> {args.dst}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""命令行生成测试向量: 按已保存的变量定义把变量值组装成错误码, 不启动Qt
+
+用法:
+    python encode_cli.py <定义名> --exhaustive [--vary a,b] [--set c=1] -o vectors.bin
+    python encode_cli.py <定义名> --random 1000000 [--seed 1] --format csv -o vectors.csv
+    python encode_cli.py <定义名> --random 1000000 --check > /dev/null
+
+--exhaustive 按变量值的所有组合依次生成(第一个变量变化最快), --random 为每个变量取均匀随机值;
+--set 固定的变量和 --vary 之外的变量取固定值(默认0). 结果按批流式写出, 内存占用与向量数量无关.
+"""
+import argparse
+import random
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import decode_core
+from decode_cli import load_layout, write_rows
+
+# 每批生成的向量数量
+BATCH_SIZE = 65536
+# 不指定 --count 时穷举允许的最多组合数
+MAX_EXHAUSTIVE = 1 << 32
+
+
+def parse_assignments(items: List[str]) -> Dict[str, int]:
+    """解析 --set 的 `变量名=值` 列表, 值的进制规则同界面输入框
+
+    Raises:
+        ValueError: 格式不对或值无法解析
+    """
+    values = {}
+    for item in items:
+        name, sep, value = item.partition('=')
+        if not sep or not name:
+            raise ValueError(f"应为 变量名=值: {item}")
+        values[name] = decode_core.parse_number(value)
+    return values
+
+
+def unique_fields(layout: List[list]) -> List[Tuple[str, int]]:
+    """(变量名, 位宽), 重名变量只保留第一个"""
+    fields = {}
+    for var in layout:
+        fields.setdefault(var[0], var[1])
+    return list(fields.items())
+
+
+def iter_exhaustive(fields: List[Tuple[str, int]], fixed: Dict[str, int], start: int = 0,
+                    count: Optional[int] = None, batch_size: int = BATCH_SIZE) -> Iterator[Dict[str, list]]:
+    """按组合序号依次产出各变量的值, 每批一个 变量名 -> 列 的字典
+
+    第 k 个组合中各变量的值就是 k 的二进制按变量位宽切开, 第一个变量在最低位, 因此不需要逐层嵌套循环.
+
+    Args:
+        fields: 参与穷举的 (变量名, 位宽)
+        fixed: 固定取值的变量
+        start: 起始组合序号
+        count: 最多产出的组合数, None为全部
+    """
+    total = 1 << sum(width for _, width in fields)
+    end = total if count is None else min(total, start + count)
+    np = _numpy() if total <= 1 << 64 else None
+    shifts = []
+    shift = 0
+    for name, width in fields:
+        shifts.append((name, shift, (1 << width) - 1))
+        shift += width
+
+    for batch_start in range(start, end, batch_size):
+        batch_end = min(batch_start + batch_size, end)
+        size = batch_end - batch_start
+        if np is not None:
+            index = np.arange(size, dtype=np.uint64) + np.uint64(batch_start)
+            columns = {name: (index >> np.uint64(shift)) & np.uint64(mask) for name, shift, mask in shifts}
+            columns.update({name: _constant(np, value, size) for name, value in fixed.items()})
+        else:
+            index = range(batch_start, batch_end)
+            columns = {name: [(k >> shift) & mask for k in index] for name, shift, mask in shifts}
+            columns.update({name: [value] * size for name, value in fixed.items()})
+        yield columns
+
+
+def iter_random(fields: List[Tuple[str, int]], fixed: Dict[str, int], count: int, seed: Optional[int] = None,
+                batch_size: int = BATCH_SIZE) -> Iterator[Dict[str, list]]:
+    """为每个变量产出均匀随机值, 每批一个 变量名 -> 列 的字典
+
+    相同种子产出相同的序列; 每批总是生成 batch_size 个再截取, 因此数量少的序列是数量多的序列的前缀.
+    """
+    np = _numpy() if all(width <= 64 for _, width in fields) else None
+    if np is not None:
+        rng = np.random.default_rng(seed)
+    else:
+        rng = random.Random(seed)
+    for batch_start in range(0, count, batch_size):
+        size = min(batch_size, count - batch_start)
+        if np is not None:
+            columns = {name: rng.integers(0, (1 << width) - 1, batch_size, dtype=np.uint64, endpoint=True)[:size]
+                       for name, width in fields}
+            columns.update({name: _constant(np, value, size) for name, value in fixed.items()})
+        else:
+            columns = {name: [rng.getrandbits(width) for _ in range(batch_size)][:size] for name, width in fields}
+            columns.update({name: [value] * size for name, value in fixed.items()})
+        yield columns
+
+
+def _numpy():
+    """numpy为可选依赖, 没有安装时退回到Python整数列表"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _constant(np, value: int, size: int):
+    """固定取值的一列, 超过64位的值只能用Python整数列表"""
+    return np.full(size, value, dtype=np.uint64) if value >> 64 == 0 else [value] * size
+
+
+def check_round_trip(words, columns: Dict[str, list], layout: List[list]) -> int:
+    """用解码器解回每个变量并与输入比较, 返回不一致的向量数
+
+    被后面的变量(联合体)覆盖了部分位的变量无法解回原值, 不参与比较.
+    """
+    fields = decode_core.field_offsets(layout)
+    np = sys.modules.get('numpy')
+    vectorized = np is not None and isinstance(words, np.ndarray)
+    bad = np.zeros(len(words), dtype=bool) if vectorized else set()
+    for i, (name, offset, width) in enumerate(fields):
+        if name not in columns:
+            continue
+        bits = ((1 << width) - 1) << offset
+        if any(bits & (((1 << w) - 1) << o) for _, o, w in fields[i + 1:]):
+            continue
+        actual = decode_core.decode_batch(words, [[name, width, offset]])[name]
+        expected = columns[name]
+        if vectorized:
+            bad |= actual != np.asarray(expected).astype(actual.dtype, copy=False)
+        else:
+            bad.update(k for k, (a, e) in enumerate(zip(actual, expected)) if a != e)
+    return int(bad.sum()) if vectorized else len(bad)
+
+
+class VectorWriter:
+    """把编码结果按批写出
+
+    Args:
+        out: 二进制输出流
+        fmt: bin 为每个向量 word_size 字节, hex 为每行一个 0x..., csv/jsonl 为原始值和各变量值
+        word_size: bin 格式每个向量的字节数
+        byteorder: bin 格式的字节序
+        header: csv/jsonl 的变量列名
+    """
+
+    def __init__(self, out, fmt: str, word_size: int, byteorder: str = 'little', header: List[str] = ()):
+        self.out = out
+        self.fmt = fmt
+        self.word_size = word_size
+        self.byteorder = byteorder
+        self.header = ['value'] + list(header)
+        self.count = 0
+        np = _numpy()
+        self.dtype = None
+        if np is not None and word_size in (1, 2, 4, 8):
+            self.dtype = np.dtype(f"{'<' if byteorder == 'little' else '>'}u{word_size}")
+        if fmt in ('csv', 'jsonl'):
+            import io
+            self.text = io.TextIOWrapper(out, encoding='utf-8', newline='', write_through=True)
+
+    def write(self, words, columns: Dict[str, list]) -> None:
+        if self.fmt == 'bin' and self.dtype is not None and hasattr(words, 'dtype'):
+            # 整块转换字节序后直接写出
+            self.out.write(words.astype(self.dtype, copy=False).tobytes())
+            self.count += len(words)
+            return
+        values = words.tolist() if hasattr(words, 'tolist') else words
+        if self.fmt == 'bin':
+            size, order = self.word_size, self.byteorder
+            self.out.write(b''.join([word.to_bytes(size, order) for word in values]))
+        elif self.fmt == 'hex':
+            self.out.write(''.join([f"0x{word:X}\n" for word in values]).encode('ascii'))
+        else:
+            data = [column.tolist() if hasattr(column, 'tolist') else column
+                    for column in (columns[name] for name in self.header[1:])]
+            rows = ([f"0x{word:X}"] + [column[i] for column in data] for i, word in enumerate(values))
+            write_rows(rows, self.header, self.fmt, self.text, write_header=self.count == 0)
+        self.count += len(words)
+
+    def close(self) -> None:
+        if self.fmt in ('csv', 'jsonl'):
+            if self.count == 0 and self.fmt == 'csv':
+                write_rows(iter(()), self.header, self.fmt, self.text)
+            self.text.detach()
+        self.out.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='按已保存的变量定义生成测试向量(变量值 -> 错误码)')
+    parser.add_argument('layout', help='config/data_define.json 中保存的定义名')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--exhaustive', action='store_true', help='穷举参与变量的所有取值组合')
+    mode.add_argument('--random', type=int, metavar='N', help='生成N个随机向量')
+    parser.add_argument('--vary', default='', help='参与穷举/随机的变量, 逗号分隔, 默认为 --set 之外的全部变量')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='固定变量的取值, 可指定多次; 未参与且未固定的变量为0')
+    parser.add_argument('--count', type=int, help='穷举时最多生成的组合数')
+    parser.add_argument('--start', type=int, default=0, help='穷举的起始组合序号, 用于分段生成 (默认: %(default)s)')
+    parser.add_argument('--seed', type=int, help='随机种子, 相同种子生成相同的向量')
+    parser.add_argument('--format', choices=['bin', 'hex', 'csv', 'jsonl'], default='bin',
+                        help='bin为定长二进制字, hex为每行一个16进制数, csv/jsonl带各变量值 (默认: %(default)s)')
+    parser.add_argument('--word-size', type=int, default=0,
+                        help='bin格式每个向量的字节数, 0为按定义总位宽取整 (默认: %(default)s)')
+    parser.add_argument('--byteorder', choices=['little', 'big'], default='little', help='bin格式的字节序')
+    parser.add_argument('-o', '--output', help='输出文件, 默认stdout')
+    parser.add_argument('--check', action='store_true', help='每批编码后用解码器解回并与输入比较')
+    parser.add_argument('--define-file', default='data_define.json', help='config目录下的定义文件名')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    layout = load_layout(args.layout, args.define_file)
+    if not layout:
+        print(f"未找到变量定义: {args.layout}", file=sys.stderr)
+        return 1
+    fields = unique_fields(layout)
+    widths = dict(fields)
+    try:
+        fixed = parse_assignments(args.set)
+    except ValueError as e:
+        print(f"--set 有误: {e}", file=sys.stderr)
+        return 1
+    vary = [name.strip() for name in args.vary.split(',') if name.strip()] or \
+        [name for name, _ in fields if name not in fixed]
+    unknown = [name for name in list(fixed) + vary if name not in widths]
+    if unknown:
+        print(f"定义中没有变量: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    for name, width in fields:
+        if width <= 0:
+            print(f"变量 {name} 的位宽 {width} 无效", file=sys.stderr)
+            return 1
+    for name, value in fixed.items():
+        if not 0 <= value < 1 << widths[name]:
+            print(f"变量 {name} 的值 {value} 超出 {widths[name]} 位的范围", file=sys.stderr)
+            return 1
+    varied = [(name, widths[name]) for name in dict.fromkeys(vary) if name not in fixed]
+
+    total_bits = decode_core.layout_bits(layout)
+    word_size = args.word_size or max(1, (total_bits + 7) // 8)
+    if args.format == 'bin' and word_size * 8 < total_bits:
+        print(f"--word-size {word_size} 字节放不下 {total_bits} 位的定义", file=sys.stderr)
+        return 1
+
+    if args.exhaustive:
+        total = 1 << sum(width for _, width in varied)
+        if args.count is None and total - args.start > MAX_EXHAUSTIVE:
+            print(f"共 {total} 种组合, 请用 --count 限制数量或用 --vary 减少参与的变量", file=sys.stderr)
+            return 1
+        batches = iter_exhaustive(varied, fixed, args.start, args.count)
+    else:
+        batches = iter_random(varied, fixed, args.random, args.seed)
+
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    # csv/jsonl 只输出参与或固定的变量
+    header = [name for name, _ in fields if name in fixed or name in vary]
+    writer = VectorWriter(out, args.format, word_size, args.byteorder, header)
+    mismatched = 0
+    try:
+        for columns in batches:
+            words = decode_core.encode_batch(columns, layout)
+            if args.check:
+                mismatched += check_round_trip(words, columns, layout)
+            writer.write(words, columns)
+        writer.close()
+    except BrokenPipeError:
+        return 0
+    finally:
+        if args.output:
+            out.close()
+    print(f"共生成 {writer.count} 个向量", file=sys.stderr)
+    if args.check:
+        print(f"往返校验: {mismatched} 个不一致", file=sys.stderr)
+        return 1 if mismatched else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,30 @@
 
 
-from PyQt5.QtWidgets import  QFrame
-import re
-from PyQt5.QtWidgets import  QTableWidget, QTableWidgetItem
+import time
+
+from PyQt5.QtCore import QRect, QTimer
+from PyQt5.QtWidgets import  QFrame, QHeaderView
 from PyQt5.QtGui import QFont
+from qfluentwidgets import SegmentedWidget, TableView
 
-from qfluentwidgets import TableWidget
 # 导入UI界面
 from  Ui_ErrorDecode import Ui_ErrorDecode
 # 搞个循环队列
 from collections import deque
 
-# 变量定义存取
-from data_define_manager import VariableSaver
+# 共享的变量定义注册表
+from definition_registry import DefinitionRegistry
+# 解码核心逻辑(不依赖Qt)
+import decode_core
+# 后台解码/解析任务
+from decode_worker import DecodeTask, StructParseTask, WorkerPool, number_label
+# 解码结果表格模型
+from decode_table_model import DecodeTableModel, DeltaTableModel
+# 实时数据源
+import stream_decode
+
+# 变量定义输入停止多久(毫秒)后才开始解析
+STRUCT_PARSE_DEBOUNCE_MS = 150
 class ErrorDecode(QFrame, Ui_ErrorDecode):
     def __init__(self, text: str, objectName, parent=None):
         super().__init__(parent=parent)
@@ -23,6 +35,22 @@ class ErrorDecode(QFrame, Ui_ErrorDecode):
         self.circular_queue = deque(maxlen=6)        
         self.data_define_name = 'data_define'
         
+        # 数值转换/解码和结构体解析都在后台线程中执行, 输入变化时取消旧任务, 过期的结果按代数丢弃;
+        # 每个通道的任务按顺序执行, 不同通道和不同标签页的任务可以并行
+        self.workers = WorkerPool(parent=self)
+        self.workers.finished.connect(self.work_finished)
+        self.workers.failed.connect(self.work_failed)
+
+        # 结构体解析: 输入防抖 + 按行增量解析 + 后台线程执行
+        self.struct_parser = decode_core.IncrementalStructParser()
+        self.parse_edit_time = None
+        # 最近的解析耗时记录(毫秒): (解析耗时, 从输入到显示的耗时)
+        self.parse_latencies = deque(maxlen=100)
+        self.parse_timer = QTimer(self)
+        self.parse_timer.setSingleShot(True)
+        self.parse_timer.setInterval(STRUCT_PARSE_DEBOUNCE_MS)
+        self.parse_timer.timeout.connect(self.struct_analyze)
+        
         # 初始化按钮
         self.lineEdit_input_num.setClearButtonEnabled(True)
         
@@ -30,56 +58,111 @@ class ErrorDecode(QFrame, Ui_ErrorDecode):
         font = QFont("Arial", 14)
         self.label_num.setFont(font)
         
-        # 初始化表格
+        # 初始化表格: 数据模型只提供可见行, 固定行高避免逐行计算尺寸
+        self.table_model = DecodeTableModel(self)
+        self.widget_table.setModel(self.table_model)
         self.widget_table.setBorderVisible(True)
         self.widget_table.setBorderRadius(8)
         self.widget_table.setWordWrap(False)
-        self.widget_table.setRowCount(6)
-        self.widget_table.setColumnCount(4)
         self.widget_table.setColumnWidth(0,240)
-        self.widget_table.setItem(0, 0, QTableWidgetItem('变量'))
-        self.widget_table.setItem(0, 1, QTableWidgetItem('位宽'))
-        self.widget_table.setItem(0, 2, QTableWidgetItem('解析值'))
+        self.widget_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.widget_table.horizontalHeader().setStretchLastSection(True)
+
+        # 变化表格: 与上一个值相比变化的变量, 与解码表格在同一位置, 通过分段按钮切换
+        self.delta_model = DeltaTableModel(self)
+        self.widget_delta_table = TableView(self)
+        self.widget_delta_table.setGeometry(self.widget_table.geometry())
+        self.widget_delta_table.setModel(self.delta_model)
+        self.widget_delta_table.setBorderVisible(True)
+        self.widget_delta_table.setBorderRadius(8)
+        self.widget_delta_table.setWordWrap(False)
+        self.widget_delta_table.setColumnWidth(0,180)
+        self.widget_delta_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.widget_delta_table.horizontalHeader().setStretchLastSection(True)
+        self.widget_delta_table.hide()
+        self.segmented_view = SegmentedWidget(self)
+        self.segmented_view.addItem('decode', '解析值', lambda: self.view_switch(False))
+        self.segmented_view.addItem('delta', '变化', lambda: self.view_switch(True))
+        self.segmented_view.setCurrentItem('decode')
+        self.segmented_view.setGeometry(QRect(490, 40, 200, 32))
         
-        # 初始化json文件
-        self.saver = VariableSaver("data_define.json")
+        # 所有页面共用一个注册表, 定义文件只读取一次, 其它页面保存/删除后自动同步
+        self.registry = DefinitionRegistry.instance("data_define.json")
+        self.saver = self.registry.saver
+        self.registry.added.connect(self.data_define_added)
+        self.registry.updated.connect(self.data_define_updated)
+        self.registry.removed.connect(self.data_define_removed)
         
         # 初始化列表
-        json_data_defines  = self.saver.list_variables()
+        json_data_defines  = self.registry.names()
         if  len(json_data_defines) > 0:
             self.comboBox_data_define.addItems(json_data_defines)
             self.data_define_load()
             
         # 初始化信号与槽
         self.lineEdit_input_num.textChanged.connect(self.num_analyze)
+        # 输入框中输入 tcp:// udp:// pipe:// 数据源后按回车开始实时解码
+        self.lineEdit_input_num.returnPressed.connect(self.stream_start)
+        self.stream = None
+        self.stream_words = 0
+        self.stream_log_time = 0.0
         self.lineEdit_data_define_name.textChanged.connect(self.name_analyze)
-        self.textEdit_data_struct.textChanged.connect(self.struct_analyze)
+        self.textEdit_data_struct.textChanged.connect(self.struct_changed)
         self.pushButton.clicked.connect(self.data_define_save)
         self.comboBox_data_define.currentTextChanged.connect(self.data_define_load)
 
     def data_define_load(self):
         self.data_define_name = self.comboBox_data_define.currentText()
-        self.assigned_values = self.saver.load_single(self.data_define_name)
+        self.assigned_values = self.registry.get(self.data_define_name)
         self.log('数据定义已加载')
         self.decode()
     def data_define_save(self):
         if self.assigned_values is not None and len(self.assigned_values) > 0:
             self.log('变量定义名:'+self.data_define_name)
-            self.saver.save(self.data_define_name, self.assigned_values)
+            self.registry.save(self.data_define_name, self.assigned_values)
+    def data_define_added(self, name):
+        # 列表为空时添加第一项会自动选中并加载
+        self.comboBox_data_define.addItem(name)
+    def data_define_updated(self, name):
+        # 当前选中的定义被修改时重新加载
+        if name == self.comboBox_data_define.currentText() and self.registry.get(name) != self.assigned_values:
+            self.data_define_load()
+    def data_define_removed(self, name):
+        index = self.comboBox_data_define.findText(name)
+        if index >= 0:
+            self.comboBox_data_define.removeItem(index)
+    def struct_changed(self):
+        # 记录这一轮连续输入的第一次修改时间, 用于统计从输入到显示的耗时
+        if not self.parse_timer.isActive():
+            self.parse_edit_time = time.perf_counter()
+        self.parse_timer.start()
     def struct_analyze(self):
+        # 提交到后台解析, 旧的结果回来时按代数丢弃
         c_code = self.textEdit_data_struct.toPlainText()
+        self.workers.submit('parse', StructParseTask(self.struct_parser, c_code))
+    def work_finished(self, channel, generation, result):
+        if channel == 'parse':
+            self.struct_parsed(result)
+        elif channel == 'decode':
+            self.decoded(result)
+    def work_failed(self, channel, generation, error):
+        self.log(('解析' if channel == 'parse' else '解码') + f'出错: {error}')
+    def struct_parsed(self, result):
         input_name = self.lineEdit_data_define_name.text()
         if input_name  == '' :
-            analyze_name = self.get_struct_name(c_code)
-            self.data_define_name = analyze_name
+            self.data_define_name = result.name
             self.lineEdit_data_define_name.setText(self.data_define_name)
         else  :
             self.data_define_name = input_name
             
-        data_define = self.strip_external_braces(c_code)
-        self.assigned_values = self.parse_variable_definitions(data_define)
-        self.log('数据类型已更新')
+        self.assigned_values = result.layout
         self.decode()
+        
+        parse_ms = result.elapsed * 1000
+        total_ms = (time.perf_counter() - self.parse_edit_time) * 1000 if self.parse_edit_time else parse_ms
+        self.parse_latencies.append((parse_ms, total_ms))
+        self.log(f'数据类型已更新: 解析{parse_ms:.1f}ms, 重新解析{result.parsed_count}/{result.line_count}行, '
+                 f'输入到显示{total_ms:.0f}ms')
 
     def name_analyze(self):
         input_name = self.lineEdit_data_define_name.text()
@@ -89,124 +172,116 @@ class ErrorDecode(QFrame, Ui_ErrorDecode):
     def num_analyze(self):
         # 去除前后空格
         num_str = self.lineEdit_input_num.text().strip()
+        # 修改输入后停止实时解码
+        self.stream_stop()
+        if stream_decode.is_stream_url(num_str):
+            self.workers.cancel('decode')
+            self.log('按回车开始实时解码')
+            return
          
-        # 检查是否以0x开头或者包含十六进制字符（a-f, A-F）
+        # 检查是否以0x开头或者包含十六进制字符（a-f, A-F）, 16进制转换失败时再按10进制转换
         hex_chars = set('abcdefABCDEF')
-        if any(c in hex_chars for c in num_str) or (num_str.startswith('0x') or num_str.startswith('0X')):
-            try:
-                self.log('检测为16进制数据')
-                self.number = int(num_str, 16)
-                self.decode()
-                self.label_num.setText(f"DEC: {self.number} | HEX: 0x{self.number:X}")
-                return
-            except ValueError:
-                pass
-        
-        # 默认为十进制
         num_chars = set('0123456789')
-        if any(c in num_chars for c in num_str):
-            try:
-                self.log('检测为10进制数据')
-                self.number = int(num_str, 10)
-                self.decode()
-            except ValueError:
-                self.number = 0
+        if not hex_chars.isdisjoint(num_str) or (num_str.startswith('0x') or num_str.startswith('0X')):
+            self.log('检测为16进制数据')
+            bases = (16, 10)
+        elif not num_chars.isdisjoint(num_str):
+            # 默认为十进制
+            self.log('检测为10进制数据')
+            bases = (10,)
         else:
+            self.workers.cancel('decode')
             self.log('你好好看看输入的是啥东西!')
-            
-        self.label_num.setText(f"DEC: {self.number} | HEX: 0x{self.number:X}")
-        return
-    def decode(self):
-        if (self.assigned_values is None):
+            self.label_num.setText(number_label(self.number))
             return
-        result = self.assign_bits_to_variables(self.number,self.assigned_values)
-        table_row_cnt = 1
-        self.widget_table.setRowCount(len(result)+1)
-        
-        for res in result:
-            self.widget_table.setItem(table_row_cnt, 0, QTableWidgetItem(res))
-            self.widget_table.setItem(table_row_cnt, 1, QTableWidgetItem(str(result[res][0])))
-            self.widget_table.setItem(table_row_cnt, 2, QTableWidgetItem(str(result[res][1])))
-            table_row_cnt = table_row_cnt + 1
+        # 很长的输入转换和解码都可能较慢, 交给后台执行, 结果回来后再更新数字标签
+        self.decode(num_str, bases)
+    def stream_start(self):
+        url = self.lineEdit_input_num.text().strip()
+        if not stream_decode.is_stream_url(url):
+            return
+        if not self.assigned_values:
+            self.log('请先输入或选择变量定义')
+            return
+        # 延迟导入, 只在使用实时解码时加载
+        from stream_bridge import StreamBridge
+
+        self.stream_stop()
+        self.workers.cancel('decode')
+        self.stream = StreamBridge([url], self.assigned_values, parent=self)
+        self.stream.received.connect(self.stream_received)
+        self.stream.finished.connect(self.stream_finished)
+        self.stream_words = 0
+        self.stream_log_time = time.perf_counter()
+        self.stream.start()
+        self.log(f'开始实时解码: {url}')
+    def stream_stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.received.disconnect(self.stream_received)
+            self.stream.finished.disconnect(self.stream_finished)
+            self.stream.deleteLater()
+            self.stream = None
+    def stream_received(self, value, words, dropped):
+        # 只显示最新的值, 不写入日志以免刷屏
+        previous = self.number
+        self.number = value
+        if self.assigned_values is not None:
+            self.delta_update(previous, self.number, self.assigned_values, self.table_model.plan)
+            self.table_model.update(self.number, self.assigned_values)
+        self.label_num.setText(number_label(self.number))
+        # 每秒输出一次速率
+        self.stream_words += words
+        now = time.perf_counter()
+        if now - self.stream_log_time >= 1:
+            rate = self.stream_words / (now - self.stream_log_time)
+            self.log(f'实时: {rate:.0f} 个值/秒' + (f', 已丢弃{dropped}个' if dropped else ''))
+            self.stream_words = 0
+            self.stream_log_time = now
+    def stream_finished(self, error):
+        self.log(f'实时解码出错: {error}' if error else '数据源已结束')
+        if self.stream is not None:
+            self.stream.deleteLater()
+            self.stream = None
+    def decode(self, text=None, bases=()):
+        # 给出 text 时先转换为数值, 否则解码当前数值; 定义不变时复用表格的解码计划
+        plan = self.table_model.plan_for(self.assigned_values) if self.assigned_values is not None else None
+        self.workers.submit('decode', DecodeTask(self.assigned_values, plan, self.number, text, bases))
+    def decoded(self, result):
+        previous = self.number
+        self.number = result.number
+        self.label_num.setText(result.label)
+        if result.values is None:
+            return
+        self.delta_update(previous, result.number, result.layout, result.plan)
+        # 定义不变时只更新变化的解析值
+        self.table_model.set_values(result.values, result.layout, result.plan)
 
         self.log('解析完咯~')
+    def delta_update(self, previous, number, var_info, plan):
+        # 需在解码表格更新之前调用: 定义改变时没有可比较的上一个值, 清空变化表格
+        if var_info is not self.table_model.var_info and var_info != self.table_model.var_info:
+            self.delta_model.set_changes([])
+        elif previous != number:
+            # 只处理异或后变化的位, 与定义的总位宽无关
+            self.delta_model.set_changes(plan.changes(previous, number), plan)
+    def view_switch(self, show_delta):
+        self.widget_table.setVisible(not show_delta)
+        self.widget_delta_table.setVisible(show_delta)
     # 去除花括号之外的数据
     def strip_external_braces (self, s):
-        start_index = s.find("{")
-        end_index = s.find("}")
-        
-        if start_index == -1 :
-            start_index = 0
-        if end_index == -1:
-            end_index = len(s)
-        return s[start_index + 1:end_index]
+        return decode_core.strip_external_braces(s)
         
     def assign_bits_to_variables(self, decimal_value, var_info):
-        result = {}
-        remaining_value = decimal_value
-        # 从右到左处理每个变量（从最低位开始）
-        for var_name, width in var_info:
-            # 计算掩码, 用于提取指定位数
-            mask = (1 << width) - 1
-            # 提取对应位的值
-            value = remaining_value & mask
-            # 将值存入结果字典
-            result[var_name] = [width, value]
-            # 右移剩余位
-            remaining_value >>= width
-        return result
+        return decode_core.assign_bits_to_variables(decimal_value, var_info)
 
     def parse_variable_definitions(self, data_define):
-        # 初始化结果列表
-        result = []
-        for line in data_define.strip().split('\n'):
-            # 跳过空行
-            if not line.strip():
-                continue
-            # 删除注释
-            line = re.sub(r'//.*', '', line)
-            line = re.sub(r'/\*.*?\*/', '', line, flags=re.DOTALL)
-            
-            # 移除分号
-            line = line.replace(';', '')
-            # 按冒号分割行, 获取变量名和位宽部分
-            parts = line.split(':')
-            if len(parts) != 2:
-                continue
-            # 获取位宽并转换为整数
-            try:
-                width = int(parts[1].strip())
-            except ValueError:
-                continue
-                
-            # 获取变量名
-            # 从变量名部分移除类型信息
-            var_parts = parts[0].strip().split()
-            var_name = var_parts[-1].strip()
-            # 添加到结果列表
-            result.append([var_name, width])
-        return result
+        return decode_core.parse_variable_definitions(data_define)
     def get_struct_name(self, input_string):
         """
         提取字符串中在"}"之后的内容，直到遇到非字母数字下划线的字符
         """
-        # 找到最后一个"}"的位置
-        string = input_string.replace(' ', '').replace('\n', '').replace('\r', '')
-        brace_index = string.rfind("}")
-        
-        if brace_index == -1:
-            return ""
-        
-        # 从"}"后面的位置开始提取
-        start_index = brace_index + 1
-        
-        # 查找第一个非字母数字下划线的字符
-        end_index = start_index
-        while end_index < len(string) and (string[end_index].isalnum() or string[end_index] == '_'):
-            end_index += 1
-        
-        # 提取符合条件的内容
-        return string[start_index:end_index]
+        return decode_core.get_struct_name(input_string)
     def log(self, message):
         if message == '':
             return
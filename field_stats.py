@@ -0,0 +1,303 @@
+"""解码结果的流式统计, 需要numpy
+
+每个变量的取值分布用固定内存的计数器增量累计, 不需要保存每一行解码结果:
+    位宽不超过 NARROW_BITS 的变量用数组按值计数(精确);
+    更宽的变量用 Count-Min Sketch 估计任意值的次数, 用 Space-Saving 保留出现最多的前K个值.
+另外按时间(或按值的数量)分窗口, 记录每个窗口的总数和出现最多的错误码.
+
+用法:
+    stats = FieldStats(layout)
+    stats.update(values)            # 一批原始值
+    stats.top('Have', 10)           # [(值, 次数, 误差上限), ...]
+    stats.to_dict()                 # 可导出为JSON
+"""
+import heapq
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import decode_core
+
+# 不超过该位宽的变量用数组精确计数, 每个变量占 8 * 2^位宽 字节
+NARROW_BITS = 12
+# 宽变量和原始值保留的高频值数量
+DEFAULT_TOP_K = 64
+# 每个窗口中每个变量保留的高频值数量
+WINDOW_TOP_K = 5
+# Count-Min Sketch 的行数和每行的桶数(2的幂)
+SKETCH_DEPTH = 4
+SKETCH_WIDTH = 2048
+MASK64 = (1 << 64) - 1
+
+
+class SpaceSaving:
+    """保留出现次数最多的 capacity 个值(Space-Saving), 次数为估计上限, 误差不超过记录的 error
+
+    批量更新时先在批内精确计数, 再按可合并摘要的规则合并: 不在摘要中的值以摘要已满时的最小次数为起点.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_TOP_K):
+        self.capacity = capacity
+        # 值 -> [次数, 误差]
+        self.counters: Dict[int, list] = {}
+
+    def update_counts(self, values: Sequence[int], counts: Sequence[int]) -> None:
+        counters = self.counters
+        floor = min(entry[0] for entry in counters.values()) if len(counters) >= self.capacity else 0
+        for value, count in zip(values, counts):
+            entry = counters.get(value)
+            if entry is None:
+                counters[value] = [floor + count, floor]
+            else:
+                entry[0] += count
+        if len(counters) > self.capacity:
+            self.counters = dict(heapq.nlargest(self.capacity, counters.items(), key=lambda item: item[1][0]))
+
+    def top(self, n: int) -> List[Tuple[int, int, int]]:
+        """出现最多的n个值: (值, 次数, 误差上限)"""
+        items = heapq.nlargest(n, self.counters.items(), key=lambda item: item[1][0])
+        return [(value, count, error) for value, (count, error) in items]
+
+
+class CountMinSketch:
+    """Count-Min Sketch, 估计值不小于真实次数, 超出部分以高概率不超过 总数 * e / width"""
+
+    def __init__(self, depth: int = SKETCH_DEPTH, width: int = SKETCH_WIDTH, seed: int = 0):
+        if width & (width - 1):
+            raise ValueError("桶数必须是2的幂")
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.shift = np.uint64(64 - (width.bit_length() - 1))
+        rng = np.random.default_rng(seed)
+        # 乘法-移位哈希, 乘数为奇数
+        self.multipliers = rng.integers(1, 1 << 63, size=depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.offsets = rng.integers(0, 1 << 63, size=depth, dtype=np.uint64)
+
+    @staticmethod
+    def _keys(values: np.ndarray) -> np.ndarray:
+        if values.dtype.kind in 'ui':
+            return values.astype(np.uint64)
+        # 对象数组(来自超过64位的变量): 64位以内的值与整数数组取相同的键, 更宽的值先折叠为64位
+        return np.fromiter((v if 0 <= v <= MASK64 else hash(v) & MASK64 for v in map(int, values.tolist())),
+                           dtype=np.uint64, count=len(values))
+
+    def _buckets(self, keys: np.ndarray, row: int) -> np.ndarray:
+        return ((keys * self.multipliers[row] + self.offsets[row]) >> self.shift).astype(np.intp)
+
+    def update(self, values: np.ndarray, counts: np.ndarray) -> None:
+        keys = self._keys(values)
+        width = self.table.shape[1]
+        for row in range(self.table.shape[0]):
+            self.table[row] += np.bincount(self._buckets(keys, row), weights=counts,
+                                           minlength=width).astype(np.int64)
+
+    def estimate(self, value: int) -> int:
+        keys = self._keys(np.array([value], dtype=object if value > MASK64 else np.uint64))
+        return int(min(self.table[row, self._buckets(keys, row)[0]] for row in range(self.table.shape[0])))
+
+
+class ArrayCounter:
+    """窄变量的精确计数, 数组下标即变量值"""
+
+    kind = 'array'
+
+    def __init__(self, width: int):
+        self.counts = np.zeros(1 << width, dtype=np.int64)
+
+    def update(self, column) -> Tuple[np.ndarray, np.ndarray]:
+        """累计一列值, 返回本批出现的 (值, 次数)"""
+        batch = np.bincount(np.asarray(column).astype(np.intp), minlength=len(self.counts))
+        self.counts += batch
+        values = np.flatnonzero(batch)
+        return values, batch[values]
+
+    def count(self, value: int) -> int:
+        return int(self.counts[value]) if 0 <= value < len(self.counts) else 0
+
+    def top(self, n: int) -> List[Tuple[int, int, int]]:
+        n = min(n, len(self.counts))
+        index = np.argpartition(self.counts, -n)[-n:]
+        index = index[np.argsort(self.counts[index], kind='stable')[::-1]]
+        return [(int(i), int(self.counts[i]), 0) for i in index if self.counts[i]]
+
+    def distinct(self) -> int:
+        return int(np.count_nonzero(self.counts))
+
+    def memory_usage(self) -> int:
+        return self.counts.nbytes
+
+
+class SketchCounter:
+    """宽变量的近似计数: Count-Min Sketch 估计次数, Space-Saving 保留高频值"""
+
+    kind = 'sketch'
+
+    def __init__(self, top_k: int = DEFAULT_TOP_K):
+        self.sketch = CountMinSketch()
+        self.heavy = SpaceSaving(top_k)
+
+    def update(self, column) -> Tuple[np.ndarray, np.ndarray]:
+        # 列表中混有大于等于2^63的值时 np.asarray 会得到float64, 超过64位的变量保留为对象数组
+        if not isinstance(column, np.ndarray):
+            column = decode_core.uint64_array(column, keep_wide=True)
+        values, counts = np.unique(column, return_counts=True)
+        self.sketch.update(values, counts)
+        self.heavy.update_counts(values.tolist(), counts.tolist())
+        return values, counts
+
+    def count(self, value: int) -> int:
+        return self.sketch.estimate(value)
+
+    def top(self, n: int) -> List[Tuple[int, int, int]]:
+        return self.heavy.top(n)
+
+    def distinct(self) -> Optional[int]:
+        return None
+
+    def memory_usage(self) -> int:
+        return self.sketch.table.nbytes + sys.getsizeof(self.heavy.counters) + len(self.heavy.counters) * 120
+
+
+class StatsWindow:
+    """一个统计窗口: 总数, 高频原始值和每个变量的高频值"""
+
+    def __init__(self, key: int, names: List[str]):
+        self.key = key
+        self.count = 0
+        self.values = SpaceSaving(WINDOW_TOP_K)
+        self.fields = {name: SpaceSaving(WINDOW_TOP_K) for name in names}
+
+
+class FieldStats:
+    """按变量定义累计解码统计
+
+    Args:
+        var_info: 变量定义, 同 decode_core.assign_bits_to_variables
+        window_size: 窗口大小, clock='time' 时为秒, clock='count' 时为值的数量
+        max_windows: 最多保留的窗口数, 更早的窗口被丢弃
+        clock: 'time' 按接收时间分窗口(实时数据), 'count' 按值的序号分窗口(回放日志)
+        top_k: 宽变量和原始值保留的高频值数量
+    """
+
+    def __init__(self, var_info: List[list], window_size: float = 60, max_windows: int = 60,
+                 clock: str = 'time', top_k: int = DEFAULT_TOP_K):
+        if clock not in ('time', 'count'):
+            raise ValueError(f"不支持的窗口方式: {clock}")
+        if window_size <= 0:
+            raise ValueError("窗口大小必须大于0")
+        self.layout = var_info
+        self.window_size = int(window_size) if clock == 'count' else window_size
+        self.clock = clock
+        # 重名变量只统计最后一个, 与 decode_batch 一致
+        self.widths = {name: width for name, _, width in decode_core.field_offsets(var_info)}
+        self.total_bits = max((offset + width for _, offset, width in decode_core.field_offsets(var_info)),
+                              default=0)
+        self.counters = {name: ArrayCounter(width) if width <= NARROW_BITS else SketchCounter(top_k)
+                         for name, width in self.widths.items()}
+        self.values = SpaceSaving(top_k)
+        self.windows: "deque[StatsWindow]" = deque(maxlen=max_windows)
+        self.count = 0
+
+    def update(self, values: Sequence[int], timestamp: Optional[float] = None) -> None:
+        """累计一批原始值
+
+        Args:
+            values: 原始值, 列表或numpy无符号整数数组
+            timestamp: clock='time' 时这批值的时间, 默认为当前时间
+        """
+        if not len(values):
+            return
+        if self.clock == 'time':
+            key = int((time.time() if timestamp is None else timestamp) // self.window_size)
+            self._update_window(values, key)
+            return
+        # 按序号分窗口时一批值可能跨越多个窗口
+        size = int(self.window_size)
+        start = 0
+        while start < len(values):
+            key = (self.count // size)
+            end = min(len(values), start + size - self.count % size)
+            self._update_window(values[start:end], key)
+            start = end
+
+    def _window(self, key: int) -> StatsWindow:
+        if self.windows and self.windows[-1].key == key:
+            return self.windows[-1]
+        window = StatsWindow(key, list(self.counters))
+        self.windows.append(window)
+        return window
+
+    def _update_window(self, values: Sequence[int], key: int) -> None:
+        window = self._window(key)
+        # 原始值按原值统计, 超过64位时为对象数组
+        raw = values if isinstance(values, np.ndarray) else decode_core.uint64_array(values, keep_wide=True)
+        if self.total_bits > 64:
+            columns = decode_core.decode_batch(values, self.layout)
+        elif raw.dtype == object:
+            # 只保留低64位即可按整列解码, 结果不变
+            columns = decode_core.decode_batch(decode_core.uint64_array(values), self.layout)
+        else:
+            columns = decode_core.decode_batch(raw, self.layout)
+        for name, column in columns.items():
+            batch_values, batch_counts = self.counters[name].update(column)
+            window.fields[name].update_counts(batch_values.tolist(), batch_counts.tolist())
+
+        raw_values, raw_counts = np.unique(raw, return_counts=True)
+        raw_values, raw_counts = raw_values.tolist(), raw_counts.tolist()
+        self.values.update_counts(raw_values, raw_counts)
+        window.values.update_counts(raw_values, raw_counts)
+        self.count += len(values)
+        window.count += len(values)
+
+    def top(self, name: str, n: int = 10) -> List[Tuple[int, int, int]]:
+        """变量出现最多的n个值: (值, 次数, 误差上限), 窄变量的误差为0"""
+        return self.counters[name].top(n)
+
+    def top_values(self, n: int = 10) -> List[Tuple[int, int, int]]:
+        """出现最多的n个原始错误码"""
+        return self.values.top(n)
+
+    def count_of(self, name: str, value: int) -> int:
+        """变量取某个值的次数, 宽变量为估计值(不小于真实次数)"""
+        return self.counters[name].count(value)
+
+    def memory_usage(self) -> int:
+        size = sum(counter.memory_usage() for counter in self.counters.values())
+        entries = len(self.values.counters) + sum(
+            len(window.values.counters) + sum(len(top.counters) for top in window.fields.values())
+            for window in self.windows)
+        # 每个高频值记录约120字节(字典项, 列表和整数)
+        return size + entries * 120
+
+    def to_dict(self, n: int = 10) -> dict:
+        """导出统计结果, 值以16进制字符串表示"""
+        def rows(top):
+            return [{'value': f"0x{value:X}", 'count': count, 'error': error} for value, count, error in top]
+
+        return {
+            'count': self.count,
+            'clock': self.clock,
+            'window_size': self.window_size,
+            'memory_bytes': self.memory_usage(),
+            'top_values': rows(self.top_values(n)),
+            'fields': {
+                name: {
+                    'width': self.widths[name],
+                    'kind': counter.kind,
+                    'distinct': counter.distinct(),
+                    'top': rows(counter.top(n)),
+                }
+                for name, counter in self.counters.items()
+            },
+            'windows': [
+                {
+                    'start': window.key * self.window_size,
+                    'count': window.count,
+                    'top_values': rows(window.values.top(WINDOW_TOP_K)),
+                    'fields': {name: rows(top.top(WINDOW_TOP_K)) for name, top in window.fields.items()},
+                }
+                for window in self.windows
+            ],
+        }
@@ -0,0 +1,164 @@
+"""统计页面: 按已保存的变量定义统计日志文件中每个变量的取值分布"""
+import os
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtWidgets import QFileDialog, QFrame, QHBoxLayout, QHeaderView, QTableWidgetItem, QVBoxLayout
+from qfluentwidgets import BodyLabel, ComboBox, LineEdit, PrimaryPushButton, TableWidget
+
+# 共享的变量定义注册表
+from definition_registry import DefinitionRegistry
+# 日志文件中查找错误码
+import decode_cli
+
+# 每个变量显示的高频值数量
+TOP_N = 20
+# 按值的数量分窗口的大小
+WINDOW_VALUES = 100_000
+# 表示原始错误码(而不是某个变量)的选项
+RAW_VALUES = '(原始错误码)'
+
+
+class StatsSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class FieldStatsTask(QRunnable):
+    """在线程池中统计一个日志文件"""
+
+    def __init__(self, signals: StatsSignals, path: str, layout: list, pattern: str):
+        super().__init__()
+        self.signals = signals
+        self.path = path
+        self.layout = layout
+        self.pattern = pattern
+
+    def run(self):
+        # numpy只在统计时才导入
+        import re
+        import field_stats
+
+        try:
+            pattern = re.compile(self.pattern.encode('utf-8'))
+            stats = field_stats.FieldStats(self.layout, window_size=WINDOW_VALUES, clock='count')
+            for batch in decode_cli.iter_batches(decode_cli.iter_codes(self.path, pattern)):
+                stats.update([value for _, value in batch])
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(stats)
+
+
+class FieldStatsPage(QFrame):
+    def __init__(self, objectName, parent=None):
+        super().__init__(parent=parent)
+        self.setObjectName(objectName)
+        self.stats = None
+
+        self.registry = DefinitionRegistry.instance("data_define.json")
+        self.registry.added.connect(self.data_define_added)
+        self.registry.removed.connect(self.data_define_removed)
+
+        self.comboBox_data_define = ComboBox(self)
+        self.comboBox_data_define.addItems(self.registry.names())
+        self.lineEdit_pattern = LineEdit(self)
+        self.lineEdit_pattern.setText(decode_cli.DEFAULT_PATTERN)
+        self.lineEdit_pattern.setPlaceholderText('查找错误码的正则, 有分组时取第1个分组')
+        self.pushButton_open = PrimaryPushButton('统计日志文件', self)
+        self.comboBox_field = ComboBox(self)
+        self.label_summary = BodyLabel('选择变量定义和日志文件后开始统计', self)
+        self.table = TableWidget(self)
+        self.table.setColumnCount(4)
+        self.table.setHorizontalHeaderLabels(['值', '次数', '占比', '误差上限'])
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table_windows = TableWidget(self)
+        self.table_windows.setColumnCount(3)
+        self.table_windows.setHorizontalHeaderLabels(['窗口起始序号', '数量', '最多的错误码'])
+        self.table_windows.verticalHeader().hide()
+        self.table_windows.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(self.comboBox_data_define, 1)
+        top_layout.addWidget(self.lineEdit_pattern, 2)
+        top_layout.addWidget(self.pushButton_open)
+        field_layout = QHBoxLayout()
+        field_layout.addWidget(self.comboBox_field, 1)
+        field_layout.addWidget(self.label_summary, 2)
+        self.vBoxLayout = QVBoxLayout(self)
+        self.vBoxLayout.setContentsMargins(20, 20, 20, 20)
+        self.vBoxLayout.addLayout(top_layout)
+        self.vBoxLayout.addLayout(field_layout)
+        self.vBoxLayout.addWidget(self.table, 2)
+        self.vBoxLayout.addWidget(self.table_windows, 1)
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = StatsSignals(self)
+        self.signals.finished.connect(self.stats_finished)
+        self.signals.failed.connect(self.stats_failed)
+        self.pushButton_open.clicked.connect(self.stats_start)
+        self.comboBox_field.currentTextChanged.connect(self.show_field)
+
+    def data_define_added(self, name):
+        self.comboBox_data_define.addItem(name)
+
+    def data_define_removed(self, name):
+        index = self.comboBox_data_define.findText(name)
+        if index >= 0:
+            self.comboBox_data_define.removeItem(index)
+
+    def stats_start(self):
+        layout = self.registry.get(self.comboBox_data_define.currentText())
+        if not layout:
+            self.label_summary.setText('请先选择变量定义')
+            return
+        path, _ = QFileDialog.getOpenFileName(self, '选择日志文件')
+        if not path:
+            return
+        self.pushButton_open.setEnabled(False)
+        self.label_summary.setText(f'正在统计 {os.path.basename(path)} ...')
+        self.pool.start(FieldStatsTask(self.signals, path, layout, self.lineEdit_pattern.text()))
+
+    def stats_failed(self, error):
+        self.pushButton_open.setEnabled(True)
+        self.label_summary.setText(f'统计失败: {error}')
+
+    def stats_finished(self, stats):
+        self.pushButton_open.setEnabled(True)
+        self.stats = stats
+        self.comboBox_field.blockSignals(True)
+        self.comboBox_field.clear()
+        self.comboBox_field.addItems([RAW_VALUES] + list(stats.counters))
+        self.comboBox_field.blockSignals(False)
+        self.show_field(RAW_VALUES)
+
+        windows = list(stats.windows)
+        self.table_windows.setRowCount(len(windows))
+        for row, window in enumerate(windows):
+            top = window.values.top(1)
+            self.table_windows.setItem(row, 0, QTableWidgetItem(str(window.key * stats.window_size)))
+            self.table_windows.setItem(row, 1, QTableWidgetItem(str(window.count)))
+            self.table_windows.setItem(row, 2, QTableWidgetItem(f"0x{top[0][0]:X} ({top[0][1]}次)" if top else ''))
+
+    def show_field(self, name):
+        stats = self.stats
+        if stats is None or not name:
+            return
+        if name == RAW_VALUES:
+            top = stats.top_values(TOP_N)
+            summary = f'共 {stats.count} 个值'
+        else:
+            counter = stats.counters[name]
+            top = counter.top(TOP_N)
+            distinct = counter.distinct()
+            summary = f'{name}: 位宽 {stats.widths[name]}, ' + (
+                f'{distinct} 种不同的值' if distinct is not None else '宽变量, 次数为估计值')
+        self.label_summary.setText(f'{summary}, 统计占用约 {stats.memory_usage() / 1024:.0f} KB')
+
+        self.table.setRowCount(len(top))
+        for row, (value, count, error) in enumerate(top):
+            self.table.setItem(row, 0, QTableWidgetItem(f"0x{value:X}"))
+            self.table.setItem(row, 1, QTableWidgetItem(str(count)))
+            self.table.setItem(row, 2, QTableWidgetItem(f"{count / stats.count:.2%}" if stats.count else ''))
+            self.table.setItem(row, 3, QTableWidgetItem(str(error)))
@@ -0,0 +1,347 @@
+"""从头文件目录批量导入位域结构体定义, 不启动Qt
+
+遍历目录下的头文件, 在进程池中并行解析, 把每个含位域的结构体/联合体(以typedef名优先, 同一类型只导入一次)
+一次性写入 config/<定义文件>. 每个文件的修改时间、大小和内容哈希记录在清单中, 再次运行时只重新解析有变化的文件;
+修改时间变了但内容没变的文件只读取并计算哈希, 不重新解析.
+
+用法:
+    python header_import.py sdk/include [more/include ...] [-j 进程数] [--ext .h .hpp]
+    python header_import.py sdk/include --aligned --long-bits 64   # 按ABI规则对齐
+    python header_import.py sdk/include --prune                     # 删除已不存在的头文件/结构体导入的定义
+    python header_import.py sdk/include --dry-run                   # 只显示将要导入的定义
+
+清单默认保存为 config/<定义文件名>.import.json, 只记录由本脚本导入的定义;
+与清单之外的已有定义(如界面中手动保存的)同名时默认跳过, --force 时覆盖.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import c_struct_parser
+import decode_core
+from variable_saver import VariableSaver
+
+MANIFEST_VERSION = 1
+DEFAULT_EXTENSIONS = ('.h', '.hh', '.hpp', '.hxx')
+# 待解析的文件少于该数量时不启动进程池
+MIN_PARALLEL_FILES = 8
+
+# 单个文件的解析结果: definitions 为 结构体名 -> 变量定义, 内容未变时为None
+FileResult = namedtuple('FileResult', 'path mtime_ns size hash definitions error')
+
+
+def file_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def has_bitfields(ctype: c_struct_parser.CType) -> bool:
+    """类型中(包括嵌套的成员)是否有位域"""
+    if isinstance(ctype, c_struct_parser.ArrayType):
+        return has_bitfields(ctype.elem)
+    if isinstance(ctype, c_struct_parser.RecordType):
+        # 只有前向声明(如 typedef struct foo foo_t;)的类型没有成员
+        if ctype.members is None:
+            return False
+        return any(member.bitwidth is not None or has_bitfields(member.ctype) for member in ctype.members)
+    return False
+
+
+def parse_definitions(text: str, packed: bool = True, long_bits: int = 32, pointer_bits: int = 64,
+                      value_names: bool = True) -> Dict[str, List[list]]:
+    """解析头文件中全部含位域的结构体/联合体
+
+    与界面一致: 需要完整C解析器的内容用 c_struct_parser, 只有一个结构体的简单写法用
+    get_struct_name/parse_variable_definitions 逐行解析. 同一类型有多个名称(标签和typedef名)时取最后定义的名称.
+
+    Returns:
+        结构体名 -> VariableSaver格式的变量定义, 按在文件中出现的顺序
+
+    Raises:
+        CParseError: 有多个结构体而完整解析失败
+    """
+    if '{' not in text:
+        return {}
+    # 只有一个 } 之后带名称的简单结构体时与界面的逐行解析一致, 没有名称时由完整解析器取结构体标签
+    if not c_struct_parser.needs_full_parser(text) and text.count('{') == 1:
+        name = decode_core.get_struct_name(text)
+        if name:
+            layout = decode_core.parse_variable_definitions(decode_core.strip_external_braces(text))
+            return {name: layout} if layout else {}
+    try:
+        info = c_struct_parser.parse_header(text, packed, long_bits, pointer_bits)
+    except c_struct_parser.CParseError:
+        if text.count('{') > 1:
+            raise
+        # 单个结构体时与界面一样退回逐行解析
+        name = decode_core.get_struct_name(text)
+        layout = decode_core.parse_variable_definitions(decode_core.strip_external_braces(text))
+        return {name: layout} if name and layout else {}
+
+    names = {}
+    for name in info.record_names:
+        ctype = info.types[name]
+        names.pop(id(ctype), None)
+        names[id(ctype)] = name
+    definitions = {}
+    for name in sorted(names.values(), key=info.record_names.index):
+        if not has_bitfields(info.types[name]):
+            continue
+        fields = info.fields(name)
+        symbols = [info.value_names(field) for field in fields] if value_names else None
+        definitions[name] = c_struct_parser.to_var_info(fields, symbols)
+    return definitions
+
+
+def _parse_file(task: Tuple[str, Optional[str], dict]) -> FileResult:
+    """进程池中执行: 读取文件, 内容哈希与清单中的相同时不解析"""
+    path, known_hash, options = task
+    try:
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+    except OSError as e:
+        return FileResult(path, 0, 0, None, None, str(e))
+    digest = file_hash(data)
+    if digest == known_hash:
+        return FileResult(path, stat.st_mtime_ns, stat.st_size, digest, None, None)
+    try:
+        definitions = parse_definitions(data.decode('utf-8', 'replace'), **options)
+    except (c_struct_parser.CParseError, RecursionError) as e:
+        return FileResult(path, stat.st_mtime_ns, stat.st_size, digest, {}, str(e) or type(e).__name__)
+    except Exception as e:
+        # 解析器未预料到的写法只跳过该文件并报告, 不中断整个目录的导入
+        return FileResult(path, stat.st_mtime_ns, stat.st_size, digest, {}, f"{type(e).__name__}: {e}")
+    return FileResult(path, stat.st_mtime_ns, stat.st_size, digest, definitions, None)
+
+
+def iter_headers(roots: List[str], extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS) -> Iterator[str]:
+    """按路径排序逐个给出目录下的头文件(绝对路径), roots 中也可以直接是文件"""
+    extensions = tuple(ext.lower() for ext in extensions)
+    for root in roots:
+        root = os.path.abspath(root)
+        if os.path.isfile(root):
+            yield root
+            continue
+        for directory, subdirs, files in os.walk(root):
+            subdirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(extensions):
+                    yield os.path.join(directory, name)
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        manifest = {'version': MANIFEST_VERSION, 'options': None, 'files': {}, 'stale': []}
+    return manifest
+
+
+def save_manifest(path: str, manifest: dict) -> None:
+    """先写临时文件再替换, 中途退出不会留下损坏的清单"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+ImportResult = namedtuple('ImportResult', 'scanned parsed saved removed stale skipped conflicts errors missing elapsed')
+
+
+def import_headers(roots: List[str], saver: VariableSaver, manifest_path: str,
+                   extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS, workers: Optional[int] = None,
+                   packed: bool = True, long_bits: int = 32, pointer_bits: int = 64, value_names: bool = True,
+                   prune: bool = False, force: bool = False, dry_run: bool = False) -> ImportResult:
+    """增量导入头文件中的位域结构体
+
+    Args:
+        roots: 头文件目录或文件
+        saver: 写入的定义文件
+        manifest_path: 清单文件路径
+        extensions: 头文件扩展名
+        workers: 进程数, 默认为CPU核数
+        packed/long_bits/pointer_bits: 见 c_struct_parser.parse_header, 与上次不同时全部重新解析
+        value_names: 是否附带取值含义
+        prune: 删除已不存在的头文件和结构体导入的定义
+        force: 覆盖清单之外的同名定义
+        dry_run: 只解析, 不写定义文件和清单
+
+    Returns:
+        ImportResult: scanned/parsed 为扫描和重新解析的文件数; saved 为写入的定义名(内容没变的不写),
+        removed 为删除的定义名, stale 为不再由任何头文件定义的名称(prune 时删除), skipped 为因清单之外已有同名定义而跳过的名称,
+        conflicts 为 (定义名, 保留的文件, 跳过的文件), errors 为 (文件, 错误信息),
+        missing 为已不存在但未删除其定义的文件
+    """
+    start = time.perf_counter()
+    options = {'packed': packed, 'long_bits': long_bits, 'pointer_bits': pointer_bits, 'value_names': value_names}
+    manifest = load_manifest(manifest_path)
+    entries: Dict[str, dict] = manifest['files']
+    full = manifest['options'] != options
+
+    # 修改时间和大小都没变的文件直接跳过, 其余交给进程池
+    paths = list(iter_headers(roots, extensions))
+    tasks = []
+    for path in paths:
+        entry = entries.get(path)
+        if not full and entry is not None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is not None and stat.st_mtime_ns == entry['mtime_ns'] and stat.st_size == entry['size']:
+                continue
+        tasks.append((path, None if full or entry is None else entry['hash'], options))
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(tasks) >= MIN_PARALLEL_FILES:
+        with Pool(min(workers, len(tasks))) as pool:
+            results = pool.map(_parse_file, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+    else:
+        results = [_parse_file(task) for task in tasks]
+
+    # 定义名 -> 导入它的文件; 重新解析的文件先放弃原有的定义名, 再按路径顺序重新认领
+    owners = {name: path for path, entry in entries.items() for name in entry['names']}
+    # 本脚本导入过的全部定义名, 包括已不在头文件中、尚未 --prune 删除的
+    owned = set(owners) | set(manifest['stale'])
+    roots = [os.path.abspath(root) for root in roots]
+    scanned = set(paths)
+    # 清单中位于本次扫描范围内、但已不存在的文件
+    missing = [path for path in entries if path not in scanned
+               and any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in roots)]
+    released = list(missing) if prune else []
+    released.extend(result.path for result in results if result.definitions is not None)
+    for path in released:
+        for name in entries.get(path, {}).get('names', ()):
+            if owners.get(name) == path:
+                del owners[name]
+
+    items: Dict[str, List[list]] = {}
+    conflicts: List[Tuple[str, str, str]] = []
+    errors: List[Tuple[str, str]] = []
+    old_names: List[str] = list(manifest['stale'])
+    parsed = 0
+    for result in results:
+        if result.hash is None:
+            errors.append((result.path, result.error))
+            continue
+        entry = entries.setdefault(result.path, {'names': []})
+        entry.update(mtime_ns=result.mtime_ns, size=result.size, hash=result.hash)
+        if result.definitions is None:
+            continue
+        parsed += 1
+        entry.pop('error', None)
+        if result.error:
+            errors.append((result.path, result.error))
+            entry['error'] = result.error
+        old_names.extend(entry['names'])
+        names = []
+        for name, layout in result.definitions.items():
+            owner = owners.get(name)
+            if owner is not None and owner != result.path:
+                conflicts.append((name, owner, result.path))
+                continue
+            owners[name] = result.path
+            items[name] = layout
+            names.append(name)
+        entry['names'] = names
+    # 内容没变、上次解析失败的文件每次都报告
+    reparsed = {result.path for result in results}
+    errors.extend((path, entries[path]['error']) for path in paths
+                  if path not in reparsed and 'error' in entries.get(path, {}))
+    if prune:
+        for path in missing:
+            old_names.extend(entries.pop(path)['names'])
+    # 不再由任何头文件定义的名称
+    stale = sorted({name for name in old_names if name not in owners})
+
+    # 只写入有变化的定义; 清单之外的同名定义默认不覆盖
+    with contextlib.redirect_stdout(sys.stderr):
+        existing = saver.load()
+    skipped = []
+    for name in list(items):
+        if name not in existing:
+            continue
+        if existing[name] == items[name]:
+            del items[name]
+        elif name not in owned and not force:
+            del items[name]
+            skipped.append(name)
+            entries[owners.pop(name)]['names'].remove(name)
+    stale = [name for name in stale if name in existing]
+    removed = stale if prune else []
+    manifest['stale'] = [] if prune else stale
+
+    if not dry_run:
+        with contextlib.redirect_stdout(sys.stderr):
+            if items:
+                saver.save_many(items)
+            if removed:
+                saver.delete(*removed)
+        manifest['options'] = options
+        save_manifest(manifest_path, manifest)
+    return ImportResult(len(paths), parsed, list(items), removed, stale, skipped, conflicts, errors,
+                        [] if prune else missing, time.perf_counter() - start)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='从头文件目录批量导入位域结构体定义')
+    parser.add_argument('roots', nargs='+', help='头文件目录或文件')
+    parser.add_argument('-j', '--jobs', type=int, default=0, help='进程数, 默认为CPU核数')
+    parser.add_argument('--ext', nargs='+', default=list(DEFAULT_EXTENSIONS), help='头文件扩展名')
+    parser.add_argument('--define-file', default='data_define.json', help='config目录下的定义文件名')
+    parser.add_argument('--manifest', help='清单文件路径, 默认为 config/<定义文件名>.import.json')
+    parser.add_argument('--aligned', action='store_true', help='按ABI规则对齐, 默认紧凑排列')
+    parser.add_argument('--long-bits', type=int, choices=[32, 64], default=32, help='long 的位数')
+    parser.add_argument('--pointer-bits', type=int, choices=[32, 64], default=64, help='指针的位数')
+    parser.add_argument('--no-value-names', action='store_true', help='不附带枚举名和 #define 常量名')
+    parser.add_argument('--prune', action='store_true', help='删除已不存在的头文件和结构体导入的定义')
+    parser.add_argument('--force', action='store_true', help='覆盖不是由本脚本导入的同名定义')
+    parser.add_argument('--dry-run', action='store_true', help='只解析并显示结果, 不写入')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    for root in args.roots:
+        if not os.path.exists(root):
+            print(f"路径不存在: {root}", file=sys.stderr)
+            return 1
+    saver = VariableSaver(args.define_file)
+    manifest_path = args.manifest or os.path.splitext(saver.file_path)[0] + '.import.json'
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    result = import_headers(args.roots, saver, manifest_path, tuple(args.ext), args.jobs or None,
+                            packed=not args.aligned, long_bits=args.long_bits, pointer_bits=args.pointer_bits,
+                            value_names=not args.no_value_names, prune=args.prune, force=args.force,
+                            dry_run=args.dry_run)
+
+    for path, error in result.errors:
+        print(f"解析失败 {path}: {error}", file=sys.stderr)
+    for name, owner, path in result.conflicts:
+        print(f"重名 {name}: 保留 {owner}, 跳过 {path}", file=sys.stderr)
+    if result.skipped:
+        print(f"已有同名定义, 跳过(--force 覆盖): {', '.join(result.skipped)}", file=sys.stderr)
+    if result.stale and not args.prune:
+        print(f"{len(result.stale)} 个定义已不在头文件中, 使用 --prune 删除: {', '.join(result.stale)}", file=sys.stderr)
+    if result.missing:
+        print(f"{len(result.missing)} 个头文件已不存在, 使用 --prune 删除其定义", file=sys.stderr)
+    action = '将写入' if args.dry_run else '写入'
+    print(f"扫描 {result.scanned} 个头文件, 重新解析 {result.parsed} 个, {action} {len(result.saved)} 个定义, "
+          f"删除 {len(result.removed)} 个, 耗时 {result.elapsed:.2f}s", file=sys.stderr)
+    if args.dry_run:
+        for name in result.saved:
+            print(name)
+    return 1 if result.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,22 +1,24 @@
 # coding:utf-8
+import os
 import sys
-from PyQt5 import QtGui
 
-from PyQt5.QtCore import Qt, QSize, QUrl, QPoint
-from PyQt5.QtGui import QIcon, QDesktopServices, QColor, QPixmap
+# 启动耗时分析, 需在其它导入之前安装 (ERRORDECODE_PROFILE=1 时生效)
+import startup_profiler
+startup_profiler.install()
+
+from PyQt5.QtCore import Qt, QSize, QPoint, QTimer
+from PyQt5.QtGui import QIcon, QColor, QPixmap
 from PyQt5.QtWidgets import QHBoxLayout, QVBoxLayout, QApplication, QFrame, QWidget, QStackedWidget
 
 from qfluentwidgets import (NavigationItemPosition, MessageBox, MSFluentTitleBar, MSFluentWindow,
-                            TabBar, SubtitleLabel, setFont, TabCloseButtonDisplayMode, IconWidget,
+                            TabBar, SubtitleLabel, setFont,
                             TransparentDropDownToolButton, TransparentToolButton, setTheme, Theme, isDarkTheme)
 from qfluentwidgets import FluentIcon as FIF
-from qframelesswindow import AcrylicWindow
 
-# Error_decode 组件
-from error_decode import ErrorDecode
+# ErrorDecode/DataDefineManager 页面及其依赖(解析器、数据存储等)在首次使用时才导入
 
-# 变量定义存取
-from data_define_manager import VariableSaver, DataDefineManager
+# 页面首次显示时才构造; 设置 ERRORDECODE_EAGER=1 时启动即构造全部页面
+LAZY_PAGES = os.environ.get('ERRORDECODE_EAGER', '') in ('', '0')
 
 # 使用教程字符串
 usage_text = """
@@ -53,6 +55,68 @@ class TextWidget(QFrame):
         self.hBoxLayout.addWidget(self.label, 1, Qt.AlignLeft)
         self.setObjectName(text.replace(' ', '-'))
         
+class LazyPage(QWidget):
+    """页面占位, 首次显示时才调用 factory 构造真正的页面"""
+
+    def __init__(self, objectName: str, factory, parent=None):
+        super().__init__(parent=parent)
+        self.setObjectName(objectName)
+        self.factory = factory
+        self.page = None
+        self.vBoxLayout = QVBoxLayout(self)
+        self.vBoxLayout.setContentsMargins(0, 0, 0, 0)
+        if not LAZY_PAGES:
+            self.ensurePage()
+
+    def ensurePage(self):
+        if self.page is None:
+            with startup_profiler.section(f'页面 {self.objectName()}'):
+                self.page = self.factory(self)
+                self.vBoxLayout.addWidget(self.page)
+        return self.page
+
+    def showEvent(self, e):
+        self.ensurePage()
+        super().showEvent(e)
+
+
+def createDataDefineManager(parent):
+    # 变量定义存取
+    from data_define_manager import DataDefineManager
+    return DataDefineManager('DataDefineManager Interface', parent)
+
+
+def createBulkDecodePage(parent):
+    # 批量解码
+    from bulk_decode_page import BulkDecodePage
+    return BulkDecodePage('BulkDecode Interface', parent)
+
+
+def createFieldStatsPage(parent):
+    # 日志统计, numpy在开始统计时才导入
+    from field_stats_page import FieldStatsPage
+    return FieldStatsPage('FieldStats Interface', parent)
+
+
+def createPhotoPage(parent):
+    page = PhotoWidget('Video Interface', parent)
+    pixmap = QPixmap("./resource/青语.png")  # 替换为你的图片路径
+    # 调整图片大小（保持比例）
+    scaled_pixmap = pixmap.scaled(
+        800, 600,  # 目标尺寸
+        Qt.KeepAspectRatio,  # 保持宽高比
+        Qt.SmoothTransformation  # 平滑缩放
+    )
+    page.label.setPixmap(scaled_pixmap)
+    return page
+
+
+def createLibraryPage(parent):
+    page = TextWidget('library Interface', parent)
+    page.label.setText(usage_text)
+    return page
+
+
 class CustomTitleBar(MSFluentTitleBar):
     """ Title bar with icon and title """
 
@@ -114,30 +178,22 @@ class Window(MSFluentWindow):
         self.setTitleBar(CustomTitleBar(self))
         self.tabBar = self.titleBar.tabBar  # type: TabBar
 
-        # create sub interface
+        # create sub interface, 除解码页外都在首次切换到时才构造
         self.homeInterface = QStackedWidget(self, objectName='homeInterface')
-        self.appInterface = DataDefineManager('DataDefineManager Interface', self)
-        self.photoInterface = PhotoWidget('Video Interface', self)
-        
-        pixmap = QPixmap("./resource/青语.png")  # 替换为你的图片路径
-        # 调整图片大小（保持比例）
-        scaled_pixmap = pixmap.scaled(
-            800, 600,  # 目标尺寸
-            Qt.KeepAspectRatio,  # 保持宽高比
-            Qt.SmoothTransformation  # 平滑缩放
-        )
-        self.photoInterface.label.setPixmap(scaled_pixmap)
-        
-        self.libraryInterface = TextWidget('library Interface', self)
-        self.libraryInterface.label.setText(usage_text)
-        
-        
+        self.appInterface = LazyPage('DataDefineManager Interface', createDataDefineManager, self)
+        self.bulkInterface = LazyPage('BulkDecode-Interface', createBulkDecodePage, self)
+        self.statsInterface = LazyPage('FieldStats-Interface', createFieldStatsPage, self)
+        self.photoInterface = LazyPage('Video-Interface', createPhotoPage, self)
+        self.libraryInterface = LazyPage('library-Interface', createLibraryPage, self)
+
         self.initNavigation()
         self.initWindow()
 
     def initNavigation(self):
         self.addSubInterface(self.homeInterface, FIF.HOME, '解码', FIF.HOME_FILL)
         self.addSubInterface(self.appInterface, FIF.DICTIONARY, '数据管理')
+        self.addSubInterface(self.bulkInterface, FIF.TILES, '批量')
+        self.addSubInterface(self.statsInterface, FIF.PIE_SINGLE, '统计')
         self.addSubInterface(self.photoInterface, FIF.PHOTO, '青语')
 
         self.addSubInterface(self.libraryInterface, FIF.BOOK_SHELF,
@@ -154,8 +210,11 @@ class Window(MSFluentWindow):
         self.navigationInterface.setCurrentItem(
             self.homeInterface.objectName())
 
-        # add tab
-        self.addTab('Honey', 'Honey~')
+        # add tab, 窗口显示后再构造第一个解码页(需要读取变量定义文件)
+        if LAZY_PAGES:
+            QTimer.singleShot(0, lambda: self.addTab('Honey', 'Honey~'))
+        else:
+            self.addTab('Honey', 'Honey~')
 
         self.tabBar.currentChanged.connect(self.onTabChanged)
         self.tabBar.tabAddRequested.connect(self.onTabAddRequested)
@@ -182,7 +241,7 @@ class Window(MSFluentWindow):
     # 页面切换逻辑
     def onTabChanged(self, index: int):
         objectName = self.tabBar.currentTab().routeKey()
-        widget = self.findChild(ErrorDecode, objectName)
+        widget = self.homeInterface.findChild(QWidget, objectName, Qt.FindDirectChildrenOnly)
         if widget:
             self.homeInterface.setCurrentWidget(widget)
         else:
@@ -192,8 +251,13 @@ class Window(MSFluentWindow):
         self.addTab(text, text)
 
     def addTab(self, routeKey, text):
-        self.tabBar.addTab(routeKey, text)
-        self.homeInterface.addWidget(ErrorDecode(text, routeKey, self))
+        # Error_decode 组件
+        from error_decode import ErrorDecode
+
+        with startup_profiler.section(f'解码页 {routeKey}'):
+            # 先加入页面再加标签, 标签切换时页面已存在
+            self.homeInterface.addWidget(ErrorDecode(text, routeKey, self))
+            self.tabBar.addTab(routeKey, text)
 
 
 if __name__ == '__main__':
@@ -205,6 +269,10 @@ if __name__ == '__main__':
     # setTheme(Theme.DARK)
 
     app = QApplication(sys.argv)
-    w = Window()
+    with startup_profiler.section('主窗口'):
+        w = Window()
     w.show()
+    startup_profiler.mark('窗口显示')
+    # 等第一轮事件处理(包括延后构造的解码页)完成后再输出
+    QTimer.singleShot(0, startup_profiler.report)
     app.exec_()
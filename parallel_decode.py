@@ -0,0 +1,117 @@
+"""多进程并行解码大文件
+
+文件按行边界切成若干块, 每块在进程池中独立解码并渲染成文本,
+主进程按输入顺序依次写出. 同时在途的块数有上限, 内存占用不随文件大小增长.
+"""
+import io
+import mmap
+import os
+import re
+import sys
+from collections import deque
+from functools import lru_cache
+from multiprocessing import Pool
+from typing import Iterator, List, Optional, Tuple
+
+import decode_cli
+
+# 默认每块16MB
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def split_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """按行边界把文件切块
+
+    Returns:
+        每块的 (起始偏移, 结束偏移), 除最后一块外都以换行符结尾
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    chunks = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                # 延伸到下一个换行符之后, 保证不把一行切开
+                newline = mm.find(b'\n', end)
+                end = size if newline == -1 else newline + 1
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+@lru_cache(maxsize=8)
+def _compile(pattern: bytes, flags: int) -> "re.Pattern[bytes]":
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=1)
+def _worker_cache(cache_size: int):
+    """每个工作进程一个解码缓存, 在该进程处理的所有块之间共享"""
+    import decode_cache
+    return decode_cache.DecodeCache(cache_size)
+
+
+def _decode_chunk(task: tuple) -> Tuple[str, int]:
+    """进程池中执行: 解码一块并渲染成文本"""
+    path, start, end, layout, pattern, flags, header, fmt, base, cache_size, symbols = task
+    out = io.StringIO()
+    cache = _worker_cache(cache_size).layout(layout) if cache_size else None
+    rows = decode_cli.iter_rows(path, layout, _compile(pattern, flags), base, start, end, cache, symbols)
+    count = decode_cli.write_rows(rows, header, fmt, out, write_header=False)
+    return out.getvalue(), count
+
+
+def iter_tasks(paths: List[str], layout: List[list], pattern: "re.Pattern[bytes]", header: List[str],
+               fmt: str, base: int, chunk_size: int, cache_size: int = 0, symbols: bool = False) -> Iterator[tuple]:
+    for path in paths:
+        for start, end in split_chunks(path, chunk_size):
+            yield (path, start, end, layout, pattern.pattern, pattern.flags, header, fmt, base, cache_size, symbols)
+
+
+def decode_files(paths: List[str], layout: List[list], pattern: "re.Pattern[bytes]", header: List[str],
+                 fmt: str = 'csv', base: int = 0, workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, out=None, cache_size: int = 0, symbols: bool = False) -> int:
+    """并行解码多个文件, 结果按输入顺序写到 out
+
+    Args:
+        paths: 日志文件列表
+        layout: 变量定义
+        pattern: 查找错误码的bytes正则
+        header: 输出表头
+        fmt: csv 或 jsonl
+        base: 数值进制, 0为自动判断
+        workers: 进程数, None为CPU核数
+        chunk_size: 每块的字节数
+        out: 输出流, 默认stdout
+        cache_size: 每个进程的解码缓存容量, 0为不缓存
+        symbols: 是否追加有含义变量的含义列, 见 decode_cli.symbol_fields
+
+    Returns:
+        解码的值数量
+    """
+    out = out or sys.stdout
+    workers = workers or os.cpu_count() or 1
+    if fmt == 'csv':
+        decode_cli.write_rows(iter(()), header, fmt, out)
+
+    count = 0
+    # 在途块数上限, 既让所有进程保持忙碌, 又避免结果在内存里堆积
+    max_pending = workers * 2
+    pending = deque()
+    with Pool(workers) as pool:
+        for task in iter_tasks(paths, layout, pattern, header, fmt, base, chunk_size, cache_size, symbols):
+            pending.append(pool.apply_async(_decode_chunk, (task,)))
+            if len(pending) >= max_pending:
+                text, rows = pending.popleft().get()
+                out.write(text)
+                count += rows
+        while pending:
+            text, rows = pending.popleft().get()
+            out.write(text)
+            count += rows
+    return count
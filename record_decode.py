@@ -0,0 +1,227 @@
+"""定长二进制记录文件解码, 需要numpy
+
+文件以 np.memmap 映射为记录数组, 每个变量通过结构化dtype直接读取覆盖它的字节(不复制),
+再对整列做移位/掩码运算, 结果是每个变量一列的numpy数组, 可以保存为 .npy/.npz.
+大文件按块处理, 内存占用与文件大小无关.
+
+用法:
+    python record_decode.py <定义名> <记录文件> --record-size 16 [--header-offset 64] --out decoded.npz
+"""
+import argparse
+import contextlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import decode_core
+
+# 每块处理的记录数
+DEFAULT_CHUNK_RECORDS = 1 << 20
+
+
+class RecordFile:
+    """把二进制文件映射为定长记录数组
+
+    Args:
+        path: 记录文件路径
+        record_size: 每条记录的字节数, 整条记录视为一个整数
+        header_offset: 文件头的字节数, 记录从该偏移开始
+        byteorder: 记录的字节序
+        bit_order: 'lsb0' 或 'msb0', 同 decode_core.BufferDecoder
+    """
+
+    def __init__(self, path: str, record_size: int, header_offset: int = 0,
+                 byteorder: str = 'little', bit_order: str = 'lsb0'):
+        if record_size <= 0:
+            raise ValueError("记录大小必须大于0")
+        self.path = path
+        self.record_size = record_size
+        self.header_offset = header_offset
+        self.byteorder = byteorder
+        self.bit_order = bit_order
+        size = os.path.getsize(path)
+        if size < header_offset:
+            raise ValueError(f"文件 {path} 比文件头还短")
+        # 末尾不足一条记录的部分忽略
+        self.count = (size - header_offset) // record_size
+        self.raw = self._map(np.dtype((np.uint8, (record_size,))))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _map(self, dtype: np.dtype) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=self.header_offset, shape=(self.count,))
+
+    def columns(self, var_info: List[list]) -> "RecordColumns":
+        """按变量定义准备列读取器"""
+        return RecordColumns(self, var_info)
+
+
+class RecordColumns:
+    """每个变量对应记录中的一段字节, 能按1/2/4/8字节整数直接读取的用结构化dtype零拷贝读取"""
+
+    def __init__(self, records: RecordFile, var_info: List[list]):
+        self.records = records
+        plan = decode_core.BufferDecoder(var_info, records.byteorder, records.bit_order).plan(records.record_size)
+        self.names = [name for name, *_ in plan]
+        endian = '<' if records.byteorder == 'little' else '>'
+
+        names, formats, offsets = [], [], []
+        # 变量名 -> ('view', 结构化字段名, 右移, 掩码, 位宽) 或 ('bytes', 起始字节, 结束字节, 右移, 掩码, 位宽)
+        self.readers: Dict[str, tuple] = {}
+        for index, (name, start, end, shift, mask) in enumerate(plan):
+            width = mask.bit_length()
+            if width > 64:
+                raise ValueError(f"变量 {name} 宽度 {width} 超过64位, 请使用 decode_core.BufferDecoder")
+            span = end - start
+            size = next((s for s in (1, 2, 4, 8) if s >= span), None)
+            if size is not None:
+                # 多读的字节都在高位, 会被掩码去掉
+                offset = start if records.byteorder == 'little' else end - size
+                if 0 <= offset and offset + size <= records.record_size:
+                    field = f"f{index}"
+                    names.append(field)
+                    formats.append(f"{endian}u{size}")
+                    offsets.append(offset)
+                    self.readers[name] = ('view', field, shift, mask, width)
+                    continue
+            self.readers[name] = ('bytes', start, end, shift, mask, width)
+
+        dtype = np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                          'itemsize': records.record_size})
+        self.view = records._map(dtype)
+
+    def decode(self, start: int = 0, stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """解码 [start, stop) 范围内的记录, 每个变量返回最窄的无符号整数列"""
+        stop = self.records.count if stop is None else min(stop, self.records.count)
+        result = {}
+        for name, reader in self.readers.items():
+            if reader[0] == 'view':
+                _, field, shift, mask, width = reader
+                column = self.view[field][start:stop]
+                if shift or mask != (1 << (column.dtype.itemsize * 8)) - 1:
+                    column = (column >> column.dtype.type(shift)) & column.dtype.type(mask)
+            else:
+                _, first, last, shift, mask, width = reader
+                column = self._assemble(start, stop, first, last, shift, mask)
+            result[name] = column.astype(decode_core.field_dtype(width), copy=False)
+        return result
+
+    def _assemble(self, start: int, stop: int, first: int, last: int, shift: int, mask: int) -> np.ndarray:
+        """逐字节拼出跨越8字节以上的变量"""
+        raw = self.records.raw[start:stop]
+        value = np.zeros(stop - start, dtype=np.uint64)
+        byte_indexes = range(first, last)
+        if self.records.byteorder == 'big':
+            byte_indexes = reversed(byte_indexes)
+        for k, byte_index in enumerate(byte_indexes):
+            # 第k个字节(从低位数)在变量中的位置
+            position = 8 * k - shift
+            if position >= 64:
+                break
+            column = raw[:, byte_index].astype(np.uint64)
+            if position >= 0:
+                value |= column << np.uint64(position)
+            else:
+                value |= column >> np.uint64(-position)
+        return value & np.uint64(mask)
+
+    def iter_chunks(self, chunk_records: int = DEFAULT_CHUNK_RECORDS) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+        """按块解码, 产出 (起始记录号, 列字典)"""
+        for start in range(0, self.records.count, chunk_records):
+            yield start, self.decode(start, start + chunk_records)
+
+
+def safe_filename(name: str) -> str:
+    """把 nib.lo、arr[0] 之类的变量名转换为可用的文件名"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name) or '_'
+
+
+def decode_to_npy(records: RecordFile, var_info: List[list], out_dir: str,
+                  chunk_records: int = DEFAULT_CHUNK_RECORDS) -> Dict[str, str]:
+    """解码全部记录, 每个变量写成一个 .npy 文件(按块写入, 不占用整列内存)
+
+    Returns:
+        变量名 -> .npy 文件路径
+    """
+    columns = records.columns(var_info)
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = {}
+    paths = {}
+    used = set()
+    for name, reader in columns.readers.items():
+        filename = safe_filename(name)
+        while filename in used:
+            filename += '_'
+        used.add(filename)
+        paths[name] = os.path.join(out_dir, filename + '.npy')
+        dtype = decode_core.field_dtype(reader[-1])
+        outputs[name] = np.lib.format.open_memmap(paths[name], mode='w+', dtype=dtype, shape=(len(records),))
+
+    for start, chunk in columns.iter_chunks(chunk_records):
+        for name, column in chunk.items():
+            outputs[name][start:start + len(column)] = column
+    for output in outputs.values():
+        output.flush()
+    del outputs
+    return paths
+
+
+def decode_to_npz(records: RecordFile, var_info: List[list], out_path: str,
+                  chunk_records: int = DEFAULT_CHUNK_RECORDS, compress: bool = False) -> None:
+    """解码全部记录并保存为一个 .npz 文件, 每个变量一个数组"""
+    tmp_dir = tempfile.mkdtemp(prefix='record_decode_', dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        paths = decode_to_npy(records, var_info, tmp_dir, chunk_records)
+        arrays = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+        (np.savez_compressed if compress else np.savez)(out_path, **arrays)
+        del arrays
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='按已保存的变量定义解码定长二进制记录文件')
+    parser.add_argument('layout', help='config/data_define.json 中保存的定义名')
+    parser.add_argument('file', help='二进制记录文件')
+    parser.add_argument('--record-size', type=int, required=True, help='每条记录的字节数')
+    parser.add_argument('--header-offset', type=int, default=0, help='文件头字节数 (默认: %(default)s)')
+    parser.add_argument('--byteorder', choices=['little', 'big'], default='little', help='记录的字节序')
+    parser.add_argument('--bit-order', choices=['lsb0', 'msb0'], default='lsb0', help='位编号方式')
+    parser.add_argument('--define-file', default='data_define.json', help='config目录下的定义文件名')
+    parser.add_argument('--chunk-records', type=int, default=DEFAULT_CHUNK_RECORDS, help='每块处理的记录数')
+    out = parser.add_mutually_exclusive_group(required=True)
+    out.add_argument('--out', help='输出的 .npz 文件')
+    out.add_argument('--out-dir', help='输出目录, 每个变量一个 .npy 文件')
+    parser.add_argument('--compress', action='store_true', help='.npz 使用压缩')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    from variable_saver import VariableSaver
+
+    with contextlib.redirect_stdout(sys.stderr):
+        layout = VariableSaver(args.define_file).load_single(args.layout)
+    if not layout:
+        print(f"未找到变量定义: {args.layout}", file=sys.stderr)
+        return 1
+
+    records = RecordFile(args.file, args.record_size, args.header_offset, args.byteorder, args.bit_order)
+    if args.out:
+        decode_to_npz(records, layout, args.out, args.chunk_records, args.compress)
+    else:
+        decode_to_npy(records, layout, args.out_dir, args.chunk_records)
+    print(f"共解码 {len(records)} 条记录", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
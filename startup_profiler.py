@@ -0,0 +1,92 @@
+"""启动耗时分析
+
+设置环境变量 ERRORDECODE_PROFILE=1 后启动 main.py, 窗口显示后在控制台输出:
+每个模块的导入耗时(不含其导入的子模块)和每个界面组件的构造耗时.
+未设置时所有函数都是空操作, 不影响启动速度.
+
+用法:
+    ERRORDECODE_PROFILE=1 python main.py
+"""
+import builtins
+import contextlib
+import os
+import sys
+import time
+from typing import Dict, List
+
+ENABLED = os.environ.get('ERRORDECODE_PROFILE', '') not in ('', '0')
+# 导入耗时只显示最慢的前N个模块
+TOP_IMPORTS = 25
+
+# 开始分析的时间, 之后的时间都相对于它
+_start = time.perf_counter()
+# 模块名 -> [总耗时, 自身耗时]
+_imports: Dict[str, List[float]] = {}
+# (阶段名, 开始时间, 耗时)
+_sections: List[tuple] = []
+_original_import = builtins.__import__
+# 正在导入的模块栈, 每项为 [模块名, 子模块耗时]
+_stack: List[list] = []
+
+
+def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # 已导入的模块和相对导入不计时
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    frame = [name, 0.0]
+    _stack.append(frame)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        _stack.pop()
+        if _stack:
+            _stack[-1][1] += elapsed
+        total, own = _imports.get(name, (0.0, 0.0))
+        _imports[name] = [total + elapsed, own + elapsed - frame[1]]
+
+
+def install() -> None:
+    """开始记录之后的模块导入耗时, 应在导入其它模块之前调用"""
+    if ENABLED and builtins.__import__ is not _profiled_import:
+        builtins.__import__ = _profiled_import
+
+
+@contextlib.contextmanager
+def section(name: str):
+    """记录一段代码(如某个页面的构造)的耗时"""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _sections.append((name, start - _start, time.perf_counter() - start))
+
+
+def mark(name: str) -> None:
+    """记录一个时间点, 如窗口首次显示"""
+    if ENABLED:
+        _sections.append((name, time.perf_counter() - _start, 0.0))
+
+
+def report(file=None) -> None:
+    """输出导入和构造耗时, 并停止记录导入"""
+    if not ENABLED:
+        return
+    builtins.__import__ = _original_import
+    file = file or sys.stderr
+    print(f"启动耗时分析 (共 {(time.perf_counter() - _start) * 1000:.1f} ms)", file=file)
+
+    print("  模块导入 (自身耗时 / 含子模块耗时):", file=file)
+    ranked = sorted(_imports.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (total, own) in ranked[:TOP_IMPORTS]:
+        print(f"    {name:<36} {own * 1000:8.1f} ms {total * 1000:8.1f} ms", file=file)
+    print(f"    共导入 {len(_imports)} 个模块, 自身耗时合计 "
+          f"{sum(own for _, own in _imports.values()) * 1000:.1f} ms", file=file)
+
+    print("  组件构造 (开始时间 / 耗时):", file=file)
+    for name, start, elapsed in _sections:
+        print(f"    {name:<36} {start * 1000:8.1f} ms {elapsed * 1000:8.1f} ms", file=file)
@@ -0,0 +1,116 @@
+"""把 stream_decode 的asyncio事件循环接到Qt界面
+
+事件循环运行在单独的线程中, 读取和解码都不占用界面线程;
+界面用定时器按固定间隔取最新的值, 数据速率再高也不会堆积界面事件.
+"""
+import asyncio
+import threading
+from typing import Callable, List, Optional, Sequence
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+import stream_decode
+
+# 界面刷新间隔(毫秒)
+POLL_INTERVAL_MS = 100
+
+
+class StreamBridge(QObject):
+    """在后台线程中读取数据源, 在界面线程中发出最新值
+
+    Args:
+        urls: 数据源列表, 见 stream_decode
+        layout: 变量定义
+        framer_factory: 分帧器工厂, 默认按文本查找错误码
+        listen: TCP数据源是否作为服务端监听
+    """
+
+    # 最新的值, 距上次发出以来收到的值数量, 累计丢弃的值数量
+    received = pyqtSignal(object, int, int)
+    # 所有数据源结束, 参数为错误信息(正常结束时为空)
+    finished = pyqtSignal(str)
+
+    def __init__(self, urls: Sequence[str], layout: List[list], framer_factory: Optional[Callable] = None,
+                 listen: bool = False, parent=None):
+        super().__init__(parent)
+        self.urls = list(urls)
+        self.layout = layout
+        self.framer_factory = framer_factory or stream_decode.TextFramer
+        self.listen = listen
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.task: Optional[asyncio.Future] = None
+        self.thread: Optional[threading.Thread] = None
+        # stop() 可能早于后台线程建立事件循环, 由 _main 建立后检查
+        self._stopping = threading.Event()
+
+        # 后台线程写入, 界面线程读取
+        self._lock = threading.Lock()
+        self._latest = None
+        self._words = 0
+        self._dropped = 0
+        self._error = None
+        self._done = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(POLL_INTERVAL_MS)
+        self.timer.timeout.connect(self.poll)
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, name='stream-decode', daemon=True)
+        self.thread.start()
+        self.timer.start()
+
+    def stop(self) -> None:
+        """取消读取, 线程随后自行退出"""
+        # 先设置标志再读取事件循环: 要么这里取消任务, 要么 _main 建立任务后看到标志
+        self._stopping.set()
+        loop, task = self.loop, self.task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # 事件循环已经结束
+                pass
+
+    def _run(self) -> None:
+        error = ''
+        try:
+            asyncio.run(self._main())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        with self._lock:
+            self._error = error
+            self._done = True
+
+    async def _main(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        if self._stopping.is_set():
+            return
+        decoder = stream_decode.StreamDecoder(self.layout)
+        producer = asyncio.ensure_future(
+            stream_decode.run_sources(self.urls, decoder, self.framer_factory, self.listen))
+        try:
+            # 只保留每批的最后一个值, 界面按间隔显示
+            async for batch in decoder.iter_batches():
+                with self._lock:
+                    self._latest = batch.values[-1]
+                    self._words += len(batch.values)
+                    self._dropped = decoder.dropped
+        finally:
+            producer.cancel()
+        if not producer.cancelled():
+            producer.result()
+
+    def poll(self) -> None:
+        with self._lock:
+            latest, words, dropped = self._latest, self._words, self._dropped
+            self._words = 0
+            done, error = self._done, self._error
+        if words:
+            self.received.emit(latest, words, dropped)
+        if done:
+            self.timer.stop()
+            self.finished.emit(error or '')
@@ -0,0 +1,302 @@
+"""实时流解码, 基于asyncio, 不依赖PyQt5
+
+从TCP/UDP套接字、命名管道或pty/串口设备读取数据, 分帧得到错误码后按变量定义批量解码,
+结果以批为单位放入有界队列. 队列满时TCP/管道停止读取, 由内核缓冲区向发送端施加反压;
+UDP无法反压, 队列满时丢弃的值计入 dropped.
+
+数据源:
+    tcp://host:port                 连接到TCP服务端; listen=True 或加 ?listen 时在该地址监听, 接受任意个连接
+    udp://host:port                 在该地址接收UDP数据报, 每个数据报单独分帧
+    pipe:///path 或直接写路径        命名管道、pty或串口设备(仅Unix), 串口可加 ?baud=115200
+
+用法:
+    python decode_cli.py Hello --stream tcp://127.0.0.1:9000 --listen --format jsonl
+"""
+import asyncio
+import os
+import re
+import stat
+import sys
+from collections import namedtuple
+from typing import AsyncIterator, Callable, List, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+import decode_core
+
+# 默认匹配 0x 开头的16进制数或独立的10进制数, 与 decode_cli 相同
+DEFAULT_PATTERN = rb'0[xX][0-9a-fA-F]+|\b[0-9]+\b'
+# 队列中最多缓存的批数, 每批是一次读取到的全部值
+DEFAULT_QUEUE_SIZE = 64
+# 每次读取的最大字节数
+READ_SIZE = 1 << 16
+# 文本分帧时未遇到分隔符的最大缓存字节数, 超过后强制按已有内容分帧
+MAX_PENDING = 1 << 20
+# 文本分帧的分隔符, 数值不会跨越这些字符
+TEXT_SEPARATORS = (b'\n', b'\r', b' ', b'\t', b',', b';')
+
+# 一批解码结果: 数据源, 原始值列表, 变量名 -> 解码值列
+StreamBatch = namedtuple('StreamBatch', 'source values columns')
+
+
+class TextFramer:
+    """从文本流中查找错误码, 数值可能被拆分在两次读取之间, 最后一个分隔符之后的内容留到下次
+
+    Args:
+        pattern: bytes正则, 有分组时取第1个分组, 否则取整个匹配
+        base: 0表示按输入框规则自动判断进制, 否则为固定进制
+    """
+
+    def __init__(self, pattern: "re.Pattern[bytes]" = None, base: int = 0):
+        self.pattern = pattern if pattern is not None else re.compile(DEFAULT_PATTERN)
+        self.group = 1 if self.pattern.groups else 0
+        self.base = base
+        self.pending = b''
+
+    def feed(self, data: bytes) -> List[int]:
+        data = self.pending + data
+        cut = max(data.rfind(sep) for sep in TEXT_SEPARATORS) + 1
+        if cut == 0 and len(data) < MAX_PENDING:
+            self.pending = data
+            return []
+        if cut == 0:
+            cut = len(data)
+        self.pending = data[cut:]
+        return self.parse(data[:cut])
+
+    def flush(self) -> List[int]:
+        """数据源结束时处理剩余内容"""
+        data, self.pending = self.pending, b''
+        return self.parse(data)
+
+    def parse(self, data: bytes) -> List[int]:
+        values = []
+        group = self.group
+        base = self.base
+        for match in self.pattern.finditer(data):
+            try:
+                text = match.group(group).decode('ascii')
+                values.append(decode_core.parse_number(text) if base == 0 else int(text, base))
+            except (UnicodeDecodeError, ValueError):
+                continue
+        return values
+
+
+class BinaryFramer:
+    """定长二进制字, 每 word_size 个字节按 byteorder 组成一个值, 不足一个字的部分留到下次"""
+
+    # 字节数 -> memoryview.cast 使用的格式
+    NATIVE_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+    def __init__(self, word_size: int, byteorder: str = 'little'):
+        if word_size <= 0:
+            raise ValueError("字长必须大于0")
+        if byteorder not in ('little', 'big'):
+            raise ValueError(f"不支持的字节序: {byteorder}")
+        self.word_size = word_size
+        self.byteorder = byteorder
+        self.pending = b''
+        # 字节序与本机相同且字长为1/2/4/8时直接按本机整数读取整块数据
+        self.native_format = self.NATIVE_FORMATS.get(word_size) if byteorder == sys.byteorder else None
+
+    def feed(self, data: bytes) -> List[int]:
+        if self.pending:
+            data = self.pending + data
+        usable = len(data) - len(data) % self.word_size
+        self.pending = data[usable:]
+        if self.native_format is not None:
+            return memoryview(data)[:usable].cast(self.native_format).tolist()
+        size = self.word_size
+        order = self.byteorder
+        from_bytes = int.from_bytes
+        return [from_bytes(data[i:i + size], order) for i in range(0, usable, size)]
+
+    def flush(self) -> List[int]:
+        # 不完整的字直接丢弃
+        self.pending = b''
+        return []
+
+
+class StreamDecoder:
+    """批量解码并放入有界队列, 需在事件循环中创建
+
+    Args:
+        layout: 变量定义, 同 decode_core.assign_bits_to_variables
+        queue_size: 队列最多缓存的批数
+    """
+
+    def __init__(self, layout: List[list], queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.layout = layout
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        # 统计: 收到的字节数, 解码的值数量, 批数, 队列满时丢弃的值数量
+        self.bytes = 0
+        self.words = 0
+        self.batches = 0
+        self.dropped = 0
+
+    def decode(self, source: str, values: List[int]) -> StreamBatch:
+        return StreamBatch(source, values, decode_core.decode_batch(values, self.layout))
+
+    async def put(self, source: str, values: List[int]) -> None:
+        """解码后放入队列, 队列满时等待(反压)"""
+        batch = self.decode(source, values)
+        await self.queue.put(batch)
+        self.words += len(values)
+        self.batches += 1
+
+    def put_nowait(self, source: str, values: List[int]) -> bool:
+        """解码后放入队列, 队列满时丢弃并返回False"""
+        if self.queue.full():
+            self.dropped += len(values)
+            return False
+        self.queue.put_nowait(self.decode(source, values))
+        self.words += len(values)
+        self.batches += 1
+        return True
+
+    async def iter_batches(self) -> AsyncIterator[StreamBatch]:
+        """逐批取出解码结果, 直到收到 run_sources 放入的结束标记"""
+        while True:
+            batch = await self.queue.get()
+            if batch is None:
+                return
+            yield batch
+
+
+async def read_stream(reader: asyncio.StreamReader, source: str, framer,
+                      decoder: StreamDecoder) -> None:
+    """从StreamReader读取直到EOF"""
+    while True:
+        data = await reader.read(READ_SIZE)
+        if not data:
+            break
+        decoder.bytes += len(data)
+        values = framer.feed(data)
+        if values:
+            await decoder.put(source, values)
+    values = framer.flush()
+    if values:
+        await decoder.put(source, values)
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, framer_factory: Callable, decoder: StreamDecoder):
+        self.framer_factory = framer_factory
+        self.decoder = decoder
+
+    def datagram_received(self, data, addr):
+        self.decoder.bytes += len(data)
+        framer = self.framer_factory()
+        values = framer.feed(data) + framer.flush()
+        if values:
+            self.decoder.put_nowait(f"udp://{addr[0]}:{addr[1]}", values)
+
+
+def open_device(path: str, baud: Optional[int] = None):
+    """以非阻塞方式打开命名管道或tty设备, tty设置为原始模式"""
+    flags = os.O_NONBLOCK | getattr(os, 'O_NOCTTY', 0)
+    # 命名管道以读写方式打开, 没有写入方或写入方断开时不会读到EOF
+    flags |= os.O_RDWR if stat.S_ISFIFO(os.stat(path).st_mode) else os.O_RDONLY
+    fd = os.open(path, flags)
+    if os.isatty(fd):
+        import termios
+        import tty
+        tty.setraw(fd)
+        if baud:
+            attrs = termios.tcgetattr(fd)
+            speed = getattr(termios, f'B{baud}')
+            attrs[4] = attrs[5] = speed
+            termios.tcsetattr(fd, termios.TCSANOW, attrs)
+    return os.fdopen(fd, 'rb', buffering=0)
+
+
+async def open_source(url: str, decoder: StreamDecoder, framer_factory: Callable,
+                      listen: bool = False, ready: Optional[asyncio.Event] = None) -> None:
+    """读取一个数据源, 数据源结束时返回; 监听模式和UDP会一直运行直到被取消
+
+    Args:
+        url: 数据源, 见模块说明
+        decoder: 解码结果放入的队列
+        framer_factory: 为每个连接/数据报创建分帧器
+        listen: TCP数据源是否作为服务端监听
+        ready: 开始监听/连接成功后设置, 便于测试时确定何时可以发送数据
+    """
+    parts = urlsplit(url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    listen = listen or 'listen' in query
+    loop = asyncio.get_running_loop()
+
+    if parts.scheme == 'tcp' and listen:
+        async def handle(reader, writer):
+            peer = writer.get_extra_info('peername')
+            try:
+                await read_stream(reader, f"tcp://{peer[0]}:{peer[1]}", framer_factory(), decoder)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, parts.hostname, parts.port, limit=READ_SIZE)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+    elif parts.scheme == 'tcp':
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port, limit=READ_SIZE)
+        if ready is not None:
+            ready.set()
+        try:
+            await read_stream(reader, url, framer_factory(), decoder)
+        finally:
+            writer.close()
+
+    elif parts.scheme == 'udp':
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramProtocol(framer_factory, decoder), local_addr=(parts.hostname, parts.port))
+        if ready is not None:
+            ready.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            transport.close()
+
+    elif parts.scheme in ('', 'pipe', 'serial', 'file'):
+        baud = query.get('baud')
+        device = open_device(parts.path, int(baud[0]) if baud and baud[0] else None)
+        reader = asyncio.StreamReader(limit=READ_SIZE)
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), device)
+        if ready is not None:
+            ready.set()
+        try:
+            await read_stream(reader, url, framer_factory(), decoder)
+        finally:
+            transport.close()
+
+    else:
+        raise ValueError(f"不支持的数据源: {url}")
+
+
+async def run_sources(urls: Sequence[str], decoder: StreamDecoder, framer_factory: Callable,
+                      listen: bool = False, ready: Optional[asyncio.Event] = None) -> None:
+    """同时读取多个数据源, 全部结束(或被取消)后放入结束标记
+
+    正常结束或出错时等待队列有空位再放入结束标记, 已解码的批不会丢失;
+    被取消时不能再等待, 队列满则丢弃最早的一批并计入 dropped.
+    """
+    cancelled = False
+    try:
+        await asyncio.gather(*(open_source(url, decoder, framer_factory, listen, ready) for url in urls))
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        if cancelled:
+            if decoder.queue.full():
+                decoder.dropped += len(decoder.queue.get_nowait().values)
+            decoder.queue.put_nowait(None)
+        else:
+            await decoder.queue.put(None)
+
+
+def is_stream_url(text: str) -> bool:
+    """是否为网络/设备数据源, 界面输入框据此区分数值和数据源"""
+    return text.startswith(('tcp://', 'udp://', 'pipe://', 'serial://'))
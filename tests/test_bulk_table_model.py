@@ -0,0 +1,57 @@
+"""bulk_table_model: 筛选条件先按含义名称匹配, 再按数字解析; 排序保留输入顺序"""
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from PyQt5.QtCore import Qt  # noqa: E402
+
+from bulk_table_model import BulkDecodeModel  # noqa: E402
+from decode_worker import SYMBOL_HEADER_SUFFIX, BulkDecodeTask  # noqa: E402
+
+# 含义名称 BAD/ACE 同时也是合法的16进制数
+LAYOUT = [['state', 12, None, {'0': 'IDLE', '2': 'BAD', str(0xACE): 'ACE'}], ['level', 4]]
+
+
+def make_model(text: str) -> BulkDecodeModel:
+    result = BulkDecodeTask(text, LAYOUT).compute()
+    model = BulkDecodeModel()
+    model.set_result(result.values, result.headers, result.columns, result.symbol_columns)
+    return model
+
+
+def shown(model: BulkDecodeModel) -> list:
+    return [model.data(model.index(row, 0)) for row in range(model.rowCount())]
+
+
+def test_filter_prefers_symbol_names():
+    model = make_model('0x0 0x2 0xBAD 0xACE 0x1002')
+    assert model.headers == ['state', 'state' + SYMBOL_HEADER_SUFFIX, 'level']
+    model.set_filter('state=BAD')
+    assert shown(model) == ['0x2', '0x1002']
+    model.set_filter('state=0xBAD')
+    assert shown(model) == ['0xBAD']
+    # 数值和含义名称指向同一个值
+    model.set_filter('state=ACE')
+    assert shown(model) == ['0xACE']
+    model.set_filter('state=2 level=1')
+    assert shown(model) == ['0x1002']
+    model.set_filter('')
+    assert model.rowCount() == 5
+
+
+def test_filter_errors():
+    model = make_model('1 2 3')
+    with pytest.raises(ValueError):
+        model.set_filter('nope=1')
+    # 既不是含义名称也不是数字
+    with pytest.raises(ValueError):
+        model.set_filter('state=BUSY')
+    with pytest.raises(ValueError):
+        model.set_filter('level=BAD2Z')
+
+
+def test_sort_keeps_filter():
+    model = make_model('0x1002 0x2 0x0 0x3002')
+    model.set_filter('state=BAD')
+    model.sort(model.column_index('level'), Qt.DescendingOrder)
+    assert shown(model) == ['0x3002', '0x1002', '0x2']
@@ -0,0 +1,121 @@
+"""c_struct_parser: 位域起始位, 联合体, 数组, #define 常量, 枚举含义, 前向声明, 解析缓存和语法错误"""
+import pytest
+
+import c_struct_parser
+
+HEADER = """
+#define MODE_BITS (2 + 1)
+#define MODE_IDLE 0
+#define MODE_FAST 3
+typedef enum color { RED, GREEN = 4, BLUE } color_t;   /* BLUE 紧接 GREEN */
+typedef union {
+    unsigned int raw;
+    struct { unsigned int lo : 16; unsigned int hi : 16; } parts;
+} word_t;
+typedef struct {
+    unsigned mode : MODE_BITS;
+    color_t color : 3;
+    unsigned : 2;
+    unsigned char bytes[2];
+    word_t w;
+    unsigned flags : 1 << 1;   // 常量表达式位宽
+} reg_t;
+"""
+
+
+def fields(text: str, name: str = None, **options):
+    return [(field.name, field.offset, field.width)
+            for field in c_struct_parser.parse_header(text, **options).fields(name)]
+
+
+def test_bitfield_offsets():
+    assert fields("struct s { unsigned a : 3; unsigned b : 5; unsigned : 4; unsigned c : 1; };") == [
+        ('a', 0, 3), ('b', 3, 5), ('c', 12, 1)]
+    # 按ABI对齐时位域不跨越声明类型的存储单元
+    assert fields("struct s { unsigned char a : 6; unsigned char b : 4; };", packed=False) == [('a', 0, 6), ('b', 8, 4)]
+    assert fields("struct s { unsigned char a : 6; unsigned char b : 4; };") == [('a', 0, 6), ('b', 6, 4)]
+
+
+def test_nested_union_array_and_defines():
+    info = c_struct_parser.parse_header(HEADER)
+    assert info.record_names == ['word_t', 'reg_t']
+    assert info.default_name == 'reg_t'
+    assert info.defines == {'MODE_BITS': 3, 'MODE_IDLE': 0, 'MODE_FAST': 3}
+    assert info.constants == {'RED': 0, 'GREEN': 4, 'BLUE': 5}
+    assert fields(HEADER) == [
+        ('mode', 0, 3), ('color', 3, 3),
+        ('bytes[0]', 8, 8), ('bytes[1]', 16, 8),
+        # 联合体的成员起始位相同
+        ('w.raw', 24, 32), ('w.parts.lo', 24, 16), ('w.parts.hi', 40, 16),
+        ('flags', 56, 2),
+    ]
+    assert fields(HEADER, 'word_t') == [('raw', 0, 32), ('parts.lo', 0, 16), ('parts.hi', 16, 16)]
+    assert info.types['word_t'].bits == 32
+
+
+def test_layout_with_symbol_maps():
+    result = c_struct_parser.parse_layout(HEADER)
+    assert result.name == 'reg_t'
+    assert result.var_info == [
+        # #define 常量按变量名前缀匹配, MODE_BITS 是位宽不作为含义
+        ['mode', 3, None, {'0': 'MODE_IDLE', '3': 'MODE_FAST'}],
+        ['color', 3, None, {'0': 'RED', '4': 'GREEN', '5': 'BLUE'}],
+        ['bytes[0]', 8, 8], ['bytes[1]', 8],
+        ['w.raw', 32], ['w.parts.lo', 16, 24], ['w.parts.hi', 16],
+        ['flags', 2],
+    ]
+    plain = c_struct_parser.parse_layout(HEADER, value_names=False)
+    assert [var[:2] for var in plain.var_info] == [var[:2] for var in result.var_info]
+    assert all(len(var) <= 3 for var in plain.var_info)
+
+
+def test_forward_declaration():
+    text = "struct fwd;\ntypedef struct fwd fwd_t;\nstruct s { fwd_t *next; unsigned a : 1; };\n"
+    info = c_struct_parser.parse_header(text)
+    assert not info.types['fwd_t'].complete
+    assert fields(text, 's') == [('next', 0, 64), ('a', 64, 1)]
+    with pytest.raises(c_struct_parser.CParseError):
+        info.fields('fwd_t')
+    # 按值包含未定义的结构体无法计算大小
+    with pytest.raises(c_struct_parser.CParseError):
+        fields("struct fwd; struct s { struct fwd inner; unsigned a : 1; };", 's')
+
+
+def test_cache_hit_for_same_content():
+    text = HEADER + "\nstruct cache_probe { unsigned x : 1; };\n"
+    before = c_struct_parser.cache_info()
+    assert not c_struct_parser.is_cached(text)
+    info = c_struct_parser.parse_header(text)
+    assert c_struct_parser.is_cached(text)
+    assert c_struct_parser.parse_header(text) is info
+    after = c_struct_parser.cache_info()
+    assert after['misses'] == before['misses'] + 1
+    assert after['hits'] == before['hits'] + 1
+    # 选项不同时分别缓存
+    assert c_struct_parser.parse_header(text, packed=False) is not info
+    # 内容改变后重新解析
+    assert c_struct_parser.parse_header(text + " ") is not info
+
+
+@pytest.mark.parametrize('text', [
+    "struct a { unsigned x : 3 unsigned y : 2; };",   # 位域后缺少 ;
+    "struct a { unsigned x : ; };",
+    "struct a { int x[ ; };",
+    "struct a { unsigned x : 3;",
+    "struct a { unsigned x : UNKNOWN_WIDTH; };",
+])
+def test_parse_errors(text):
+    with pytest.raises(c_struct_parser.CParseError):
+        c_struct_parser.parse_header(text)
+    assert not c_struct_parser.is_cached(text)
+
+
+def test_missing_struct_name():
+    with pytest.raises(c_struct_parser.CParseError):
+        c_struct_parser.parse_layout(HEADER, name='nope')
+
+
+def test_needs_full_parser():
+    assert not c_struct_parser.needs_full_parser("struct a { unsigned x : 3; // note\n } a_t;")
+    assert c_struct_parser.needs_full_parser(HEADER)
+    assert c_struct_parser.needs_full_parser("struct a { unsigned x[2]; };")
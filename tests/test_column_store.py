@@ -0,0 +1,99 @@
+"""column_store: 写入读回, 文件尾元数据, 整数与列表条件, 超出列取值范围的条件值"""
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import column_store  # noqa: E402
+import decode_core  # noqa: E402
+
+LAYOUT = [['a', 4], ['b', 8], ['state', 2, 20]]
+VALUES = [0x0, 0x12C5, 0x1002C3, 0x2FFFFF, 1 << 63 | 0x1003, 0xDEADBEEFDEADBEEFDEADBEEF]
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / 'a.edcol')
+    with column_store.ColumnStoreWriter(path, LAYOUT, 'Hello', ['a.log']) as writer:
+        writer.append_values(VALUES[:3])
+        writer.append_values(VALUES[3:])
+    return path
+
+
+def test_round_trip(store_path):
+    store = column_store.ColumnStore(store_path)
+    expected = decode_core.decode_batch(VALUES, LAYOUT)
+    assert len(store) == len(VALUES)
+    assert store.names == ['a', 'b', 'state']
+    for name in store.names:
+        assert store[name].dtype == decode_core.field_dtype(dict((v[0], v[1]) for v in LAYOUT)[name])
+        assert store[name].tolist() == expected[name]
+    # 原始值列保存低64位
+    assert store.raw.tolist() == [value & decode_core.UINT64_MASK for value in VALUES]
+    assert list(store.rows([1])) == [[1, '0x12C5', 5, 0x2C, 0]]
+    # 文件中其它部分没有被临时文件残留
+    assert os.listdir(os.path.dirname(store_path)) == ['a.edcol']
+
+
+def test_footer(store_path, tmp_path):
+    store = column_store.ColumnStore(store_path)
+    metadata = store.metadata
+    assert metadata['count'] == len(VALUES)
+    assert metadata['layout'] == LAYOUT and metadata['layout_name'] == 'Hello' and metadata['source'] == ['a.log']
+    assert metadata['fingerprint'] == decode_core.layout_fingerprint(LAYOUT)
+    for entry in metadata['columns']:
+        assert entry['offset'] % column_store.ALIGNMENT == 0
+
+    data = (tmp_path / 'a.edcol').read_bytes()
+    footer_size = int.from_bytes(data[-16:-8], 'little')
+    assert json.loads(data[-16 - footer_size:-16]) == metadata
+
+    broken = tmp_path / 'broken.edcol'
+    for content in (b'not a store' * 4, data[:-1], data[:8] + (10 ** 6).to_bytes(8, 'little') + data[-8:]):
+        broken.write_bytes(content)
+        with pytest.raises(ValueError):
+            column_store.ColumnStore(str(broken))
+
+
+def test_empty_store(tmp_path):
+    path = str(tmp_path / 'empty.edcol')
+    column_store.ColumnStoreWriter(path, LAYOUT).close()
+    store = column_store.ColumnStore(path)
+    assert len(store) == 0 and store['a'].tolist() == []
+    assert store.where({'a': [1, 2]}).tolist() == []
+
+
+def test_conditions(store_path):
+    store = column_store.ColumnStore(store_path)
+    assert store.where({'a': 5}).tolist() == [1]
+    assert store.where({'b': 0x2C}).tolist() == [1, 2]
+    assert store.where({'b': [0x2C, 0xFF], 'state': 1}).tolist() == [2]
+    assert store.where({'a': (3, 15)}).tolist() == [2, 3, 4, 5]
+    assert store.where({}).tolist() == list(range(len(VALUES)))
+    with pytest.raises(KeyError):
+        store.where({'missing': 1})
+    assert column_store.parse_conditions('a=1 b=0x2C,3') == {'a': 1, 'b': [0x2C, 3]}
+    with pytest.raises(ValueError):
+        column_store.parse_conditions('a')
+
+
+def test_out_of_range_conditions(store_path):
+    store = column_store.ColumnStore(store_path)
+    # 300 不能截断成 44(0x2C) 去匹配 uint8 列
+    assert store.where({'b': 300}).tolist() == []
+    assert store.where({'b': [300]}).tolist() == []
+    assert store.where({'b': [300, 0x2C]}).tolist() == [1, 2]
+    assert store.where({'b': [-1, 1 << 70]}).tolist() == []
+    assert store.where({'b': -1}).tolist() == []
+    assert store.where({'b': []}).tolist() == []
+
+
+def test_cli_query(store_path, capsys):
+    assert column_store.main(['query', store_path, 'b=300,-1', '--count']) == 0
+    assert capsys.readouterr().out.strip() == '0'
+    assert column_store.main(['query', store_path, 'b=0x2C', '--format', 'jsonl']) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [row['index'] for row in rows] == [1, 2]
+    assert column_store.main(['query', store_path, 'nope=1']) == 1
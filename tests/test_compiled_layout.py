@@ -0,0 +1,48 @@
+"""compile_layout: 编译的解码函数与 assign_bits_to_variables 结果一致, 解码计划按次数决定何时编译"""
+import random
+
+import pytest
+
+import decode_core
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_generic_decoder(seed):
+    rng = random.Random(seed)
+    layout = []
+    for i in range(rng.randint(1, 12)):
+        var = [rng.choice([f'f{i}', 'dup', "it's"]), rng.randint(1, 40)]
+        if rng.random() < 0.2:
+            var.append(rng.randrange(64))
+        layout.append(var)
+    compiled = decode_core.CompiledLayout(layout)
+    for _ in range(20):
+        value = rng.getrandbits(decode_core.layout_bits(layout) + 3)
+        expected = decode_core.assign_bits_to_variables(value, layout)
+        assert compiled.decode_dict(value) == expected
+        assert list(compiled.decode(value)) == [value >> offset & ((1 << width) - 1)
+                                                for _, offset, width in decode_core.field_offsets(layout)]
+        assert tuple(compiled.decode_record(value)) == compiled.decode(value)
+
+
+def test_cached_layout_does_not_compile():
+    layout = [['only_here', 7], ['x', 3]]
+    assert decode_core.cached_layout(layout) is None
+    compiled = decode_core.compile_layout(layout)
+    assert decode_core.cached_layout([['only_here', 7], ['x', 3]]) is compiled
+
+
+def test_field_plan_compiles_after_threshold():
+    pytest.importorskip('PyQt5')
+    from decode_table_model import FieldPlan
+
+    layout = [['plan_a', 5], ['plan_b', 11, 20]]
+    plan = FieldPlan(layout)
+    assert plan.compiled is None
+    for number in range(decode_core.COMPILE_AFTER):
+        assert plan.values(number << 15) == [number << 15 & 0x1F, number >> 5 & 0x7FF]
+    assert plan.compiled is None
+    assert plan.values(0xFFFFFFFF) == [0x1F, 0x7FF]
+    assert plan.compiled is decode_core.cached_layout(layout)
+    # 已经编译过的定义, 新的计划直接使用
+    assert FieldPlan(layout).compiled is plan.compiled
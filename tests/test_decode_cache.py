@@ -0,0 +1,61 @@
+"""decode_cache: 缓存命中, 定义改变后不取旧结果, 旧定义的缓存项被淘汰"""
+import decode_core
+import definition_store
+from decode_cache import DecodeCache
+from variable_saver import VariableSaver
+
+HELLO = [['a', 4], ['b', 12]]
+
+
+def make_saver(tmp_path) -> VariableSaver:
+    return VariableSaver(store=definition_store.JsonDefinitionStore(str(tmp_path / 'defs.json')))
+
+
+def test_hits_and_shared_results():
+    cache = DecodeCache(maxsize=2)
+    layout = cache.layout(HELLO)
+    first = layout.decode(0x1234)
+    assert dict(first) == {name: tuple(item) for name, item in
+                           decode_core.assign_bits_to_variables(0x1234, HELLO).items()}
+    assert layout.decode(0x1234) is first
+    assert layout.decode_values(0x1234) == (4, 0x123)
+    layout.decode(1)
+    layout.decode(2)
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 3, 1)
+    assert len(cache.entries) == 2
+
+
+def test_changed_definition_does_not_reuse_results(tmp_path):
+    saver = make_saver(tmp_path)
+    cache = DecodeCache()
+    saver.save('Hello', HELLO)
+    old = cache.layout(saver.load()['Hello'])
+    assert old.decode_values(0x1234) == (4, 0x123)
+
+    # 重新保存为不同的内容后, 以新定义创建的解码器按新定义解码, 不取旧结果
+    saver.save('Hello', [['a', 8], ['b', 8]])
+    new = cache.layout(saver.load()['Hello'])
+    assert new.fingerprint != old.fingerprint
+    assert new.decode_values(0x1234) == (0x34, 0x12)
+    # 仍持有的旧解码器继续按它自己的定义解码, 两者的缓存项互不影响
+    assert old.decode_values(0x1234) == (4, 0x123)
+    assert new.decode_values(0x1234) == (0x34, 0x12)
+    assert set(cache.entries) == {(old.fingerprint, 0x1234), (new.fingerprint, 0x1234)}
+
+    # 内容相同的定义共享缓存项
+    same = cache.layout([['a', 8], ['b', 8]])
+    misses = cache.misses
+    assert same.decode(0x1234) is new.decode(0x1234)
+    assert cache.misses == misses
+
+
+def test_stale_entries_are_evicted():
+    cache = DecodeCache(maxsize=3)
+    old = cache.layout(HELLO)
+    for value in range(3):
+        old.decode(value)
+    new = cache.layout([['a', 16]])
+    for value in range(3):
+        new.decode(value)
+    assert all(key[0] == new.fingerprint for key in cache.entries)
+    assert cache.evictions == 3
@@ -0,0 +1,78 @@
+"""decode_cli: mmap与按行读取的查找结果一致, 管道输入, 文件不存在时的返回值"""
+import contextlib
+import io
+import os
+import re
+import threading
+
+import pytest
+
+import decode_cli
+from variable_saver import VariableSaver
+
+PATTERN = re.compile(decode_cli.DEFAULT_PATTERN.encode('utf-8'))
+TEXT = b'0x1234 7\nerr=0x40001234, code 12\r\n\nzz 0xFFFFFFFFFFFFFFFFFF 99'
+
+
+def pipe_path(data: bytes) -> str:
+    """把数据写入管道, 返回读端的 /dev/fd 路径"""
+    read_fd, write_fd = os.pipe()
+
+    def write():
+        with os.fdopen(write_fd, 'wb') as f:
+            f.write(data)
+
+    threading.Thread(target=write, daemon=True).start()
+    return f'/dev/fd/{read_fd}'
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / 'a.log'
+    path.write_bytes(TEXT)
+    return str(path)
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/fd'), reason='需要 /dev/fd')
+def test_pipe_matches_mmap(log_file):
+    expected = list(decode_cli.iter_codes(log_file, PATTERN))
+    assert [value for _, value in expected] == [0x1234, 7, 0x40001234, 12, 0xFFFFFFFFFFFFFFFFFF, 99]
+    path = pipe_path(TEXT)
+    try:
+        assert list(decode_cli.iter_codes(path, PATTERN)) == expected
+    finally:
+        os.close(int(path.rsplit('/', 1)[1]))
+
+
+@pytest.mark.parametrize('start, end', [(0, None), (3, 20), (9, 10), (10, 34), (40, len(TEXT))])
+def test_line_reading_respects_range(log_file, start, end):
+    expected = list(decode_cli.iter_codes(log_file, PATTERN, start=start, end=end))
+    with open(log_file, 'rb') as f:
+        actual = list(decode_cli._iter_line_codes(f, PATTERN, 0, 0, start, end))
+    assert actual == expected
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.log'
+    path.write_bytes(b'')
+    assert list(decode_cli.iter_codes(str(path), PATTERN)) == []
+
+
+def test_missing_file(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    os.mkdir('config')
+    VariableSaver('data_define.json').save('Hello', [['a', 4], ['b', 12]])
+    capsys.readouterr()
+    assert decode_cli.main(['Hello', str(tmp_path / 'missing.log')]) == 1
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert err.strip().count('\n') == 0 and 'missing.log' in err
+    with pytest.raises(FileNotFoundError):
+        list(decode_cli.iter_codes(str(tmp_path / 'missing.log'), PATTERN))
+
+
+def test_write_rows_uses_current_stdout():
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        assert decode_cli.write_rows(iter([[1, 'x']]), ['index', 'name'], 'jsonl') == 1
+    assert buffer.getvalue() == '{"index": 1, "name": "x"}\n'
@@ -0,0 +1,165 @@
+"""decode_server: 在本机随机端口启动服务, 通过真实的TCP连接发送HTTP请求"""
+import asyncio
+import contextlib
+import json
+
+import decode_core
+import decode_server
+import definition_store
+from variable_saver import VariableSaver
+
+HELLO = [['a', 4], ['b', 12], ['state', 2, 30, {'0': 'STATE_IDLE', '1': 'STATE_RUN'}]]
+
+
+@contextlib.asynccontextmanager
+async def running_service(tmp_path):
+    saver = VariableSaver(store=definition_store.JsonDefinitionStore(str(tmp_path / 'defs.json')))
+    saver.store.put_many({'Hello': HELLO})
+    service = decode_server.DecodeService(saver)
+    ready = asyncio.get_running_loop().create_future()
+    task = asyncio.ensure_future(service.serve('127.0.0.1', 0, ready))
+    host, port = await ready
+    try:
+        yield service, host, port
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+def request(method: str, path: str, body=None, headers: str = '') -> bytes:
+    data = b'' if body is None else body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    return (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n{headers}"
+            f"Content-Length: {len(data)}\r\n\r\n").encode('latin-1') + data
+
+
+async def read_response(reader):
+    """返回 (状态码, 请求头, JSON响应体)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, headers, json.loads(body)
+
+
+async def call(host, port, *payloads):
+    """在同一个连接上一次发出全部请求(流水线), 按顺序读取响应"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(b''.join(payloads))
+        await writer.drain()
+        return [await read_response(reader) for _ in payloads]
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def test_decode_columns_records_and_symbols(tmp_path):
+    values = [0x40001234, 4660, 0xDEADBEEFDEADBEEFDEADBEEF]
+
+    async def run():
+        async with running_service(tmp_path) as (_, host, port):
+            body = {'layout': 'Hello', 'values': ['0x40001234', 4660, 'zz', -1], 'text': '0xDEADBEEFDEADBEEFDEADBEEF',
+                    'symbols': True}
+            records = {'layout': 'Hello', 'values': values, 'format': 'records'}
+            return await call(host, port, request('POST', '/decode', body), request('POST', '/decode', records))
+
+    (status, _, result), (records_status, _, records) = asyncio.run(run())
+    assert status == 200
+    assert result['count'] == 3
+    assert result['invalid'] == ['zz', '-1']
+    assert result['values'] == [f"0x{value:X}" for value in values]
+    assert result['columns'] == decode_core.decode_batch(values, HELLO)
+    assert result['symbols'] == {'state': ['STATE_RUN', 'STATE_IDLE', None]}
+    assert records_status == 200
+    expected = decode_core.decode_batch(values, HELLO)
+    assert [record['a'] for record in records['records']] == expected['a']
+    assert records['records'][0]['value'] == '0x40001234'
+
+
+def test_delta(tmp_path):
+    async def run():
+        async with running_service(tmp_path) as (_, host, port):
+            body = {'layout': 'Hello', 'values': ['0x1', '0x1', '0x40000011'], 'previous': '0x0'}
+            return await call(host, port, request('POST', '/delta', body))
+
+    [(status, _, result)] = asyncio.run(run())
+    assert status == 200
+    assert result['last'] == '0x40000011'
+    assert result['changes'] == [
+        {'index': 0, 'value': '0x1', 'fields': {'a': [0, 1]}},
+        {'index': 2, 'value': '0x40000011', 'fields': {'b': [0, 1], 'state': [0, 1]}},
+    ]
+
+
+def test_keep_alive_and_pipelining(tmp_path):
+    batches = [[i, i << 4, i << 30] for i in range(20)]
+
+    async def run():
+        async with running_service(tmp_path) as (service, host, port):
+            reader, writer = await asyncio.open_connection(host, port)
+            # 逐个请求: 同一连接上等到响应后再发下一个
+            sequential = []
+            for batch in batches[:3]:
+                writer.write(request('POST', '/decode', {'layout': 'Hello', 'values': batch}))
+                sequential.append(await read_response(reader))
+            # 流水线: 一次发出全部请求
+            writer.write(b''.join(request('POST', '/decode', {'layout': 'Hello', 'values': batch}) for batch in batches))
+            pipelined = [await read_response(reader) for _ in batches]
+            # Connection: close 的请求响应后服务端关闭连接
+            writer.write(request('GET', '/health', headers='Connection: close\r\n'))
+            last = await read_response(reader)
+            closed = await reader.read() == b''
+            writer.close()
+            return sequential, pipelined, last, closed, service.connections
+
+    sequential, pipelined, last, closed, connections = asyncio.run(run())
+    for (status, headers, result), batch in zip(sequential + pipelined, batches[:3] + batches):
+        assert status == 200
+        assert headers['connection'] == 'keep-alive'
+        assert result['columns'] == decode_core.decode_batch(batch, HELLO)
+    assert last[0] == 200 and last[1]['connection'] == 'close'
+    assert closed
+    assert connections == 1
+
+
+def test_error_statuses(tmp_path):
+    async def run():
+        async with running_service(tmp_path) as (service, host, port):
+            responses = await call(
+                host, port,
+                request('GET', '/nothing'),
+                request('GET', '/decode'),
+                request('POST', '/decode', {'layout': 'Missing', 'values': [1]}),
+                request('POST', '/decode', b'{not json'),
+                request('POST', '/decode', [1, 2]),
+                request('POST', '/decode', {'layout': 'Hello', 'values': 'abc'}),
+                request('POST', '/decode', {'layout': 'Hello', 'values': [1], 'format': 'xml'}),
+                request('GET', '/layouts/Hello'),
+                request('GET', '/metrics'),
+            )
+            # 无法继续读取的请求: 响应后关闭连接
+            fatal = []
+            for payload in (b'POST /decode HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n',
+                            b'POST /decode HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n',
+                            b'BROKEN\r\n\r\n'):
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(payload)
+                fatal.append((await read_response(reader))[0])
+                writer.close()
+            return responses, fatal
+
+    responses, fatal = asyncio.run(run())
+    statuses = [status for status, _, _ in responses]
+    assert statuses == [404, 405, 404, 400, 400, 400, 400, 200, 200]
+    assert all('error' in result for status, _, result in responses if status != 200)
+    assert responses[7][2]['definition'] == HELLO
+    endpoints = responses[8][2]['endpoints']
+    assert endpoints['/decode']['requests'] == 6
+    assert endpoints['/decode']['errors'] == 6
+    assert fatal == [411, 413, 400]
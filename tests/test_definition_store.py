@@ -0,0 +1,51 @@
+"""definition_store: 修改读出的定义或写入后修改传入的列表不影响已保存的内容, JSON缓存命中"""
+import pytest
+
+import definition_store
+
+
+def hello() -> list:
+    return [['a', 4, None, {'1': 'ON'}], ['b', 12]]
+
+
+@pytest.fixture(params=['.json', '.db'])
+def store(request, tmp_path):
+    store = definition_store.open_store(str(tmp_path / ('defs' + request.param)))
+    yield store
+    store.close()
+
+
+def test_returned_definitions_are_copies(store):
+    store.put('Hello', hello())
+    loaded = store.get('Hello')
+    loaded[0][1] = 99
+    loaded[0][3]['2'] = 'OFF'
+    loaded.append(['c', 1])
+    everything = store.load_all()
+    everything['Hello'][1][0] = 'renamed'
+    everything['Other'] = []
+    assert store.get('Hello') == hello()
+    assert store.load_all() == {'Hello': hello()}
+    assert store.names() == ['Hello']
+
+
+def test_put_does_not_keep_callers_lists(store):
+    layout = hello()
+    store.put('Hello', layout)
+    layout[1][1] = 1
+    items = {'World': [['x', 8]]}
+    store.put_many(items)
+    items['World'][0][1] = 2
+    assert store.get('Hello') == hello()
+    assert store.get('World') == [['x', 8]]
+
+
+def test_json_cache_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'defs.json')
+    definition_store.JsonDefinitionStore(path).write_all({'Hello': hello()})
+    reader = definition_store.JsonDefinitionStore(path)
+    first = reader.get('Hello')
+    second = reader.get('Hello')
+    # 写入后缓存已更新, 读取不重新解析文件, 但每次返回新的副本
+    assert (reader.cache_hits, reader.cache_misses) == (2, 0)
+    assert first == second == hello() and first is not second
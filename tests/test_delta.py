@@ -0,0 +1,100 @@
+"""DeltaIndex: 变化检测与逐变量比较一致, 包括有空隙、带起始位和联合体(重叠)的定义"""
+import random
+
+import pytest
+
+import decode_core
+
+
+def brute_force(old: int, new: int, var_info):
+    changes = []
+    for i, (name, offset, width) in enumerate(decode_core.field_offsets(var_info)):
+        mask = (1 << width) - 1
+        before, after = (old >> offset) & mask, (new >> offset) & mask
+        if before != after:
+            changes.append(decode_core.FieldChange(i, name, before, after))
+    return changes
+
+
+def random_layout(rng: random.Random):
+    layout = []
+    offset = 0
+    for i in range(rng.randint(1, 12)):
+        width = rng.randint(1, 70)
+        kind = rng.random()
+        if kind < 0.2:
+            # 跳过一段空隙
+            offset += rng.randint(1, 20)
+            layout.append([f'v{i}', width, offset])
+        elif kind < 0.35 and offset:
+            # 回到前面的位置, 与已有变量重叠
+            offset = rng.randrange(offset)
+            layout.append([f'v{i}', width, offset])
+        else:
+            layout.append([f'v{i}', width])
+        offset += width
+    return layout
+
+
+def random_pair(rng: random.Random, bits: int):
+    old = rng.getrandbits(bits + 16)
+    # 只翻转少数几位, 也覆盖大量变化和定义之外的位
+    new = old
+    for _ in range(rng.choice([0, 1, 2, 5, bits])):
+        new ^= 1 << rng.randrange(bits + 16)
+    return old, new
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        layout = random_layout(rng)
+        index = decode_core.DeltaIndex(layout)
+        for _ in range(50):
+            old, new = random_pair(rng, index.total_bits)
+            assert index.changes(old, new) == brute_force(old, new, layout), layout
+
+
+def test_gaps_offsets_and_unions():
+    layout = [['a', 4], ['b', 4, 12], ['c', 8, 0], ['d', 3, 40]]
+    index = decode_core.DeltaIndex(layout)
+    assert not index.disjoint
+    # 空隙和定义之外的位变化不报告
+    assert index.changes(0, (0xF << 8) | (1 << 43)) == []
+    # 联合体中覆盖该位的变量都报告, 按定义顺序
+    assert index.changes(0, 0x3) == [(0, 'a', 0, 3), (2, 'c', 0, 3)]
+    assert index.changes(0x1000, 0) == [(1, 'b', 1, 0)]
+    assert index.changes(5, 5) == []
+    # 起始位顺序与定义顺序不同
+    reordered = [['hi', 8, 8], ['lo', 8, 0]]
+    assert decode_core.DeltaIndex(reordered).changes(0, 0xFFFF) == [(0, 'hi', 0, 0xFF), (1, 'lo', 0, 0xFF)]
+    assert decode_core.DeltaIndex([]).changes(0, 1) == []
+
+
+def test_iter_deltas():
+    layout = [['a', 4], ['b', 4, 8]]
+    # 第一个值只作为基准, 没有变化或只有空隙中的位变化的值不产出
+    values = [0, 0, 0x1, 0x11, 0x110, 0x110]
+    assert list(decode_core.iter_deltas(values, layout)) == [
+        (2, 0x1, [(0, 'a', 0, 1)]),
+        (4, 0x110, [(0, 'a', 1, 0), (1, 'b', 0, 1)]),
+    ]
+    assert list(decode_core.iter_deltas([], layout)) == []
+
+
+def test_delta_table_model():
+    pytest.importorskip('PyQt5')
+    import decode_table_model
+
+    layout = [['mode', 2, None, {'1': 'RUN', '2': 'STOP'}], ['count', 6, 8]]
+    plan = decode_table_model.FieldPlan(layout)
+    old, new = 0x0501, 0x0702
+    changes = plan.changes(old, new)
+    assert changes == brute_force(old, new, layout)
+    model = decode_table_model.DeltaTableModel()
+    model.set_changes(changes, plan)
+    assert model.rowCount() == 2
+    rows = [[model.data(model.index(row, column)) for column in range(model.columnCount())]
+            for row in range(model.rowCount())]
+    assert rows == [['mode', '1', '2', 'RUN → STOP'], ['count', '5', '7', '']]
@@ -0,0 +1,165 @@
+"""encode_batch/encode_values 与 decode_batch 的往返测试, 变量定义随机生成"""
+import random
+
+import pytest
+
+import decode_core
+import encode_cli
+
+
+def random_layout(rng: random.Random, max_bits: int) -> list:
+    """随机变量定义: 位宽1~max_bits, 偶尔跳过若干位(指定起始位), 部分变量带有符号数含义表"""
+    layout = []
+    offset = 0
+    for i in range(rng.randint(1, 8)):
+        width = rng.choice([1, 2, 3, 7, 8, 13, 16, 31, 32, 33, 63, 64, 65, 96])
+        width = min(width, max_bits - offset)
+        if width <= 0:
+            break
+        var = [f'f{i}', width]
+        gap = rng.choice([0, 0, 0, 1, 5])
+        if gap and offset + gap + width <= max_bits:
+            offset += gap
+            var.append(offset)
+        if rng.random() < 0.4:
+            # 每个解析值只出现一次, 负数键在有符号数范围内
+            names = {}
+            seen = set()
+            for value in (-(1 << width >> 1), -1, 0, 1, (1 << width) - 1):
+                if value & ((1 << width) - 1) not in seen:
+                    seen.add(value & ((1 << width) - 1))
+                    names[str(value)] = f'F{i}_{value}'.replace('-', 'M')
+            var[2:] = [var[2] if len(var) > 2 else None, names]
+        layout.append(var)
+        offset += width
+    return layout
+
+
+def random_columns(rng: random.Random, layout: list, count: int) -> dict:
+    columns = {}
+    for var in layout:
+        width = var[1]
+        # 包含边界值
+        column = [rng.getrandbits(width) for _ in range(count)] + [0, (1 << width) - 1]
+        columns[var[0]] = column
+    return columns
+
+
+def symbol_value(key: str, width: int) -> int:
+    """含义表中的键对应的解析值, 负数按补码"""
+    return int(key) & ((1 << width) - 1)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_list_round_trip(seed):
+    rng = random.Random(seed)
+    layout = random_layout(rng, max_bits=200)
+    columns = random_columns(rng, layout, 50)
+    # 有符号的枚举值按补码编码后应当解回同一个名称
+    symbols = decode_core.layout_symbols(layout)
+    for var, table in zip(layout, symbols):
+        if table is not None:
+            keys = list(var[3])
+            columns[var[0]][:len(keys)] = [symbol_value(key, var[1]) for key in keys]
+
+    words = decode_core.encode_batch(columns, layout)
+    assert isinstance(words, list)
+    assert decode_core.decode_batch(words, layout) == columns
+    assert encode_cli.check_round_trip(words, columns, layout) == 0
+    for k, word in enumerate(words):
+        row = {name: column[k] for name, column in columns.items()}
+        assert decode_core.encode_values(row, layout) == word
+        assert decode_core.encode_values([row[var[0]] for var in layout], layout) == word
+        assert {name: value for name, (_, value) in decode_core.assign_bits_to_variables(word, layout).items()} == row
+
+    compiled = decode_core.compile_layout(layout)
+    for var, table in zip(layout, symbols):
+        if table is None:
+            continue
+        names = table.column(decode_core.decode_batch(words, layout)[var[0]])
+        assert names[:len(var[3])] == list(var[3].values())
+        for word in words[:len(var[3])]:
+            assert compiled.decode_symbols(word)[layout.index(var)] in var[3].values()
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_numpy_round_trip(seed):
+    np = pytest.importorskip('numpy')
+    rng = random.Random(seed)
+    layout = random_layout(rng, max_bits=64)
+    columns = random_columns(rng, layout, 200)
+    arrays = {name: np.array(columns[name], dtype=decode_core.field_dtype(width))
+              for name, width in encode_cli.unique_fields(layout)}
+    total_bits = decode_core.layout_bits(layout)
+
+    words = decode_core.encode_batch(arrays, layout)
+    assert isinstance(words, np.ndarray)
+    assert words.dtype == decode_core.field_dtype(total_bits)
+    # 与列表路径的结果一致
+    assert words.tolist() == decode_core.encode_batch(columns, layout)
+
+    decoded = decode_core.decode_batch(words, layout)
+    for var in layout:
+        assert decoded[var[0]].dtype == decode_core.field_dtype(var[1])
+        assert decoded[var[0]].tolist() == columns[var[0]]
+    assert encode_cli.check_round_trip(words, arrays, layout) == 0
+
+    # 解析出的Python整数列表转换回uint64后同样能解回
+    wide = decode_core.uint64_array(words.tolist())
+    assert {name: column.tolist() for name, column in decode_core.decode_batch(wide, layout).items()} == columns
+
+
+def test_64_bit_boundaries():
+    np = pytest.importorskip('numpy')
+    layout = [['all', 64]]
+    values = [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1]
+    words = decode_core.encode_batch({'all': np.array(values, dtype=np.uint64)}, layout)
+    assert words.dtype == np.uint64
+    assert words.tolist() == values
+    assert decode_core.decode_batch(words, layout)['all'].tolist() == values
+    # 列表中混有大于等于2^63的值时 uint64_array 不经过float64
+    assert decode_core.uint64_array(values).tolist() == values
+
+    layout = [['low', 1], ['high', 63]]
+    columns = {'low': np.array([1, 0, 1], dtype=np.uint8), 'high': np.array([(1 << 63) - 1, 5, 0], dtype=np.uint64)}
+    words = decode_core.encode_batch(columns, layout)
+    assert words.tolist() == [(1 << 64) - 1, 10, 1]
+    decoded = decode_core.decode_batch(words, layout)
+    assert {name: column.tolist() for name, column in decoded.items()} == {
+        name: column.tolist() for name, column in columns.items()}
+
+
+def test_wide_layout_uses_list_path():
+    np = pytest.importorskip('numpy')
+    layout = [['low', 64], ['high', 64], ['top', 3]]
+    columns = {'low': np.array([(1 << 64) - 1, 2], dtype=np.uint64), 'high': [1 << 63, 7], 'top': [5, 0]}
+    words = decode_core.encode_batch(columns, layout)
+    assert words == [(5 << 128) | (1 << 127) | ((1 << 64) - 1), 7 << 64 | 2]
+    assert decode_core.decode_batch(words, layout) == {
+        'low': [(1 << 64) - 1, 2], 'high': [1 << 63, 7], 'top': [5, 0]}
+
+
+def test_signed_numpy_columns_and_range_check():
+    np = pytest.importorskip('numpy')
+    layout = [['mode', 4, None, {'-1': 'MODE_INVALID', '3': 'MODE_RUN'}], ['count', 12]]
+    mode = np.array([-1, 3], dtype=np.int8) & np.int8(0xF)
+    words = decode_core.encode_batch({'mode': mode, 'count': np.array([1, 2], dtype=np.int16)}, layout)
+    decoded = decode_core.decode_batch(words.astype(np.int16), layout)
+    assert decoded['mode'].tolist() == [15, 3]
+    assert decode_core.layout_symbols(layout)[0].column(decoded['mode']) == ['MODE_INVALID', 'MODE_RUN']
+    with pytest.raises(ValueError):
+        decode_core.encode_batch({'mode': np.array([-1], dtype=np.int8)}, layout)
+    with pytest.raises(ValueError):
+        decode_core.encode_values({'count': 1 << 12}, layout)
+    # 不检查时超出的高位被截掉
+    assert decode_core.encode_values({'count': (1 << 12) | 1}, layout, check=False) == 1 << 4
+
+
+def test_union_overwrites_earlier_fields():
+    layout = [['word', 16], ['low', 8, 0], ['high', 8]]
+    columns = {'word': [0xFFFF, 0x1234], 'low': [0x01, 0xAB], 'high': [0x02, 0xCD]}
+    words = decode_core.encode_batch(columns, layout)
+    assert words == [0x0201, 0xCDAB]
+    assert decode_core.encode_values({'word': 0xFFFF, 'low': 1, 'high': 2}, layout) == 0x0201
+    # 被覆盖的 word 不参与比较
+    assert encode_cli.check_round_trip(words, columns, layout) == 0
@@ -0,0 +1,98 @@
+"""header_import: 解析含位域的结构体, 前向声明, 坏文件与正常文件混在一起时的目录导入"""
+import json
+
+import pytest
+
+import definition_store
+import header_import
+from variable_saver import VariableSaver
+
+GOOD = """
+#define MODE_RUN 1
+typedef enum { STATE_IDLE = 0, STATE_BUSY = 2 } state_t;
+typedef struct {
+    unsigned int low : 4;
+    state_t state : 2;
+    unsigned int : 2;
+    unsigned int high : 8;
+} status_t;
+struct plain { int a; int b; };
+"""
+
+
+def make_saver(tmp_path) -> VariableSaver:
+    return VariableSaver(store=definition_store.JsonDefinitionStore(str(tmp_path / 'defs.json')))
+
+
+def write_headers(root, files: dict):
+    root.mkdir(exist_ok=True)
+    for name, text in files.items():
+        (root / name).write_text(text, encoding='utf-8')
+    return root
+
+
+def test_bitfield_struct():
+    definitions = header_import.parse_definitions(GOOD)
+    assert list(definitions) == ['status_t']
+    # 匿名位域只占位, 其后的变量带起始位
+    assert definitions['status_t'] == [
+        ['low', 4], ['state', 2, None, {'0': 'STATE_IDLE', '2': 'STATE_BUSY'}], ['high', 8, 8]]
+
+
+def test_forward_declaration_is_skipped():
+    text = "typedef struct foo foo_t;\nstruct foo;\nstruct bar { unsigned a : 3; unsigned b : 5; };\n"
+    assert header_import.parse_definitions(text) == {'bar': [['a', 3], ['b', 5]]}
+    assert header_import.parse_definitions("typedef struct only only_t;\nstruct x { int a; };") == {}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_bad_header_does_not_stop_import(tmp_path, workers):
+    files = {f'good{i}.h': f"struct s{i} {{ unsigned a : {i + 1}; unsigned b : 3; }};\n" for i in range(8)}
+    files['fwd.h'] = "typedef struct foo foo_t;\nstruct with_bits { unsigned x : 1; };\n"
+    files['broken.h'] = "struct broken { unsigned a : 3 unsigned b : 2; };\nstruct other { unsigned c : 1; };\n"
+    root = write_headers(tmp_path / 'inc', files)
+    saver = make_saver(tmp_path)
+    manifest = tmp_path / 'defs.import.json'
+
+    result = header_import.import_headers([str(root)], saver, str(manifest), workers=workers)
+    assert result.scanned == 10
+    assert [path.rsplit('/', 1)[1] for path, _ in result.errors] == ['broken.h']
+    saved = saver.load()
+    assert set(saved) == {f's{i}' for i in range(8)} | {'with_bits'}
+    assert saved['s2'] == [['a', 3], ['b', 3]]
+    assert json.loads(manifest.read_text(encoding='utf-8'))['files'][str(root / 'broken.h')]['error']
+
+    # 内容不变时不重新解析, 解析失败的文件仍然报告
+    again = header_import.import_headers([str(root)], saver, str(manifest), workers=workers)
+    assert again.parsed == 0 and again.saved == []
+    assert len(again.errors) == 1
+
+
+def test_unexpected_parser_error_is_reported(tmp_path, monkeypatch):
+    root = write_headers(tmp_path / 'inc', {'a.h': "struct a { unsigned x : 1; };\n",
+                                            'b.h': "struct b { unsigned y : 2; };\n"})
+    parse = header_import.parse_definitions
+
+    def flaky(text, **options):
+        if 'struct b' in text:
+            raise TypeError('boom')
+        return parse(text, **options)
+
+    monkeypatch.setattr(header_import, 'parse_definitions', flaky)
+    saver = make_saver(tmp_path)
+    result = header_import.import_headers([str(root)], saver, str(tmp_path / 'm.json'), workers=1)
+    assert result.saved == ['a']
+    assert result.errors == [(str(root / 'b.h'), 'TypeError: boom')]
+
+
+def test_cli_reports_skip_and_writes_good_headers(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'config').mkdir()
+    write_headers(tmp_path / 'inc', {'a.h': "typedef struct foo foo_t;\n",
+                                     'b.h': "struct b { unsigned y : 2; unsigned z : 6; };\n",
+                                     'c.h': "struct c { unsigned q : 2 };\nstruct d { unsigned r : 1; };\n"})
+    assert header_import.main(['inc', '-j', '1']) == 1
+    err = capsys.readouterr().err
+    assert 'c.h' in err
+    saved = json.loads((tmp_path / 'config' / 'data_define.json').read_text(encoding='utf-8'))
+    assert saved == {'b': [['y', 2], ['z', 6]]}
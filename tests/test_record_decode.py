@@ -0,0 +1,96 @@
+"""record_decode: 结构化dtype映射的解码结果与 decode_core.decode_batch 一致"""
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import decode_core  # noqa: E402
+import record_decode  # noqa: E402
+
+# 记录16字节: 有跨字节的变量、起始位不在字节边界的变量, 以及跨越超过8个字节、需要逐字节拼接的变量
+LAYOUT = [['flag', 1], ['nib', 4], ['word', 13], ['cross', 60, 37], ['last', 8, 120], ['mid', 16, 100]]
+RECORD_SIZE = 16
+
+
+def write_records(path, values, byteorder='little', header=b'', tail=b''):
+    with open(path, 'wb') as f:
+        f.write(header)
+        for value in values:
+            f.write(value.to_bytes(RECORD_SIZE, byteorder))
+        f.write(tail)
+
+
+@pytest.fixture
+def values():
+    rng = random.Random(1)
+    return [rng.getrandbits(RECORD_SIZE * 8) for _ in range(300)] + [0, (1 << RECORD_SIZE * 8) - 1]
+
+
+@pytest.mark.parametrize('byteorder', ['little', 'big'])
+def test_matches_decode_batch(tmp_path, values, byteorder):
+    path = str(tmp_path / 'records.bin')
+    # 文件头和末尾不足一条记录的部分都被跳过
+    write_records(path, values, byteorder, header=b'HEAD' * 4, tail=b'\x01\x02\x03')
+    records = record_decode.RecordFile(path, RECORD_SIZE, header_offset=16, byteorder=byteorder)
+    assert len(records) == len(values)
+    columns = records.columns(LAYOUT)
+    assert columns.readers['cross'][0] == 'bytes'
+    assert columns.readers['word'][0] == 'view'
+
+    expected = decode_core.decode_batch(values, LAYOUT)
+    decoded = columns.decode()
+    assert list(decoded) == [var[0] for var in LAYOUT]
+    for var in LAYOUT:
+        assert decoded[var[0]].dtype == decode_core.field_dtype(var[1])
+        assert decoded[var[0]].tolist() == expected[var[0]], var[0]
+
+    # 分块解码与一次解码相同
+    chunks = {name: [] for name in decoded}
+    for start, chunk in columns.iter_chunks(chunk_records=64):
+        assert start % 64 == 0
+        for name, column in chunk.items():
+            chunks[name].extend(column.tolist())
+    assert chunks == expected
+
+
+def test_decode_to_npz(tmp_path, values):
+    path = str(tmp_path / 'records.bin')
+    write_records(path, values)
+    records = record_decode.RecordFile(path, RECORD_SIZE)
+    out = str(tmp_path / 'out.npz')
+    record_decode.decode_to_npz(records, LAYOUT, out, chunk_records=100)
+    expected = decode_core.decode_batch(values, LAYOUT)
+    with np.load(out) as data:
+        assert {name: data[name].tolist() for name in data.files} == expected
+
+
+def test_msb0_matches_buffer_decoder(tmp_path, values):
+    path = str(tmp_path / 'records.bin')
+    write_records(path, values, 'big')
+    records = record_decode.RecordFile(path, RECORD_SIZE, byteorder='big', bit_order='msb0')
+    decoded = records.columns(LAYOUT).decode()
+    for i, value in enumerate(values[:50]):
+        expected = decode_core.decode_buffer(value.to_bytes(RECORD_SIZE, 'big'), LAYOUT, 'big', 'msb0')
+        assert {name: int(column[i]) for name, column in decoded.items()} == expected
+
+
+def test_field_wider_than_64_bits(tmp_path, values):
+    path = str(tmp_path / 'records.bin')
+    write_records(path, values)
+    records = record_decode.RecordFile(path, RECORD_SIZE)
+    with pytest.raises(ValueError, match='超过64位'):
+        records.columns([['low', 8], ['huge', 65]])
+
+
+def test_empty_and_short_files(tmp_path):
+    path = tmp_path / 'records.bin'
+    path.write_bytes(b'\0' * 5)
+    records = record_decode.RecordFile(str(path), RECORD_SIZE)
+    assert len(records) == 0
+    assert {name: column.tolist() for name, column in records.columns(LAYOUT).decode().items()} == {
+        var[0]: [] for var in LAYOUT}
+    with pytest.raises(ValueError):
+        record_decode.RecordFile(str(path), RECORD_SIZE, header_offset=6)
+    with pytest.raises(ValueError):
+        record_decode.RecordFile(str(path), 0)
@@ -0,0 +1,152 @@
+"""stream_decode: 通过本机回环TCP/UDP套接字输入数据, 检查顺序、反压和丢弃计数"""
+import asyncio
+import contextlib
+import socket
+
+import pytest
+
+import decode_core
+import stream_decode
+
+LAYOUT = [['low', 8], ['high', 8], ['rest', 48]]
+
+
+def free_port(kind: int) -> int:
+    """取一个本机空闲端口, 用于需要在固定地址监听的数据源"""
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def collect(decoder: stream_decode.StreamDecoder, delay: float = 0):
+    """取出全部批直到结束标记, delay>0 时模拟慢速消费者"""
+    values = []
+    async for batch in decoder.iter_batches():
+        assert batch.columns == decode_core.decode_batch(batch.values, LAYOUT)
+        values.extend(batch.values)
+        if delay:
+            await asyncio.sleep(delay)
+    return values
+
+
+async def wait_for(predicate, timeout: float = 5):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "等待超时"
+        await asyncio.sleep(0.005)
+
+
+def test_tcp_connect_backpressure_keeps_every_value():
+    values = list(range(0, 1 << 20, 7))
+    text = ''.join(f"0x{value:X}\n" for value in values).encode('ascii')
+
+    async def run():
+        async def send(reader, writer):
+            # 小块写入, 数值会被拆分在两次读取之间
+            for i in range(0, len(text), 1000):
+                writer.write(text[i:i + 1000])
+                await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(send, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            decoder = stream_decode.StreamDecoder(LAYOUT, queue_size=2)
+            producer = asyncio.ensure_future(
+                stream_decode.run_sources([f"tcp://127.0.0.1:{port}"], decoder, stream_decode.TextFramer))
+            received = await collect(decoder, delay=0.001)
+            await producer
+        return decoder, received
+
+    decoder, received = asyncio.run(run())
+    assert received == values
+    assert decoder.words == len(values)
+    assert decoder.bytes == len(text)
+    assert decoder.dropped == 0
+
+
+def test_tcp_listen_binary_frames_in_order():
+    port = free_port(socket.SOCK_STREAM)
+    values = [(i << 40) | 0xA5A5 for i in range(5000)]
+    data = b''.join(value.to_bytes(8, 'big') for value in values)
+
+    async def run():
+        decoder = stream_decode.StreamDecoder(LAYOUT, queue_size=2)
+        ready = asyncio.Event()
+        producer = asyncio.ensure_future(stream_decode.run_sources(
+            [f"tcp://127.0.0.1:{port}"], decoder, lambda: stream_decode.BinaryFramer(8, 'big'),
+            listen=True, ready=ready))
+        await ready.wait()
+        _, writer = await asyncio.open_connection('127.0.0.1', port)
+        # 最后附加不完整的字, 连接结束时丢弃
+        writer.write(data + b'\x01\x02\x03')
+        await writer.drain()
+        writer.close()
+        received = []
+        async for batch in decoder.iter_batches():
+            received.extend(batch.values)
+            await asyncio.sleep(0.001)
+            if len(received) == len(values):
+                break
+        await wait_for(lambda: decoder.bytes == len(data) + 3)
+        # 监听模式一直运行, 由调用方取消
+        producer.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await producer
+        return decoder, received, await collect(decoder)
+
+    decoder, received, rest = asyncio.run(run())
+    assert received == values
+    assert rest == []
+    assert decoder.words == len(values)
+    assert decoder.dropped == 0
+
+
+def test_udp_drops_are_counted_exactly():
+    port = free_port(socket.SOCK_DGRAM)
+    datagrams = [[i * 3, i * 3 + 1, i * 3 + 2] for i in range(40)]
+    payloads = [' '.join(map(str, values)).encode('ascii') for values in datagrams]
+    queue_size = 4
+
+    async def run():
+        decoder = stream_decode.StreamDecoder(LAYOUT, queue_size=queue_size)
+        ready = asyncio.Event()
+        producer = asyncio.ensure_future(stream_decode.run_sources(
+            [f"udp://127.0.0.1:{port}"], decoder, stream_decode.TextFramer, ready=ready))
+        await ready.wait()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for payload in payloads:
+                sock.sendto(payload, ('127.0.0.1', port))
+                await asyncio.sleep(0)
+            # 没有消费者: 队列满后的数据报全部丢弃
+            await wait_for(lambda: decoder.bytes == sum(map(len, payloads)))
+        counts = decoder.words, decoder.batches, decoder.dropped
+        # 取消时队列已满, 最早的一批让位给结束标记并计入 dropped
+        producer.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await producer
+        return decoder, counts, await collect(decoder)
+
+    decoder, (words, batches, dropped), received = asyncio.run(run())
+    total = sum(map(len, datagrams))
+    assert batches == queue_size
+    assert words == 3 * queue_size
+    assert dropped == total - words
+    assert received == [value for values in datagrams[1:queue_size] for value in values]
+    assert len(received) + decoder.dropped == total
+
+
+def test_bridge_stop_before_loop_starts():
+    QtCore = pytest.importorskip('PyQt5.QtCore')
+    import stream_bridge
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    bridge = stream_bridge.StreamBridge([f"tcp://127.0.0.1:{free_port(socket.SOCK_STREAM)}"], LAYOUT,
+                                        listen=True)
+    bridge.stop()
+    bridge.start()
+    bridge.thread.join(5)
+    assert not bridge.thread.is_alive()
+    bridge.timer.stop()
+    assert app is not None
@@ -0,0 +1,132 @@
+"""变量定义存取, 不依赖PyQt5"""
+from typing import Dict, List, Any, Union, Optional, TypeVar, Generic
+
+from definition_store import DefinitionStore, JsonDefinitionStore, open_store
+
+# 泛型类型变量, 可用于函数返回值类型检查
+T = TypeVar('T')
+class VariableSaver(Generic[T]):
+    """变量保存工具，支持保存多个二维列表变量到文件
+
+    存储后端按扩展名选择: .db/.sqlite/.sqlite3 使用SQLite, 其余使用JSON,
+    也可以通过 store 参数直接指定.
+    """
+
+    def __init__(self, file_path: str = "saved_variables.json", store: Optional[DefinitionStore] = None):
+        self.file_path = './config/' + file_path
+        self.store = store if store is not None else open_store(self.file_path)
+
+    @property
+    def cache_hits(self) -> int:
+        """JSON后端的缓存命中次数"""
+        return getattr(self.store, 'cache_hits', 0)
+
+    @property
+    def cache_misses(self) -> int:
+        """JSON后端的缓存未命中次数"""
+        return getattr(self.store, 'cache_misses', 0)
+
+    def cache_info(self) -> Dict[str, int]:
+        """返回缓存命中/未命中次数"""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses}
+
+    def save(self, name: str, data: List[List[T]]) -> None:
+        """保存单个变量到文件
+
+        Args:
+            name: 变量名称
+            data: 变量内容，二维列表
+        """
+        self.store.put(name, data)
+
+        print(f"成功保存变量 '{name}' 到 {self.file_path}")
+
+    def save_many(self, items: Dict[str, List[List[T]]]) -> None:
+        """一次写入多个变量
+
+        Args:
+            items: 变量名称 -> 变量内容
+        """
+        self.store.put_many(items)
+
+        print(f"成功保存 {len(items)} 个变量到 {self.file_path}")
+    def load(self) -> Dict[str, List[List[T]]]:
+        """从文件加载之前保存的所有变量
+
+        Returns:
+            包含所有保存的变量的字典，键为变量名称，值为对应的二维列表内容
+        """
+        if not self.store.exists():
+            print(f"文件 {self.file_path} 不存在")
+            return {}
+        return self.store.load_all()
+
+    def load_single(self, variable_name: str) -> Optional[List[List[T]]]:
+        if not self.store.exists():
+            print(f"文件 {self.file_path} 不存在")
+            return None
+        return self.store.get(variable_name)
+
+    def list_variables(self) -> List[str]:
+        """列出文件中保存的所有变量名称
+
+        Returns:
+            包含所有变量名称的列表
+        """
+        if not self.store.exists():
+            print(f"文件 {self.file_path} 不存在")
+            return []
+        return self.store.names()
+
+    def delete(self, *variable_names: str) -> bool:
+        if not variable_names:
+            print("未指定要删除的变量名称")
+            return False
+
+        count = self.store.count() if self.store.exists() else 0
+        print(f"已加载 {count} 个变量")
+        if not count:
+            print("文件中没有变量可删除")
+            return False
+
+        removed = self.store.remove(variable_names)
+        for name in variable_names:
+            if name in removed:
+                print(f"已删除变量: {name}")
+            else:
+                print(f"变量不存在: {name}")
+
+        if removed:
+            print(f"删除操作完成，文件中剩余 {self.store.count()} 个变量")
+            return True
+        else:
+            print("没有变量被删除")
+            return False
+
+    def clear(self) -> bool:
+        if not self.store.exists():
+            print("文件不存在，无需清空")
+            return False
+
+        try:
+            self.store.clear()
+            print("已清空文件中的所有变量")
+            return True
+        except Exception as e:
+            print(f"清空文件时出错: {e}")
+            return False
+
+    def import_json(self, json_path: str) -> int:
+        """从JSON格式的定义文件导入全部变量, 返回导入数量"""
+        data = JsonDefinitionStore(json_path).load_all()
+        if data:
+            self.store.put_many(data)
+        print(f"已从 {json_path} 导入 {len(data)} 个变量")
+        return len(data)
+
+    def export_json(self, json_path: str) -> int:
+        """把全部变量导出为JSON格式的定义文件, 返回导出数量"""
+        data = self.store.load_all() if self.store.exists() else {}
+        JsonDefinitionStore(json_path).write_all(data)
+        print(f"已导出 {len(data)} 个变量到 {json_path}")
+        return len(data)